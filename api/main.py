@@ -1,25 +1,50 @@
 """FastAPI application for RAG system."""
 
-import uuid
+import json
+import asyncio
 import logging
-from typing import Dict, Optional
+from typing import List, Optional, Tuple
 from pathlib import Path
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from config import Config
 
-from src import GrokLLM, VectorStoreManager, DocumentProcessor, RAGChain
+from src import (
+    GrokLLM,
+    VectorStoreManager,
+    DocumentProcessor,
+    RAGChain,
+    SemanticAnswerCache,
+    IngestionPipeline,
+    DirectoryWatcher
+)
+from src.utils.ingestion import IngestProgress
+from src.utils.ingest_jobs import IngestJob, IngestJobQueue, COMPLETED, CANCELLED
+from src.utils.session_store import SessionStore, create_session_store
+from src.utils.embedding_engine import EmbeddingSettings, configure_torch_threads
+from src.utils.context_builder import ContextSettings, split_summary
+from src.utils.index_factory import IndexSettings
+from src.utils.lexical_index import HybridSettings
+from src.utils import metrics
 from api.models import (
     QueryRequest,
     QueryResponse,
+    BatchQueryRequest,
+    BatchQueryResult,
+    BatchQueryResponse,
     IngestRequest,
     IngestResponse,
+    JobResponse,
+    DocumentRequest,
+    DocumentResponse,
     HistoryResponse,
     HistoryItem,
     StatusResponse,
@@ -49,19 +74,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Session storage for multiple users
-sessions: Dict[str, RAGChain] = {}
-
-# Shared components
+# Shared components: one chain serves every session, which holds only its history
 llm: Optional[GrokLLM] = None
+rag_chain: Optional[RAGChain] = None
+session_store: Optional[SessionStore] = None
 vectorstore_manager: Optional[VectorStoreManager] = None
 document_processor: Optional[DocumentProcessor] = None
+ingestion_pipeline: Optional[IngestionPipeline] = None
+ingest_jobs: Optional[IngestJobQueue] = None
+answer_cache: Optional[SemanticAnswerCache] = None
+directory_watcher: Optional[DirectoryWatcher] = None
+
+# Caps in-flight queries so a burst cannot exhaust the search pool or the LLM quota
+query_semaphore = asyncio.Semaphore(Config.MAX_CONCURRENT_QUERIES)
+
+# Sessions whose summary is being updated by this process; a second update waits for the next turn
+summarizing_sessions: set = set()
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize components on startup."""
-    global llm, vectorstore_manager, document_processor
+    global llm, rag_chain, session_store, vectorstore_manager, document_processor, ingestion_pipeline
+    global ingest_jobs, answer_cache, directory_watcher
     
     try:
         logger.info("Initializing RAG components...")
@@ -74,15 +109,111 @@ async def startup_event():
             max_tokens=Config.MAX_TOKENS
         )
         
+        embedding_settings = EmbeddingSettings(
+            batch_size=Config.EMBEDDING_BATCH_SIZE,
+            num_processes=Config.EMBEDDING_PROCESSES,
+            torch_threads=Config.EMBEDDING_TORCH_THREADS,
+            sort_by_length=Config.EMBEDDING_SORT_BY_LENGTH,
+            normalize=Config.EMBEDDING_NORMALIZE,
+            device=Config.EMBEDDING_DEVICE,
+            backend=Config.EMBEDDING_BACKEND,
+            onnx_path=str(Config.EMBEDDING_ONNX_PATH),
+            quantize=Config.EMBEDDING_QUANTIZE
+        )
+        configure_torch_threads(embedding_settings)
+        
         vectorstore_manager = VectorStoreManager(
             vectorstore_path=Config.VECTORSTORE_PATH,
-            embedding_model=Config.EMBEDDING_MODEL
+            embedding_model=Config.EMBEDDING_MODEL,
+            search_workers=Config.SEARCH_WORKERS,
+            query_cache_size=Config.QUERY_CACHE_SIZE,
+            query_cache_ttl=Config.QUERY_CACHE_TTL,
+            index_settings=IndexSettings(
+                index_type=Config.INDEX_TYPE,
+                nlist=Config.IVF_NLIST,
+                nprobe=Config.IVF_NPROBE,
+                pq_m=Config.PQ_M,
+                hnsw_m=Config.HNSW_M,
+                ef_construction=Config.HNSW_EF_CONSTRUCTION,
+                ef_search=Config.HNSW_EF_SEARCH,
+                train_sample=Config.INDEX_TRAIN_SAMPLE
+            ),
+            compaction_segments=Config.COMPACTION_SEGMENTS,
+            embedding_settings=embedding_settings,
+            hybrid_settings=HybridSettings(
+                dense_weight=Config.HYBRID_DENSE_WEIGHT,
+                lexical_weight=Config.HYBRID_LEXICAL_WEIGHT,
+                rrf_k=Config.HYBRID_RRF_K,
+                candidates=Config.HYBRID_CANDIDATES
+            )
         )
         
         document_processor = DocumentProcessor(
             chunk_size=Config.CHUNK_SIZE,
-            chunk_overlap=Config.CHUNK_OVERLAP
+            chunk_overlap=Config.CHUNK_OVERLAP,
+            load_workers=Config.LOAD_WORKERS
+        )
+        
+        ingestion_pipeline = IngestionPipeline(
+            document_processor=document_processor,
+            vectorstore_manager=vectorstore_manager,
+            batch_size=Config.INGEST_BATCH_SIZE,
+            queue_size=Config.INGEST_QUEUE_SIZE
+        )
+        
+        ingest_jobs = IngestJobQueue(
+            ingestion_pipeline,
+            max_workers=Config.INGEST_JOB_WORKERS,
+            history_size=Config.INGEST_JOB_HISTORY
+        )
+        
+        if Config.ANSWER_CACHE_ENABLED:
+            answer_cache = SemanticAnswerCache(
+                max_size=Config.ANSWER_CACHE_SIZE,
+                ttl_seconds=Config.ANSWER_CACHE_TTL,
+                similarity_threshold=Config.ANSWER_CACHE_THRESHOLD
+            )
+        
+        rag_chain = RAGChain(
+            llm=llm,
+            vectorstore_manager=vectorstore_manager,
+            top_k=Config.TOP_K_RESULTS,
+            answer_cache=answer_cache,
+            context_settings=ContextSettings(
+                max_prompt_tokens=Config.MAX_PROMPT_TOKENS,
+                min_score=Config.MIN_RELEVANCE_SCORE,
+                history_exchanges=Config.HISTORY_EXCHANGES,
+                max_history_tokens=Config.MAX_HISTORY_TOKENS,
+                max_history_entry_tokens=Config.MAX_HISTORY_ENTRY_TOKENS,
+                memory=Config.MEMORY_MODE,
+                max_summary_tokens=Config.MAX_SUMMARY_TOKENS
+            )
+        )
+        
+        session_store = create_session_store(
+            Config.SESSION_BACKEND,
+            max_sessions=Config.MAX_SESSIONS,
+            ttl_seconds=Config.SESSION_TTL,
+            max_history=RAGChain.MAX_HISTORY,
+            sqlite_path=Config.SESSION_SQLITE_PATH,
+            redis_url=Config.SESSION_REDIS_URL
+        )
+        
+        # Read at scrape time, so the query path never updates them
+        metrics.INDEX_CHUNKS.set_function(
+            lambda: vectorstore_manager.vector_index.live_count if vectorstore_manager.vector_index is not None else 0
         )
+        metrics.SESSIONS_ACTIVE.set_function(lambda: session_store.stats()["active"])
+        
+        if Config.WATCH_DIR:
+            # Syncs run on the watcher's thread; queries keep being served from the current index
+            directory_watcher = DirectoryWatcher(
+                Path(Config.WATCH_DIR),
+                ingestion_pipeline,
+                interval=Config.WATCH_INTERVAL,
+                debounce=Config.WATCH_DEBOUNCE
+            )
+            directory_watcher.start()
         
         logger.info("RAG components initialized successfully")
         
@@ -91,23 +222,87 @@ async def startup_event():
         raise
 
 
-def get_or_create_session(session_id: Optional[str] = None) -> tuple[str, RAGChain]:
-    """Get existing session or create new one."""
-    if session_id and session_id in sessions:
-        return session_id, sessions[session_id]
-    
-    if llm is None or vectorstore_manager is None:
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the directory watcher and ingest jobs, letting work in progress reach a safe point."""
+    if directory_watcher is not None:
+        await run_in_threadpool(directory_watcher.stop)
+    if ingest_jobs is not None:
+        await run_in_threadpool(ingest_jobs.shutdown)
+    if session_store is not None:
+        session_store.close()
+
+
+async def get_or_create_session(session_id: Optional[str] = None) -> tuple[str, List[Tuple[str, str]]]:
+    """Get an existing session's history, or create a new session."""
+    if rag_chain is None or session_store is None:
         raise RuntimeError("Components not initialized")
     
-    new_session_id = str(uuid.uuid4())
-    sessions[new_session_id] = RAGChain(
-        llm=llm,
-        vectorstore_manager=vectorstore_manager,
-        top_k=Config.TOP_K_RESULTS
-    )
+    # Shared stores do network or disk I/O, so keep it off the event loop
+    if session_id:
+        history = await run_in_threadpool(session_store.get_history, session_id)
+        if history is not None:
+            return session_id, history
     
-    logger.info(f"Created new session: {new_session_id}")
-    return new_session_id, sessions[new_session_id]
+    return await run_in_threadpool(session_store.create), []
+
+
+async def summarize_session(session_id: str) -> None:
+    """
+    Fold a session's older exchanges into its rolling summary.
+    
+    Runs as a background task once the response has been sent, so the
+    summary LLM call never adds to the user's latency.
+    """
+    if session_id in summarizing_sessions:
+        return
+    summarizing_sessions.add(session_id)
+    try:
+        history = await run_in_threadpool(session_store.get_history, session_id)
+        summarized = await rag_chain.summarizer.asummarize(history) if history else None
+        # Only folds if the session still starts with the summarized entries
+        if summarized is not None:
+            await run_in_threadpool(session_store.fold_history, session_id, *summarized)
+    except Exception as e:
+        logger.warning(f"Could not update the summary of session {session_id}: {e}")
+        metrics.ERRORS.labels("summary").inc()
+    finally:
+        summarizing_sessions.discard(session_id)
+
+
+def _ingest_response(progress: IngestProgress) -> IngestResponse:
+    """Build an ingest result from the pipeline's final counters."""
+    if progress.cancelled:
+        message = f"Cancelled after ingesting {progress.chunks_added} new document chunks"
+    elif progress.chunks_added:
+        message = (
+            f"Successfully ingested {progress.chunks_added} new document chunks "
+            f"({progress.chunks_skipped} already indexed)"
+        )
+    elif progress.chunks_skipped or progress.files_skipped:
+        message = "No new content: everything is already indexed"
+    else:
+        message = "No documents found or processed"
+    
+    return IngestResponse(
+        success=progress.chunks_added + progress.chunks_skipped + progress.files_skipped > 0,
+        message=message,
+        documents_processed=progress.chunks_added,
+        chunks_skipped=progress.chunks_skipped,
+        files_processed=progress.files_processed,
+        files_skipped=progress.files_skipped,
+        files_failed=progress.files_failed,
+        failed_files=progress.failed_files,
+        batches=progress.batches_added,
+        elapsed_seconds=round(progress.elapsed_seconds, 3)
+    )
+
+
+def _job_response(job: IngestJob) -> JobResponse:
+    """Build a job response; the result is included once the job has finished."""
+    details = job.to_dict()
+    details["result"] = _ingest_response(job.progress) if job.status in (COMPLETED, CANCELLED) else None
+    return JobResponse(**details)
 
 
 @app.get("/", response_class=FileResponse)
@@ -122,15 +317,33 @@ async def get_status():
     if vectorstore_manager is None:
         raise HTTPException(status_code=500, detail="Server not initialized")
     
+    index = vectorstore_manager.vector_index
     return StatusResponse(
         status="online",
-        vectorstore_initialized=vectorstore_manager.is_initialized(),
-        model_name=Config.MODEL_NAME
+        vectorstore_initialized=index is not None,
+        model_name=Config.MODEL_NAME,
+        index_version=index.version if index is not None else 0,
+        indexed_chunks=index.live_count if index is not None else 0,
+        sessions=await run_in_threadpool(session_store.stats) if session_store is not None else None,
+        answer_cache=answer_cache.stats() if answer_cache is not None else None
     )
 
 
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Prometheus metrics: per-stage latency histograms, cache, session, ingest and error counters.
+
+    The registry lives in this process only. Under ``uvicorn --workers N``
+    each scrape reaches one worker and reports that worker's counts, so
+    run a single worker per port when scraping.
+    """
+    # Gauges may query a shared session store, so render off the event loop
+    return Response(content=await run_in_threadpool(metrics.render), media_type=metrics.CONTENT_TYPE)
+
+
 @app.post("/api/query", response_model=QueryResponse)
-async def query(request: QueryRequest):
+async def query(request: QueryRequest, background_tasks: BackgroundTasks):
     """
     Query the RAG system.
     
@@ -139,13 +352,16 @@ async def query(request: QueryRequest):
     - **maintain_history**: Whether to save this exchange in conversation history
     """
     try:
-        session_id, rag_chain = get_or_create_session(request.session_id)
+        session_id, history = await get_or_create_session(request.session_id)
         
-        # Query the system
-        result = rag_chain.query(
-            question=request.question,
-            maintain_history=request.maintain_history
-        )
+        # Query the system without blocking the event loop
+        async with query_semaphore:
+            result = await rag_chain.aquery(question=request.question, history=history)
+        
+        if request.maintain_history and not result.get("error"):
+            await run_in_threadpool(session_store.append, session_id, request.question, result["answer"])
+            if rag_chain.summarizer is not None:
+                background_tasks.add_task(summarize_session, session_id)
         
         # Convert sources to proper format
         sources = [
@@ -159,7 +375,8 @@ async def query(request: QueryRequest):
         return QueryResponse(
             answer=result["answer"],
             sources=sources,
-            session_id=session_id
+            session_id=session_id,
+            prompt_tokens=result.get("prompt_tokens")
         )
         
     except Exception as e:
@@ -167,62 +384,128 @@ async def query(request: QueryRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/ingest", response_model=IngestResponse)
-async def ingest_documents(request: IngestRequest):
+@app.post("/api/query/batch", response_model=BatchQueryResponse)
+async def query_batch(request: BatchQueryRequest):
     """
-    Ingest documents from a file or directory path.
+    Answer a batch of independent questions, e.g. for offline evaluation.
     
-    - **path**: Path to file or directory containing documents
+    The questions are embedded and searched together, and up to
+    BATCH_QUERY_CONCURRENCY LLM calls run at a time. No session is used:
+    each question is answered without conversation history. A failed
+    question is reported in its own result and does not fail the batch.
+    
+    - **questions**: The questions to answer
     """
-    try:
-        if document_processor is None or vectorstore_manager is None:
-            raise HTTPException(status_code=500, detail="Server not initialized")
-        
-        file_path = Path(request.path)
-        
-        if not file_path.exists():
-            raise HTTPException(status_code=404, detail=f"Path not found: {request.path}")
-        
-        # Load and process documents
-        documents = document_processor.load_and_process(file_path)
-        
-        if not documents:
-            return IngestResponse(
-                success=False,
-                message="No documents found or processed",
-                documents_processed=0
-            )
-        
-        # Add to vectorstore
-        vectorstore_manager.add_documents(documents)
-        
-        return IngestResponse(
-            success=True,
-            message=f"Successfully ingested {len(documents)} document chunks",
-            documents_processed=len(documents)
+    if rag_chain is None:
+        raise HTTPException(status_code=500, detail="Components not initialized")
+    if len(request.questions) > Config.MAX_BATCH_QUERIES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {Config.MAX_BATCH_QUERIES} questions per batch"
         )
-        
-    except HTTPException:
-        raise
+    
+    # The whole batch takes one query slot; its own limit bounds the LLM calls
+    async with query_semaphore:
+        results = await rag_chain.abatch_query(
+            request.questions,
+            max_concurrency=Config.BATCH_QUERY_CONCURRENCY
+        )
+    
+    return BatchQueryResponse(
+        results=[
+            BatchQueryResult(
+                answer=result["answer"],
+                sources=[Source(content=src["content"], metadata=src["metadata"]) for src in result["sources"]],
+                error=bool(result.get("error")),
+                prompt_tokens=result.get("prompt_tokens")
+            )
+            for result in results
+        ]
+    )
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format a Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/query/stream")
+async def query_stream(request: QueryRequest):
+    """
+    Query the RAG system and stream the answer as Server-Sent Events.
+    
+    Emits a ``sources`` event (with the session ID) once retrieval finishes,
+    ``token`` events as the answer is generated, and a final ``done`` event
+    with the full answer and time-to-first-token. History is only updated
+    once the stream completes.
+    
+    - **question**: The user's question
+    - **session_id**: Optional session ID for conversation continuity
+    - **maintain_history**: Whether to save this exchange in conversation history
+    """
+    try:
+        session_id, history = await get_or_create_session(request.session_id)
     except Exception as e:
-        logger.error(f"Error ingesting documents: {e}")
+        logger.error(f"Error creating session: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    async def event_stream():
+        async with query_semaphore:
+            async for event in rag_chain.astream(question=request.question, history=history):
+                event_type = event.pop("type")
+                if event_type == "done" and request.maintain_history:
+                    await run_in_threadpool(session_store.append, session_id, request.question, event["answer"])
+                if event_type in ("sources", "done"):
+                    event["session_id"] = session_id
+                yield _sse_event(event_type, event)
+    
+    # Runs after the last event has been sent
+    summarize = None
+    if request.maintain_history and rag_chain.summarizer is not None:
+        summarize = BackgroundTask(summarize_session, session_id)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=summarize
+    )
 
 
-@app.post("/api/upload")
+@app.post("/api/ingest", response_model=JobResponse, status_code=202)
+async def ingest_documents(request: IngestRequest):
+    """
+    Queue an ingest of a file or directory path.
+    
+    Returns at once; poll `/api/jobs/{job_id}` for progress and the result.
+    
+    - **path**: Path to file or directory containing documents
+    """
+    if ingest_jobs is None:
+        raise HTTPException(status_code=500, detail="Server not initialized")
+    
+    file_path = Path(request.path)
+    
+    if not file_path.exists():
+        raise HTTPException(status_code=404, detail=f"Path not found: {request.path}")
+    
+    return _job_response(ingest_jobs.submit(file_path))
+
+
+@app.post("/api/upload", response_model=JobResponse, status_code=202)
 async def upload_file(file: UploadFile = File(...)):
     """
-    Upload and ingest a document file.
+    Upload a document file and queue its ingest.
     
     - **file**: Document file to upload and process
     """
+    if ingest_jobs is None:
+        raise HTTPException(status_code=500, detail="Server not initialized")
+    
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="No filename provided")
+    
     try:
-        if document_processor is None or vectorstore_manager is None:
-            raise HTTPException(status_code=500, detail="Server not initialized")
-        
-        if not file.filename:
-            raise HTTPException(status_code=400, detail="No filename provided")
-        
         # Save uploaded file
         upload_dir = Config.DATA_DIR / "uploads"
         upload_dir.mkdir(parents=True, exist_ok=True)
@@ -233,28 +516,94 @@ async def upload_file(file: UploadFile = File(...)):
             content = await file.read()
             f.write(content)
         
-        # Process the uploaded file
-        documents = document_processor.load_and_process(file_path)
-        
-        if not documents:
-            return IngestResponse(
-                success=False,
-                message="Failed to process uploaded file",
-                documents_processed=0
-            )
-        
-        # Add to vectorstore
-        vectorstore_manager.add_documents(documents)
-        
-        return IngestResponse(
-            success=True,
-            message=f"Successfully uploaded and ingested {len(documents)} chunks from {file.filename}",
-            documents_processed=len(documents)
-        )
-        
     except Exception as e:
         logger.error(f"Error uploading file: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    return _job_response(ingest_jobs.submit(file_path))
+
+
+@app.get("/api/jobs", response_model=List[JobResponse])
+async def list_jobs():
+    """List ingestion jobs, oldest first."""
+    if ingest_jobs is None:
+        raise HTTPException(status_code=500, detail="Server not initialized")
+    
+    return [_job_response(job) for job in ingest_jobs.list()]
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """
+    Get the progress of an ingestion job, and its result once finished.
+    
+    - **job_id**: Job identifier returned by `/api/ingest` or `/api/upload`
+    """
+    job = ingest_jobs.get(job_id) if ingest_jobs is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return _job_response(job)
+
+
+@app.delete("/api/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """
+    Cancel an ingestion job.
+    
+    A queued job never starts; a running job stops before its next batch,
+    keeping the batches it already added.
+    
+    - **job_id**: Job identifier
+    """
+    job = ingest_jobs.cancel(job_id) if ingest_jobs is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return _job_response(job)
+
+
+@app.put("/api/documents", response_model=DocumentResponse)
+async def update_document(request: DocumentRequest):
+    """
+    Re-index an edited document, replacing only the chunks that changed.
+    
+    - **path**: Path of the document file
+    """
+    if ingestion_pipeline is None:
+        raise HTTPException(status_code=500, detail="Server not initialized")
+    
+    file_path = Path(request.path)
+    if not file_path.is_file():
+        raise HTTPException(status_code=404, detail=f"File not found: {request.path}")
+    
+    try:
+        added, removed = await run_in_threadpool(ingestion_pipeline.update_file, file_path)
+    except ValueError as e:
+        logger.error(f"Error updating {request.path}: {e}")
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error updating {request.path}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return DocumentResponse(path=request.path, chunks_added=added, chunks_removed=removed)
+
+
+@app.delete("/api/documents", response_model=DocumentResponse)
+async def delete_document(path: str):
+    """
+    Remove every chunk of a document from the index.
+    
+    - **path**: Path of the document file, as it was ingested
+    """
+    if vectorstore_manager is None:
+        raise HTTPException(status_code=500, detail="Server not initialized")
+    
+    removed = await run_in_threadpool(vectorstore_manager.delete_source, path)
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"No indexed chunks for {path}")
+    
+    return DocumentResponse(path=path, chunks_removed=removed)
 
 
 @app.get("/api/history/{session_id}", response_model=HistoryResponse)
@@ -264,17 +613,14 @@ async def get_history(session_id: str):
     
     - **session_id**: Session identifier
     """
-    if session_id not in sessions:
+    history = await run_in_threadpool(session_store.get_history, session_id) if session_store is not None else None
+    if history is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    rag_chain = sessions[session_id]
-    history = [
-        HistoryItem(question=q, answer=a)
-        for q, a in rag_chain.chat_history
-    ]
-    
+    summary, exchanges = split_summary(history)
     return HistoryResponse(
-        history=history,
+        history=[HistoryItem(question=q, answer=a) for q, a in exchanges],
+        summary=summary,
         session_id=session_id
     )
 
@@ -286,14 +632,23 @@ async def clear_history(session_id: str):
     
     - **session_id**: Session identifier
     """
-    if session_id not in sessions:
+    if session_store is None or not await run_in_threadpool(session_store.clear, session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    sessions[session_id].clear_history()
-    
     return {"message": "History cleared", "session_id": session_id}
 
 
+@app.delete("/api/cache")
+async def clear_answer_cache():
+    """Clear the semantic answer cache."""
+    if answer_cache is None:
+        raise HTTPException(status_code=404, detail="Answer cache is not enabled")
+    
+    answer_cache.clear()
+    
+    return {"message": "Answer cache cleared"}
+
+
 @app.delete("/api/session/{session_id}")
 async def delete_session(session_id: str):
     """
@@ -301,11 +656,9 @@ async def delete_session(session_id: str):
     
     - **session_id**: Session identifier
     """
-    if session_id not in sessions:
+    if session_store is None or not await run_in_threadpool(session_store.delete, session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    del sessions[session_id]
-    
     return {"message": "Session deleted", "session_id": session_id}
 
 
@@ -22,6 +22,25 @@ class QueryResponse(BaseModel):
     answer: str = Field(..., description="The generated answer")
     sources: List[Source] = Field(default_factory=list, description="Source documents used")
     session_id: str = Field(..., description="Session ID for future requests")
+    prompt_tokens: Optional[int] = Field(None, description="Estimated prompt tokens sent to the LLM (null if answered from cache)")
+
+
+class BatchQueryRequest(BaseModel):
+    """Request model for batch query endpoint."""
+    questions: List[str] = Field(..., min_length=1, description="Independent questions, answered without conversation history")
+
+
+class BatchQueryResult(BaseModel):
+    """Answer to one question of a batch."""
+    answer: str = Field(..., description="The generated answer, or the error message")
+    sources: List[Source] = Field(default_factory=list, description="Source documents used")
+    error: bool = Field(False, description="Whether this question failed")
+    prompt_tokens: Optional[int] = Field(None, description="Estimated prompt tokens sent to the LLM (null if answered from cache or failed)")
+
+
+class BatchQueryResponse(BaseModel):
+    """Response model for batch query endpoint."""
+    results: List[BatchQueryResult] = Field(default_factory=list, description="Results in question order")
 
 
 class IngestRequest(BaseModel):
@@ -33,7 +52,39 @@ class IngestResponse(BaseModel):
     """Response model for ingest endpoint."""
     success: bool = Field(..., description="Whether ingestion was successful")
     message: str = Field(..., description="Details about the ingestion")
-    documents_processed: int = Field(..., description="Number of document chunks processed")
+    documents_processed: int = Field(..., description="Number of new document chunks added to the index")
+    chunks_skipped: int = Field(0, description="Number of chunks skipped because they were already indexed")
+    files_processed: int = Field(0, description="Number of files read")
+    files_skipped: int = Field(0, description="Number of files skipped because they are unchanged since the last ingest")
+    files_failed: int = Field(0, description="Number of files that could not be processed")
+    failed_files: List[str] = Field(default_factory=list, description="Paths of the files that failed")
+    batches: int = Field(0, description="Number of embedding batches added to the index")
+    elapsed_seconds: float = Field(0.0, description="Wall-clock ingestion time")
+
+
+class JobResponse(BaseModel):
+    """Response model for ingestion job endpoints."""
+    job_id: str = Field(..., description="Job identifier")
+    path: str = Field(..., description="File or directory being ingested")
+    status: str = Field(..., description="queued, running, completed, failed or cancelled")
+    progress: Dict = Field(default_factory=dict, description="Files and chunks processed so far")
+    result: Optional[IngestResponse] = Field(None, description="Final counters, once the job has finished")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+    created_at: float = Field(..., description="Submission time (Unix seconds)")
+    started_at: Optional[float] = Field(None, description="Start time (Unix seconds)")
+    finished_at: Optional[float] = Field(None, description="Completion time (Unix seconds)")
+
+
+class DocumentRequest(BaseModel):
+    """Request model for updating an indexed document."""
+    path: str = Field(..., description="Path of the document file")
+
+
+class DocumentResponse(BaseModel):
+    """Response model for document update and delete endpoints."""
+    path: str = Field(..., description="Path of the document file")
+    chunks_added: int = Field(0, description="Number of new chunks embedded and added")
+    chunks_removed: int = Field(0, description="Number of stale chunks removed from the index")
 
 
 class HistoryItem(BaseModel):
@@ -45,6 +96,7 @@ class HistoryItem(BaseModel):
 class HistoryResponse(BaseModel):
     """Response model for history endpoint."""
     history: List[HistoryItem] = Field(default_factory=list, description="Conversation history items")
+    summary: Optional[str] = Field(None, description="Rolling summary of earlier exchanges (summary memory only)")
     session_id: str = Field(..., description="Session ID")
 
 
@@ -53,3 +105,7 @@ class StatusResponse(BaseModel):
     status: str = Field(..., description="Server status")
     vectorstore_initialized: bool = Field(..., description="Whether vectorstore is initialized")
     model_name: str = Field(..., description="Current model name")
+    index_version: int = Field(0, description="Version of the served index; increases with every add, delete or compaction")
+    indexed_chunks: int = Field(0, description="Number of searchable chunks")
+    sessions: Optional[Dict] = Field(None, description="Active sessions and eviction counters")
+    answer_cache: Optional[Dict] = Field(None, description="Answer cache statistics, if the cache is enabled")
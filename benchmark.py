@@ -0,0 +1,428 @@
+"""Performance benchmarks for the RAG components.
+
+Run one benchmark at a time, e.g.:
+
+    python benchmark.py ann --num-vectors 200000
+    python benchmark.py loading --files 2000 --workers 1 2 4
+    python benchmark.py embedding --batch-sizes 32 128 --processes 1 4
+    python benchmark.py lexical --num-chunks 1000000
+    python benchmark.py onnx --onnx-path ./onnx_model
+    python benchmark.py metrics
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+
+from src.utils.index_factory import IndexSettings, INDEX_TYPES, build_index, train_index, apply_search_params
+
+
+def synthetic_vectors(num_vectors: int, dim: int, num_clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """Clustered Gaussian vectors, closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(num_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, num_clusters, size=num_vectors)
+    vectors = centers[labels] + 0.3 * rng.normal(size=(num_vectors, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def percentile_ms(samples, q: float) -> float:
+    """Percentile of a list of durations (seconds), in milliseconds."""
+    return float(np.percentile(samples, q) * 1000)
+
+
+def benchmark_ann(args) -> None:
+    """Compare recall@k and per-query latency of each index type against flat search."""
+    print(f"Corpus: {args.num_vectors} x {args.dim}, {args.queries} queries, k={args.k}")
+    corpus = synthetic_vectors(args.num_vectors, args.dim)
+    queries = synthetic_vectors(args.queries, args.dim, seed=1)
+
+    results = {}
+    ground_truth = None
+    for index_type in INDEX_TYPES:
+        settings = IndexSettings(
+            index_type=index_type,
+            nlist=args.nlist,
+            nprobe=args.nprobe,
+            pq_m=args.pq_m,
+            ef_search=args.ef_search
+        )
+
+        start = time.perf_counter()
+        index = build_index(settings, args.dim, len(corpus))
+        train_index(index, corpus, settings.train_sample)
+        index.add(corpus)
+        apply_search_params(index, settings)
+        build_time = time.perf_counter() - start
+
+        latencies = []
+        found = []
+        for query in queries:
+            start = time.perf_counter()
+            _, ids = index.search(query.reshape(1, -1), args.k)
+            latencies.append(time.perf_counter() - start)
+            found.append(ids[0])
+
+        if ground_truth is None:
+            ground_truth = found
+        recall = np.mean([
+            len(set(f) & set(g)) / args.k for f, g in zip(found, ground_truth)
+        ])
+        results[index_type] = (build_time, recall, latencies)
+
+    print(f"\n{'index':10} {'build s':>9} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    print("-" * 48)
+    for index_type, (build_time, recall, latencies) in results.items():
+        print(
+            f"{index_type:10} {build_time:9.2f} {recall:9.3f} "
+            f"{percentile_ms(latencies, 50):8.3f} {percentile_ms(latencies, 99):8.3f}"
+        )
+
+
+STARTUP_PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+
+def rss_mb():
+    # Private (anonymous) and shared file-backed resident memory, Linux only
+    usage = {{"RssAnon:": 0.0, "RssFile:": 0.0}}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key = line.split(":")[0] + ":"
+            if key in usage:
+                usage[key] = int(line.split()[1]) / 1024
+    return usage["RssAnon:"], usage["RssFile:"]
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import FakeEmbeddings
+from src.utils.segment_store import SegmentStore
+
+anon_before, file_before = rss_mb()
+start = time.perf_counter()
+if {fmt!r} == "pickle":
+    store = FAISS.load_local({path!r}, FakeEmbeddings(size={dim}), allow_dangerous_deserialization=True)
+    loaded = time.perf_counter()
+    store.similarity_search_by_vector([0.1] * {dim}, k=4)
+else:
+    index = SegmentStore(__import__("pathlib").Path({path!r})).load(mmap=True)
+    loaded = time.perf_counter()
+    index.search(np.full((1, {dim}), 0.1, dtype=np.float32), 4)
+first_query = time.perf_counter()
+anon_after, file_after = rss_mb()
+print(json.dumps({{"load_ms": (loaded - start) * 1000, "first_query_ms": (first_query - loaded) * 1000,
+                  "private_mb": anon_after - anon_before, "shared_mb": file_after - file_before}}))
+"""
+
+
+def benchmark_startup(args) -> None:
+    """Compare cold-start time and RSS of the pickle format and the memory-mapped snapshot."""
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_core.embeddings import FakeEmbeddings
+    from src.utils.segment_store import SegmentStore
+
+    print(f"Corpus: {args.num_chunks} chunks x {args.dim} dims, ~{args.chunk_chars} chars each")
+    vectors = synthetic_vectors(args.num_chunks, args.dim)
+    filler = "lorem ipsum dolor sit amet " * (args.chunk_chars // 27 + 1)
+    documents = [
+        Document(id=f"chunk-{i}", page_content=f"{i} {filler[:args.chunk_chars]}", metadata={"source": f"doc_{i // 20}.txt"})
+        for i in range(args.num_chunks)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_dir = Path(tmp) / "pickle"
+        index = faiss.IndexFlatL2(args.dim)
+        index.add(vectors)
+        FAISS(
+            embedding_function=FakeEmbeddings(size=args.dim),
+            index=index,
+            docstore=InMemoryDocstore({doc.id: doc for doc in documents}),
+            index_to_docstore_id={i: doc.id for i, doc in enumerate(documents)}
+        ).save_local(str(pickle_dir))
+
+        mmap_dir = Path(tmp) / "mmap"
+        SegmentStore(mmap_dir).write_base(index, documents, covered_segments=[])
+
+        print(f"\n{'format':8} {'load ms':>9} {'1st query ms':>13} {'private MB':>11} {'shared MB':>10}")
+        print("-" * 56)
+        for fmt, path in (("pickle", pickle_dir), ("mmap", mmap_dir)):
+            probe = STARTUP_PROBE.format(root=str(Path(__file__).parent), fmt=fmt, path=str(path), dim=args.dim)
+            output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+            result = json.loads(output.stdout.strip().splitlines()[-1])
+            print(
+                f"{fmt:8} {result['load_ms']:9.1f} {result['first_query_ms']:13.1f} "
+                f"{result['private_mb']:11.1f} {result['shared_mb']:10.1f}"
+            )
+        print("\nShared (file-backed) pages live in the OS page cache and are shared by all workers.")
+
+
+def write_synthetic_corpus(directory: Path, num_files: int, paragraphs: int, seed: int = 0) -> None:
+    """Write a mix of .txt and .csv files with pseudo-random prose."""
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([
+        "index", "vector", "query", "chunk", "latency", "throughput", "embedding", "document",
+        "retrieval", "cache", "batch", "worker", "memory", "segment", "snapshot", "token"
+    ])
+    for i in range(num_files):
+        sentences = [
+            " ".join(rng.choice(vocabulary, size=12)).capitalize() + "."
+            for _ in range(paragraphs * 5)
+        ]
+        if i % 5 == 4:
+            rows = "\n".join(f"{j},{sentence}" for j, sentence in enumerate(sentences))
+            (directory / f"table_{i:05d}.csv").write_text("id,text\n" + rows, encoding="utf-8")
+        else:
+            body = "\n\n".join(" ".join(sentences[j:j + 5]) for j in range(0, len(sentences), 5))
+            (directory / f"doc_{i:05d}.txt").write_text(body, encoding="utf-8")
+
+
+def benchmark_loading(args) -> None:
+    """Files/sec and chunks/sec of directory loading for several worker counts."""
+    from src.utils.document_processor import DocumentProcessor
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = Path(tmp)
+        write_synthetic_corpus(corpus, args.files, args.paragraphs)
+        print(f"Corpus: {args.files} files (.txt/.csv), {args.paragraphs} paragraphs each")
+
+        print(f"\n{'workers':>7} {'seconds':>9} {'files/s':>9} {'chunks/s':>10} {'chunks':>8}")
+        print("-" * 47)
+        for workers in args.workers:
+            processor = DocumentProcessor(args.chunk_size, args.chunk_overlap, load_workers=workers)
+            start = time.perf_counter()
+            files = chunks = 0
+            for result in processor.iter_directory_chunks(corpus):
+                files += 1
+                chunks += len(result.chunks)
+            elapsed = time.perf_counter() - start
+            print(f"{workers:7d} {elapsed:9.2f} {files / elapsed:9.1f} {chunks / elapsed:10.1f} {chunks:8d}")
+
+
+def benchmark_embedding(args) -> None:
+    """Chunks/sec of the embedding engine for each batch size / process / thread / sorting combination."""
+    import itertools
+    from src.utils.embedding_engine import EmbeddingEngine, EmbeddingSettings, configure_torch_threads
+
+    rng = np.random.default_rng(0)
+    words = "retrieval augmented generation embeds chunks of text into dense vectors for search".split()
+    # Chunk lengths spread like real splitter output: many full chunks, a tail of short ones
+    lengths = np.clip(rng.normal(args.mean_words, args.mean_words / 2, size=args.chunks), 5, None).astype(int)
+    texts = [" ".join(rng.choice(words, size=n)) for n in lengths]
+    print(f"Corpus: {args.chunks} chunks, ~{args.mean_words} words each, model {args.model}")
+
+    print(f"\n{'batch':>6} {'procs':>6} {'threads':>8} {'sorted':>7} {'seconds':>9} {'chunks/s':>10}")
+    print("-" * 51)
+    for batch_size, processes, threads, sort in itertools.product(
+        args.batch_sizes, args.processes, args.threads, args.sort
+    ):
+        settings = EmbeddingSettings(
+            batch_size=batch_size,
+            num_processes=processes,
+            torch_threads=threads,
+            sort_by_length=bool(sort)
+        )
+        configure_torch_threads(settings)
+        engine = EmbeddingEngine(args.model, settings)
+        engine.encode(texts[:batch_size * 2])  # warm-up, starts the pool if any
+        start = time.perf_counter()
+        engine.encode(texts)
+        elapsed = time.perf_counter() - start
+        engine.close()
+        print(
+            f"{batch_size:6d} {processes:6d} {threads:8d} {'yes' if sort else 'no':>7} "
+            f"{elapsed:9.2f} {len(texts) / elapsed:10.1f}"
+        )
+
+
+def benchmark_onnx(args) -> None:
+    """Per-query embedding latency and parity of the torch and ONNX Runtime (fp32 / int8) backends."""
+    from src.utils.embedding_engine import EmbeddingEngine, EmbeddingSettings, configure_torch_threads
+    from src.utils.onnx_embeddings import (
+        FP32_MIN_COSINE, INT8_MIN_COSINE, OnnxEmbeddingEngine, check_parity, export_model, CONFIG_NAME
+    )
+
+    onnx_path = Path(args.onnx_path)
+    if not (onnx_path / CONFIG_NAME).exists():
+        export_model(args.model, onnx_path, quantize=True)
+
+    rng = np.random.default_rng(0)
+    words = "how do i reset my vpn token password printer queue expense report error license server".split()
+    queries = [" ".join(rng.choice(words, size=rng.integers(4, 16))) for _ in range(args.queries)]
+    settings = EmbeddingSettings(torch_threads=args.threads)
+    configure_torch_threads(settings)
+    torch_engine = EmbeddingEngine(args.model, settings)
+    engines = {
+        "torch": (torch_engine, None),
+        "onnx fp32": (OnnxEmbeddingEngine(onnx_path, settings), FP32_MIN_COSINE),
+        "onnx int8": (
+            OnnxEmbeddingEngine(onnx_path, EmbeddingSettings(torch_threads=args.threads, quantize=True)),
+            INT8_MIN_COSINE
+        ),
+    }
+    print(f"Model: {args.model}, {args.queries} queries, one at a time")
+
+    print(f"\n{'backend':>10} {'p50 ms':>8} {'p99 ms':>8} {'min cosine':>11}")
+    print("-" * 40)
+    for name, (engine, min_cosine) in engines.items():
+        for query in queries[:10]:  # warm-up
+            engine.embed_query(query)
+        samples = []
+        for query in queries:
+            start = time.perf_counter()
+            engine.embed_query(query)
+            samples.append(time.perf_counter() - start)
+        cosine = 1.0 if min_cosine is None else check_parity(torch_engine, engine, min_cosine=min_cosine)
+        print(f"{name:>10} {percentile_ms(samples, 50):8.2f} {percentile_ms(samples, 99):8.2f} {cosine:11.5f}")
+
+
+def benchmark_lexical(args) -> None:
+    """Build time and per-query BM25 latency of the persisted inverted index."""
+    from src.utils.segment_store import SegmentStore
+    from src.utils.vector_index import VectorIndex
+
+    rng = np.random.default_rng(0)
+    vocabulary = [f"w{i}" for i in range(args.vocabulary)]
+    # Zipf-distributed words, like natural text: a few very common, a long rare tail
+    weights = 1.0 / np.arange(1, args.vocabulary + 1)
+    weights /= weights.sum()
+    words = rng.choice(args.vocabulary, size=(args.num_chunks, args.words), p=weights).astype(np.int32)
+    codes = rng.integers(0, args.num_chunks // 50 + 1, size=args.num_chunks)
+    documents = [
+        Document(
+            id=str(i), page_content=f"KB{i:07d} ERR-{codes[i]} " + " ".join(vocabulary[w] for w in words[i]), metadata={"source": f"kb/{i}.txt"}
+        )
+        for i in range(args.num_chunks)
+    ]
+    print(f"Corpus: {args.num_chunks} chunks, {args.words} words each, {args.vocabulary}-word vocabulary")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Vectors only need to exist here: this measures the lexical side
+        dense = faiss.IndexFlatL2(8)
+        dense.add(np.zeros((args.num_chunks, 8), dtype=np.float32))
+        start = time.perf_counter()
+        base_dir = SegmentStore(Path(tmp)).write_base(dense, documents, covered_segments=[])
+        print(f"Build: {time.perf_counter() - start:.1f}s")
+        del documents, words
+
+        index = VectorIndex.open(base_dir)
+        queries = {
+            "ticket id": [f"KB{i:07d}" for i in rng.integers(0, args.num_chunks, size=args.queries)],
+            "error code": [f"what does ERR-{c} mean" for c in rng.choice(codes, size=args.queries)],
+            "rare words": [" ".join(vocabulary[w] for w in rng.integers(1000, args.vocabulary, size=3)) for _ in range(args.queries)],
+            "code + common": [f"ERR-{c} w0 w1 w2" for c in rng.choice(codes, size=args.queries)],
+        }
+        print(f"\n{'query':>14} {'p50 ms':>8} {'p99 ms':>8}")
+        print("-" * 32)
+        for name, texts in queries.items():
+            samples = []
+            for text in texts:
+                start = time.perf_counter()
+                index.lexical_search(text, args.k)
+                samples.append(time.perf_counter() - start)
+            print(f"{name:>14} {percentile_ms(samples, 50):8.3f} {percentile_ms(samples, 99):8.3f}")
+        index.close()
+
+
+def benchmark_metrics(args) -> None:
+    """Cost of the metrics one query records: five stage timings and two cache counters."""
+    from src.utils import metrics
+
+    histogram = metrics.Histogram("overhead_seconds", "Overhead probe")
+    counter = metrics.Counter("overhead_total", "Overhead probe", ["cache"])
+    costs = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for _ in range(5):
+                with histogram.time():
+                    pass
+            counter.labels("embedding").inc()
+            counter.labels("embedding").inc()
+        costs.append((time.perf_counter() - start) / args.rounds)
+    print(f"Instrumentation per query: {min(costs) * 1e6:.1f} us (best of {args.repeats})")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="RAG performance benchmarks")
+    subparsers = parser.add_subparsers(dest="command", help="Benchmark to run")
+
+    ann_parser = subparsers.add_parser("ann", help="Recall and latency of ANN index types vs flat")
+    ann_parser.add_argument("--num-vectors", type=int, default=100000)
+    ann_parser.add_argument("--dim", type=int, default=384)
+    ann_parser.add_argument("--queries", type=int, default=200)
+    ann_parser.add_argument("--k", type=int, default=10)
+    ann_parser.add_argument("--nlist", type=int, default=1024)
+    ann_parser.add_argument("--nprobe", type=int, default=16)
+    ann_parser.add_argument("--pq-m", type=int, default=16)
+    ann_parser.add_argument("--ef-search", type=int, default=64)
+
+    startup_parser = subparsers.add_parser("startup", help="Cold-start time and RSS: pickle vs memory-mapped")
+    startup_parser.add_argument("--num-chunks", type=int, default=200000)
+    startup_parser.add_argument("--dim", type=int, default=384)
+    startup_parser.add_argument("--chunk-chars", type=int, default=1000)
+
+    loading_parser = subparsers.add_parser("loading", help="Directory loading throughput by worker count")
+    loading_parser.add_argument("--files", type=int, default=2000)
+    loading_parser.add_argument("--paragraphs", type=int, default=20)
+    loading_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    loading_parser.add_argument("--chunk-size", type=int, default=1000)
+    loading_parser.add_argument("--chunk-overlap", type=int, default=200)
+
+    embedding_parser = subparsers.add_parser("embedding", help="Embedding throughput per engine configuration")
+    embedding_parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    embedding_parser.add_argument("--chunks", type=int, default=5000)
+    embedding_parser.add_argument("--mean-words", type=int, default=120)
+    embedding_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 64, 128])
+    embedding_parser.add_argument("--processes", type=int, nargs="+", default=[1, 2])
+    embedding_parser.add_argument("--threads", type=int, nargs="+", default=[0])
+    embedding_parser.add_argument("--sort", type=int, nargs="+", default=[0, 1], help="1 sorts by length, 0 does not")
+
+    lexical_parser = subparsers.add_parser("lexical", help="BM25 inverted index build time and query latency")
+    lexical_parser.add_argument("--num-chunks", type=int, default=1000000)
+    lexical_parser.add_argument("--words", type=int, default=60)
+    lexical_parser.add_argument("--vocabulary", type=int, default=50000)
+    lexical_parser.add_argument("--queries", type=int, default=500)
+    lexical_parser.add_argument("--k", type=int, default=20)
+
+    onnx_parser = subparsers.add_parser("onnx", help="Query embedding latency and parity: torch vs ONNX fp32 / int8")
+    onnx_parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    onnx_parser.add_argument("--onnx-path", default="./onnx_model", help="Export directory (created if missing)")
+    onnx_parser.add_argument("--queries", type=int, default=500)
+    onnx_parser.add_argument("--threads", type=int, default=0, help="Intra-op threads (0: runtime default)")
+
+    metrics_parser = subparsers.add_parser("metrics", help="Per-query cost of the Prometheus instrumentation")
+    metrics_parser.add_argument("--rounds", type=int, default=20000)
+    metrics_parser.add_argument("--repeats", type=int, default=3)
+
+    args = parser.parse_args()
+
+    if args.command == "ann":
+        benchmark_ann(args)
+    elif args.command == "startup":
+        benchmark_startup(args)
+    elif args.command == "loading":
+        benchmark_loading(args)
+    elif args.command == "embedding":
+        benchmark_embedding(args)
+    elif args.command == "lexical":
+        benchmark_lexical(args)
+    elif args.command == "onnx":
+        benchmark_onnx(args)
+    elif args.command == "metrics":
+        benchmark_metrics(args)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
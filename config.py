@@ -31,6 +31,77 @@ class Config:
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
     
+    # Ingestion Configuration (LOAD_WORKERS: 1 loads in-process, 0 uses one process per CPU)
+    LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", "1"))
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))   # chunks embedded and indexed per batch
+    INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "2"))     # loaded batches buffered ahead of embedding
+    INGEST_JOB_WORKERS = int(os.getenv("INGEST_JOB_WORKERS", "1"))   # API ingest jobs run at the same time
+    INGEST_JOB_HISTORY = int(os.getenv("INGEST_JOB_HISTORY", "100")) # finished API jobs kept for status lookups
+    
+    # Directory Watch Configuration (WATCH_DIR: empty disables the API's background watcher)
+    WATCH_DIR = os.getenv("WATCH_DIR", "")
+    WATCH_INTERVAL = float(os.getenv("WATCH_INTERVAL", "2.0"))   # seconds between scans
+    WATCH_DEBOUNCE = float(os.getenv("WATCH_DEBOUNCE", "1.0"))   # seconds without changes before a sync
+    
+    # Embedding Configuration (EMBEDDING_TORCH_THREADS: 0 keeps torch's default)
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    EMBEDDING_PROCESSES = int(os.getenv("EMBEDDING_PROCESSES", "1"))
+    EMBEDDING_TORCH_THREADS = int(os.getenv("EMBEDDING_TORCH_THREADS", "0"))
+    EMBEDDING_SORT_BY_LENGTH = os.getenv("EMBEDDING_SORT_BY_LENGTH", "true").lower() == "true"
+    EMBEDDING_NORMALIZE = os.getenv("EMBEDDING_NORMALIZE", "false").lower() == "true"
+    EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "cpu")
+    # EMBEDDING_BACKEND: "torch" (sentence-transformers) or "onnx" (export at EMBEDDING_ONNX_PATH)
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+    EMBEDDING_ONNX_PATH = Path(os.getenv("EMBEDDING_ONNX_PATH", str(BASE_DIR / "onnx_model")))
+    EMBEDDING_QUANTIZE = os.getenv("EMBEDDING_QUANTIZE", "false").lower() == "true"
+    
+    # Vector Index Configuration (flat, ivf_flat, ivf_pq, hnsw)
+    INDEX_TYPE = os.getenv("INDEX_TYPE", "flat")
+    IVF_NLIST = int(os.getenv("IVF_NLIST", "1024"))
+    IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+    PQ_M = int(os.getenv("PQ_M", "16"))
+    HNSW_M = int(os.getenv("HNSW_M", "32"))
+    HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+    HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+    INDEX_TRAIN_SAMPLE = int(os.getenv("INDEX_TRAIN_SAMPLE", "100000"))
+    COMPACTION_SEGMENTS = int(os.getenv("COMPACTION_SEGMENTS", "16"))
+    
+    # Hybrid Retrieval (BM25 fused with dense results by reciprocal rank; HYBRID_LEXICAL_WEIGHT=0 is dense only)
+    HYBRID_DENSE_WEIGHT = float(os.getenv("HYBRID_DENSE_WEIGHT", "1.0"))
+    HYBRID_LEXICAL_WEIGHT = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "1.0"))
+    HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+    HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))   # results per side before fusion
+    
+    # Serving Configuration
+    MAX_CONCURRENT_QUERIES = int(os.getenv("MAX_CONCURRENT_QUERIES", "16"))
+    SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "4"))
+    QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+    QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "0"))
+    BATCH_QUERY_CONCURRENCY = int(os.getenv("BATCH_QUERY_CONCURRENCY", "4"))   # LLM calls in flight per batch
+    MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", "256"))             # questions accepted per batch request
+    
+    # Sessions (least recently used evicted beyond MAX_SESSIONS; SESSION_TTL: idle seconds, 0 never expires)
+    MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "10000"))
+    SESSION_TTL = float(os.getenv("SESSION_TTL", "3600"))
+    SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")   # memory, sqlite or redis
+    SESSION_SQLITE_PATH = Path(os.getenv("SESSION_SQLITE_PATH", str(BASE_DIR / "sessions.db")))
+    SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL", "redis://localhost:6379/0")
+    
+    # Prompt Packing (token counts are estimates; MIN_RELEVANCE_SCORE=0 keeps every retrieved chunk)
+    MAX_PROMPT_TOKENS = int(os.getenv("MAX_PROMPT_TOKENS", "3000"))
+    MIN_RELEVANCE_SCORE = float(os.getenv("MIN_RELEVANCE_SCORE", "0.0"))
+    HISTORY_EXCHANGES = int(os.getenv("HISTORY_EXCHANGES", "3"))
+    MAX_HISTORY_TOKENS = int(os.getenv("MAX_HISTORY_TOKENS", "768"))
+    MAX_HISTORY_ENTRY_TOKENS = int(os.getenv("MAX_HISTORY_ENTRY_TOKENS", "256"))
+    MEMORY_MODE = os.getenv("MEMORY_MODE", "window")   # window (recent exchanges) or summary (rolling summary)
+    MAX_SUMMARY_TOKENS = int(os.getenv("MAX_SUMMARY_TOKENS", "200"))
+    
+    # Semantic Answer Cache (opt-in)
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "false").lower() == "true"
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+    ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+    
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
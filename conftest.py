@@ -0,0 +1,137 @@
+"""Shared pytest fixtures: offline stand-ins for the embedding model and LLM."""
+
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Any, List, Optional
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+import src.utils.vectorstore_manager as vectorstore_module
+from src.utils.vectorstore_manager import VectorStoreManager
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings that count every call."""
+
+    dim = 32
+
+    def __init__(self, model_name: str = "fake", **kwargs):
+        self.model_name = model_name
+        self.query_calls = 0
+        self.document_calls = 0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for word in text.lower().split():
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            vector[digest[0] % self.dim] += 1.0
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.document_calls += 1
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.query_calls += 1
+        return self._embed(text)
+
+
+class SlowChatModel(BaseChatModel):
+    """
+    Stub LLM with a fixed latency, blocking in sync mode and awaiting in async mode.
+
+    With a ``gate`` (a threading.Event), calls wait for it to be set
+    instead, so a test can hold them in flight. ``in_flight`` counts the
+    calls running now and ``peak_in_flight`` the most that overlapped.
+    """
+
+    latency: float = 0.2
+    answer: str = "Stub answer."
+    gate: Any = None
+    peak_in_flight: int = 0
+    _in_flight: int = PrivateAttr(default=0)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-stub"
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _enter(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+
+    def _exit(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self._enter()
+        try:
+            if self.gate is not None:
+                self.gate.wait()
+            else:
+                time.sleep(self.latency)
+        finally:
+            self._exit()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.answer))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self._enter()
+        try:
+            if self.gate is not None:
+                # Polled rather than waited on in a thread, so the executor stays free for the app
+                while not self.gate.is_set():
+                    await asyncio.sleep(0.005)
+            else:
+                await asyncio.sleep(self.latency)
+        finally:
+            self._exit()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.answer))])
+
+
+@pytest.fixture
+def sample_documents() -> List[Document]:
+    """A handful of small chunks about different topics."""
+    texts = [
+        "Password resets are handled through the self service portal.",
+        "VPN access requires a hardware token and manager approval.",
+        "Printer queues are cleared nightly by the operations team.",
+        "Expense reports must be submitted within thirty days.",
+        "The wiki search index is rebuilt every Sunday.",
+    ]
+    return [
+        Document(page_content=text, metadata={"source": f"kb/article_{i}.txt"})
+        for i, text in enumerate(texts)
+    ]
+
+
+@pytest.fixture
+def vectorstore_manager(tmp_path, monkeypatch, sample_documents) -> VectorStoreManager:
+    """VectorStoreManager backed by CountingEmbeddings in a temp directory."""
+    monkeypatch.setattr(vectorstore_module, "EmbeddingEngine", CountingEmbeddings)
+    manager = VectorStoreManager(vectorstore_path=tmp_path / "vectorstore")
+    manager.create_vectorstore(sample_documents)
+    return manager
+
+
+@pytest.fixture
+def fake_llm() -> FakeListChatModel:
+    """Chat model that answers from a fixed list instead of calling GROQ."""
+    return FakeListChatModel(responses=["Use the self service portal."] * 100)
@@ -99,7 +99,7 @@ async function handleSendMessage() {
     sendBtn.disabled = true;
     
     try {
-        const response = await fetch(`${API_BASE_URL}/api/query`, {
+        const response = await fetch(`${API_BASE_URL}/api/query/stream`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -111,23 +111,49 @@ async function handleSendMessage() {
             })
         });
         
-        if (!response.ok) {
+        if (!response.ok || !response.body) {
             throw new Error('Failed to get response');
         }
         
-        const data = await response.json();
+        // Read Server-Sent Events: sources first, then answer tokens
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let bubble = null;
+        let done = false;
         
-        // Store session ID
-        if (data.session_id) {
-            sessionId = data.session_id;
+        while (!done) {
+            const { value, done: streamDone } = await reader.read();
+            if (streamDone) break;
+            
+            buffer += decoder.decode(value, { stream: true });
+            const events = buffer.split('\n\n');
+            buffer = events.pop();
+            
+            for (const rawEvent of events) {
+                const event = parseSseEvent(rawEvent);
+                if (!event) continue;
+                
+                if (event.data.session_id) {
+                    sessionId = event.data.session_id;
+                }
+                
+                if (event.type === 'sources') {
+                    removeLoading(loadingId);
+                    bubble = addMessage('', 'ai', event.data.sources);
+                } else if (event.type === 'token' && bubble) {
+                    bubble.textContent += event.data.content;
+                    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+                } else if (event.type === 'error') {
+                    throw new Error(event.data.message);
+                } else if (event.type === 'done') {
+                    done = true;
+                }
+            }
         }
         
-        // Remove loading
         removeLoading(loadingId);
         
-        // Add AI response
-        addMessage(data.answer, 'ai', data.sources);
-        
     } catch (error) {
         removeLoading(loadingId);
         showToast('Error: ' + error.message, 'error');
@@ -139,6 +165,23 @@ async function handleSendMessage() {
     }
 }
 
+// Parse a single Server-Sent Event block
+function parseSseEvent(rawEvent) {
+    let type = 'message';
+    let data = '';
+    
+    rawEvent.split('\n').forEach(line => {
+        if (line.startsWith('event:')) {
+            type = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+            data += line.slice(5).trim();
+        }
+    });
+    
+    if (!data) return null;
+    return { type, data: JSON.parse(data) };
+}
+
 // Add message to chat
 function addMessage(text, sender, sources = []) {
     const messageDiv = document.createElement('div');
@@ -198,6 +241,8 @@ function addMessage(text, sender, sources = []) {
     
     messagesContainer.appendChild(messageDiv);
     messagesContainer.scrollTop = messagesContainer.scrollHeight;
+    
+    return bubble;
 }
 
 // Show loading indicator
@@ -3,10 +3,16 @@
 import sys
 import argparse
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 from config import Config
-from src import GrokLLM, VectorStoreManager, DocumentProcessor, RAGChain
+from src import GrokLLM, VectorStoreManager, DocumentProcessor, RAGChain, IngestionPipeline, DirectoryWatcher
+from src.utils.embedding_engine import EmbeddingSettings, configure_torch_threads
+from src.utils.context_builder import ContextSettings, split_summary
+from src.utils.index_factory import IndexSettings, INDEX_TYPES
+from src.utils.lexical_index import HybridSettings
+from src.utils.onnx_embeddings import export_model
+from src.utils.segment_store import SegmentStore
 from src.utils.helpers import (
     setup_logging,
     validate_file_path,
@@ -31,20 +37,70 @@ class RAGApplication:
             max_tokens=Config.MAX_TOKENS
         )
         
+        embedding_settings = EmbeddingSettings(
+            batch_size=Config.EMBEDDING_BATCH_SIZE,
+            num_processes=Config.EMBEDDING_PROCESSES,
+            torch_threads=Config.EMBEDDING_TORCH_THREADS,
+            sort_by_length=Config.EMBEDDING_SORT_BY_LENGTH,
+            normalize=Config.EMBEDDING_NORMALIZE,
+            device=Config.EMBEDDING_DEVICE,
+            backend=Config.EMBEDDING_BACKEND,
+            onnx_path=str(Config.EMBEDDING_ONNX_PATH),
+            quantize=Config.EMBEDDING_QUANTIZE
+        )
+        configure_torch_threads(embedding_settings)
+        
         self.vectorstore_manager = VectorStoreManager(
             vectorstore_path=Config.VECTORSTORE_PATH,
-            embedding_model=Config.EMBEDDING_MODEL
+            embedding_model=Config.EMBEDDING_MODEL,
+            query_cache_size=Config.QUERY_CACHE_SIZE,
+            query_cache_ttl=Config.QUERY_CACHE_TTL,
+            index_settings=IndexSettings(
+                index_type=Config.INDEX_TYPE,
+                nlist=Config.IVF_NLIST,
+                nprobe=Config.IVF_NPROBE,
+                pq_m=Config.PQ_M,
+                hnsw_m=Config.HNSW_M,
+                ef_construction=Config.HNSW_EF_CONSTRUCTION,
+                ef_search=Config.HNSW_EF_SEARCH,
+                train_sample=Config.INDEX_TRAIN_SAMPLE
+            ),
+            compaction_segments=Config.COMPACTION_SEGMENTS,
+            embedding_settings=embedding_settings,
+            hybrid_settings=HybridSettings(
+                dense_weight=Config.HYBRID_DENSE_WEIGHT,
+                lexical_weight=Config.HYBRID_LEXICAL_WEIGHT,
+                rrf_k=Config.HYBRID_RRF_K,
+                candidates=Config.HYBRID_CANDIDATES
+            )
         )
         
         self.document_processor = DocumentProcessor(
             chunk_size=Config.CHUNK_SIZE,
-            chunk_overlap=Config.CHUNK_OVERLAP
+            chunk_overlap=Config.CHUNK_OVERLAP,
+            load_workers=Config.LOAD_WORKERS
+        )
+        
+        self.ingestion_pipeline = IngestionPipeline(
+            document_processor=self.document_processor,
+            vectorstore_manager=self.vectorstore_manager,
+            batch_size=Config.INGEST_BATCH_SIZE,
+            queue_size=Config.INGEST_QUEUE_SIZE
         )
         
         self.rag_chain = RAGChain(
             llm=self.llm,
             vectorstore_manager=self.vectorstore_manager,
-            top_k=Config.TOP_K_RESULTS
+            top_k=Config.TOP_K_RESULTS,
+            context_settings=ContextSettings(
+                max_prompt_tokens=Config.MAX_PROMPT_TOKENS,
+                min_score=Config.MIN_RELEVANCE_SCORE,
+                history_exchanges=Config.HISTORY_EXCHANGES,
+                max_history_tokens=Config.MAX_HISTORY_TOKENS,
+                max_history_entry_tokens=Config.MAX_HISTORY_ENTRY_TOKENS,
+                memory=Config.MEMORY_MODE,
+                max_summary_tokens=Config.MAX_SUMMARY_TOKENS
+            )
         )
     
     def ingest_documents(self, path: str) -> bool:
@@ -64,17 +120,101 @@ class RAGApplication:
         print(f"\n📁 Ingesting documents from: {file_path}")
         print_separator("-")
         
-        # Load and process documents
-        documents = self.document_processor.load_and_process(file_path)
+        def show_progress(progress):
+            print(
+                f"\r   {progress.files_processed}/{progress.files_total} files, "
+                f"{progress.chunks_added} chunks indexed, {progress.elapsed_seconds:.1f}s",
+                end="",
+                flush=True
+            )
+        
+        # Files are loaded, embedded and indexed in batches as they stream in
+        progress = self.ingestion_pipeline.ingest(file_path, on_progress=show_progress)
+        print()
         
-        if not documents:
+        for failed in progress.failed_files:
+            print(f"⚠️  Could not process: {failed}")
+        
+        if progress.files_skipped:
+            print(f"⏭️  Skipped {progress.files_skipped} unchanged file(s).")
+        
+        if not progress.chunks_added:
+            if progress.chunks_skipped or progress.files_skipped:
+                print("✅ Nothing new to ingest: everything is already indexed.")
+                return True
             print("❌ No documents found or processed.")
             return False
         
-        # Add to vectorstore
-        self.vectorstore_manager.add_documents(documents)
+        print(
+            f"✅ Successfully ingested {progress.chunks_added} new document chunks "
+            f"({progress.chunks_skipped} already indexed)."
+        )
+        return True
+    
+    def watch_directory(self, path: str, interval: float, debounce: float) -> bool:
+        """
+        Keep the index in sync with a directory until interrupted.
+        
+        Args:
+            path: Directory to watch
+            interval: Seconds between scans
+            debounce: Seconds without changes before a sync
+            
+        Returns:
+            True when stopped cleanly, False if the directory is invalid
+        """
+        directory = validate_file_path(path)
+        if directory is None:
+            return False
+        if not directory.is_dir():
+            print(f"❌ Not a directory: {path}")
+            return False
+        
+        def show_sync(result):
+            print(
+                f"🔄 {result.files_added} new, {result.files_updated} changed, "
+                f"{result.files_deleted} deleted file(s): "
+                f"+{result.chunks_added} / -{result.chunks_removed} chunks"
+            )
+            for failed in result.failed_files:
+                print(f"⚠️  Could not process: {failed}")
         
-        print(f"✅ Successfully ingested {len(documents)} document chunks.")
+        watcher = DirectoryWatcher(
+            directory,
+            self.ingestion_pipeline,
+            interval=interval,
+            debounce=debounce,
+            on_sync=show_sync
+        )
+        print(f"\n👀 Watching {directory} (Ctrl+C to stop)")
+        print_separator("-")
+        
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching.")
+        return True
+    
+    def rebuild_index(self, index_type: Optional[str] = None) -> bool:
+        """
+        Rebuild the vector index, optionally with a different index type.
+        
+        Args:
+            index_type: Index type to rebuild as (defaults to INDEX_TYPE)
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.vectorstore_manager.is_initialized():
+            print("❌ No vectorstore to rebuild. Ingest documents first.")
+            return False
+        
+        print(f"\n🔧 Rebuilding index as: {index_type or Config.INDEX_TYPE}")
+        print_separator("-")
+        
+        self.vectorstore_manager.rebuild_index(index_type)
+        
+        print(f"✅ Index rebuilt with {self.vectorstore_manager.vector_index.ntotal} vectors.")
         return True
     
     def query(self, question: str, show_sources: bool = True) -> None:
@@ -143,14 +283,80 @@ class RAGApplication:
             print("\n📝 No conversation history yet.")
             return
         
+        summary, exchanges = split_summary(self.rag_chain.chat_history)
         print("\n📝 Conversation History:")
         print_separator("-")
-        for i, (q, a) in enumerate(self.rag_chain.chat_history, 1):
+        if summary:
+            print(f"\nEarlier: {summary}")
+        for i, (q, a) in enumerate(exchanges, 1):
             print(f"\n{i}. Q: {q}")
             print(f"   A: {a[:150]}..." if len(a) > 150 else f"   A: {a}")
         print_separator("-")
 
 
+def migrate_vectorstores(paths: List[str]) -> bool:
+    """
+    Convert vector store directories from the pickled docstore to the chunk store format.
+    
+    Runs without loading the embedding model or the LLM.
+    
+    Args:
+        paths: Vector store directories
+        
+    Returns:
+        True if every directory was migrated or already up to date
+    """
+    setup_logging()
+    success = True
+    
+    for path in paths:
+        root = Path(path)
+        if not (root / "index.faiss").exists() and not (root / SegmentStore.MANIFEST_NAME).exists():
+            print(f"❌ No vectorstore found at: {root}")
+            success = False
+            continue
+        
+        try:
+            count = SegmentStore(root).migrate()
+        except Exception as e:
+            print(f"❌ Failed to migrate {root}: {e}")
+            success = False
+            continue
+        
+        if count:
+            print(f"✅ Migrated {count} chunks in {root}")
+        else:
+            print(f"✅ {root} is already up to date")
+    
+    return success
+
+
+def export_onnx(model_name: str, output: str, quantize: bool) -> bool:
+    """
+    Export the embedding model for the ONNX Runtime backend and check it against torch.
+    
+    Args:
+        model_name: sentence-transformers model name or path
+        output: Output directory
+        quantize: Also export the int8 dynamic-quantized model
+        
+    Returns:
+        True if the export passed its parity check
+    """
+    setup_logging()
+    
+    try:
+        parity = export_model(model_name, Path(output), quantize=quantize)
+    except Exception as e:
+        print(f"❌ Failed to export {model_name}: {e}")
+        return False
+    
+    print(f"✅ Exported {model_name} to {output}")
+    for variant, cosine in parity.items():
+        print(f"   {variant}: lowest cosine similarity to torch {cosine:.5f}")
+    return True
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(
@@ -164,11 +370,23 @@ Examples:
   # Ingest a single file
   python rag_app.py ingest ./data/document.pdf
   
+  # Keep the index in sync with a directory
+  python rag_app.py watch ./data
+  
   # Ask a question
   python rag_app.py query "What is this document about?"
   
   # Interactive mode
   python rag_app.py interactive
+  
+  # Rebuild the vector index as HNSW
+  python rag_app.py rebuild-index --index-type hnsw
+  
+  # Convert a vectorstore from the old pickled format
+  python rag_app.py migrate
+  
+  # Export the embedding model for EMBEDDING_BACKEND=onnx
+  python rag_app.py export-onnx --quantize
         """
     )
     
@@ -185,6 +403,29 @@ Examples:
         help="Path to file or directory containing documents"
     )
     
+    # Watch command
+    watch_parser = subparsers.add_parser(
+        "watch",
+        help="Keep the index in sync with a directory (new, changed and deleted files)"
+    )
+    watch_parser.add_argument(
+        "path",
+        type=str,
+        help="Directory to watch"
+    )
+    watch_parser.add_argument(
+        "--interval",
+        type=float,
+        default=Config.WATCH_INTERVAL,
+        help="Seconds between scans (defaults to WATCH_INTERVAL from config)"
+    )
+    watch_parser.add_argument(
+        "--debounce",
+        type=float,
+        default=Config.WATCH_DEBOUNCE,
+        help="Seconds without changes before a sync (defaults to WATCH_DEBOUNCE from config)"
+    )
+    
     # Query command
     query_parser = subparsers.add_parser(
         "query",
@@ -207,12 +448,65 @@ Examples:
         help="Start interactive Q&A session"
     )
     
+    # Rebuild index command
+    rebuild_parser = subparsers.add_parser(
+        "rebuild-index",
+        help="Rebuild the vector index (e.g. after changing INDEX_TYPE)"
+    )
+    rebuild_parser.add_argument(
+        "--index-type",
+        choices=INDEX_TYPES,
+        default=None,
+        help="Index type to build (defaults to INDEX_TYPE from config)"
+    )
+    
+    # Migrate command
+    migrate_parser = subparsers.add_parser(
+        "migrate",
+        help="Convert vectorstores from the pickled docstore to the chunk store format"
+    )
+    migrate_parser.add_argument(
+        "paths",
+        nargs="*",
+        help="Vectorstore directories (defaults to VECTORSTORE_PATH from config)"
+    )
+    
+    # Export ONNX command
+    export_parser = subparsers.add_parser(
+        "export-onnx",
+        help="Export the embedding model for the ONNX Runtime backend (needs torch)"
+    )
+    export_parser.add_argument(
+        "--model",
+        default=Config.EMBEDDING_MODEL,
+        help="sentence-transformers model (defaults to EMBEDDING_MODEL from config)"
+    )
+    export_parser.add_argument(
+        "--output",
+        default=str(Config.EMBEDDING_ONNX_PATH),
+        help="Output directory (defaults to EMBEDDING_ONNX_PATH from config)"
+    )
+    export_parser.add_argument(
+        "--quantize",
+        action="store_true",
+        help="Also write the int8 dynamic-quantized model"
+    )
+    
     args = parser.parse_args()
     
     if not args.command:
         parser.print_help()
         return
     
+    # Migration only touches files on disk; no models or API key needed
+    if args.command == "migrate":
+        success = migrate_vectorstores(args.paths or [str(Config.VECTORSTORE_PATH)])
+        sys.exit(0 if success else 1)
+    
+    if args.command == "export-onnx":
+        success = export_onnx(args.model, args.output, args.quantize)
+        sys.exit(0 if success else 1)
+    
     # Initialize application
     try:
         app = RAGApplication()
@@ -228,11 +522,19 @@ Examples:
         success = app.ingest_documents(args.path)
         sys.exit(0 if success else 1)
     
+    elif args.command == "watch":
+        success = app.watch_directory(args.path, args.interval, args.debounce)
+        sys.exit(0 if success else 1)
+    
     elif args.command == "query":
         app.query(args.question, show_sources=not args.no_sources)
     
     elif args.command == "interactive":
         app.interactive_mode()
+    
+    elif args.command == "rebuild-index":
+        success = app.rebuild_index(args.index_type)
+        sys.exit(0 if success else 1)
 
 
 if __name__ == "__main__":
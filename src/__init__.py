@@ -4,10 +4,19 @@ from src.utils.grok_llm import GrokLLM
 from src.utils.vectorstore_manager import VectorStoreManager
 from src.utils.document_processor import DocumentProcessor
 from src.utils.rag_chain import RAGChain
+from src.utils.answer_cache import SemanticAnswerCache
+from src.utils.ingestion import IngestionPipeline
+from src.utils.directory_watcher import DirectoryWatcher
+from src.utils.session_store import SessionStore, create_session_store
 
 __all__ = [
     "GrokLLM",
     "VectorStoreManager",
     "DocumentProcessor",
     "RAGChain",
+    "SemanticAnswerCache",
+    "IngestionPipeline",
+    "DirectoryWatcher",
+    "SessionStore",
+    "create_session_store",
 ]
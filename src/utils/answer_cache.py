@@ -0,0 +1,164 @@
+"""Semantic cache of generated answers keyed by question embedding."""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """
+    Bounded LRU cache that returns a stored answer for near-duplicate questions.
+
+    Entries are matched by cosine similarity of the question embedding. The
+    cache is tied to the vector store's content version: when chunks are
+    added or deleted, every entry is dropped on the next lookup. Compaction
+    and index rebuilds leave the content, and so the cache, unchanged.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 512,
+        ttl_seconds: float = 3600,
+        similarity_threshold: float = 0.95
+    ):
+        """
+        Initialize SemanticAnswerCache.
+
+        Args:
+            max_size: Maximum number of cached answers
+            ttl_seconds: Time-to-live for entries in seconds (0 means no expiry)
+            similarity_threshold: Minimum cosine similarity for a hit
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._content_version: Optional[int] = None
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _sync_version(self, content_version: int) -> None:
+        """Drop all entries if the indexed content changed since they were stored."""
+        if self._content_version != content_version:
+            if self._entries:
+                logger.info("Vector store changed, invalidating answer cache")
+                self.invalidations += 1
+            self._entries.clear()
+            self._content_version = content_version
+
+    def lookup(
+        self,
+        embedding: Sequence[float],
+        content_version: int,
+        chunk_ids: Optional[List[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a similar question.
+
+        Args:
+            embedding: Question embedding
+            content_version: Current vector store content version
+            chunk_ids: If given, the cached entry must have retrieved exactly these chunks
+
+        Returns:
+            Dictionary with answer and sources, or None on a miss
+        """
+        query = self._normalize(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            self._sync_version(content_version)
+
+            if self.ttl_seconds:
+                expired = [key for key, entry in self._entries.items()
+                           if now - entry["created"] > self.ttl_seconds]
+                for key in expired:
+                    del self._entries[key]
+
+            best_key, best_score = None, self.similarity_threshold
+            for key, entry in self._entries.items():
+                if chunk_ids is not None and entry["chunk_ids"] != chunk_ids:
+                    continue
+                score = float(np.dot(query, entry["embedding"]))
+                if score >= best_score:
+                    best_key, best_score = key, score
+
+            if best_key is None:
+                self.misses += 1
+                metrics.CACHE_MISSES.labels("answer").inc()
+                return None
+
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            metrics.CACHE_HITS.labels("answer").inc()
+            entry = self._entries[best_key]
+            return {"answer": entry["answer"], "sources": entry["sources"]}
+
+    def store(
+        self,
+        embedding: Sequence[float],
+        content_version: int,
+        answer: str,
+        sources: List[Dict[str, Any]],
+        chunk_ids: List[str]
+    ) -> None:
+        """
+        Cache an answer.
+
+        Args:
+            embedding: Question embedding
+            content_version: Content version the answer was generated against
+            answer: Generated answer
+            sources: Formatted source snippets returned with the answer
+            chunk_ids: IDs of the chunks placed in the prompt
+        """
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._sync_version(content_version)
+            self._entries[self._next_id] = {
+                "embedding": self._normalize(embedding),
+                "answer": answer,
+                "sources": sources,
+                "chunk_ids": chunk_ids,
+                "created": time.monotonic(),
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached answers."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Return size, hit/miss counters and hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
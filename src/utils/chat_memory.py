@@ -0,0 +1,95 @@
+"""Rolling conversation summary that replaces older exchanges in chat history."""
+
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+from src.utils.context_builder import SUMMARY_MARKER, split_summary, truncate_tokens
+from src.utils.session_store import History
+
+MEMORY_MODES = ("window", "summary")
+
+SUMMARY_TEMPLATE = """Update the running summary of a conversation between a user and an assistant that answers from a knowledge base.
+Keep the topics, names, numbers and open points a follow-up question could refer to. Leave out greetings and repetition.
+Reply with the updated summary only, in at most {max_words} words.
+
+Current summary:
+{summary}
+
+New exchanges:
+{exchanges}
+
+Updated summary:"""
+
+
+class ConversationSummarizer:
+    """
+    Folds all but the newest exchange of a history into a rolling summary.
+
+    The LLM sees the previous summary and the exchanges being folded, each
+    trimmed to ``max_entry_tokens``, so one update costs about the same
+    however long the conversation gets. The result is cut to
+    ``max_summary_tokens`` and stored as the first history entry, marked
+    with ``SUMMARY_MARKER``, by whoever owns the history.
+    """
+
+    def __init__(self, llm: Any, max_summary_tokens: int = 200, max_entry_tokens: int = 256):
+        """
+        Initialize ConversationSummarizer.
+
+        Args:
+            llm: Chat model writing the summary (the answering model is fine)
+            max_summary_tokens: Summary length limit
+            max_entry_tokens: Each folded question or answer is trimmed to this
+        """
+        self.max_summary_tokens = max_summary_tokens
+        self.max_entry_tokens = max_entry_tokens
+        self.chain = ChatPromptTemplate.from_template(SUMMARY_TEMPLATE) | llm | StrOutputParser()
+
+    def _plan(self, history: History) -> Optional[Tuple[History, Dict[str, Any]]]:
+        """Leading entries to replace and the prompt inputs, or None if nothing is to fold."""
+        summary, exchanges = split_summary(history)
+        if len(exchanges) < 2:
+            return None
+
+        limit = self.max_entry_tokens
+        folded = "\n\n".join(
+            f"User: {truncate_tokens(q, limit)}\nAssistant: {truncate_tokens(a, limit)}"
+            for q, a in exchanges[:-1]
+        )
+        inputs = {
+            "summary": summary or "(none yet)",
+            "exchanges": folded,
+            "max_words": max(1, self.max_summary_tokens * 2 // 3)
+        }
+        return list(history[:-1]), inputs
+
+    def _entry(self, text: str) -> Tuple[str, str]:
+        return SUMMARY_MARKER, truncate_tokens(text.strip(), self.max_summary_tokens)
+
+    def summarize(self, history: History) -> Optional[Tuple[History, Tuple[str, str]]]:
+        """
+        Summarize every entry of a history except the newest exchange.
+
+        Args:
+            history: Conversation so far, oldest first, possibly starting with a summary
+
+        Returns:
+            ``(folded, entry)``: the summary entry to put in place of the
+            ``folded`` oldest entries (only if the history still starts with
+            them), or None if there is at most one exchange
+        """
+        plan = self._plan(history)
+        if plan is None:
+            return None
+        folded, inputs = plan
+        return folded, self._entry(self.chain.invoke(inputs))
+
+    async def asummarize(self, history: History) -> Optional[Tuple[History, Tuple[str, str]]]:
+        """Async variant of :meth:`summarize`."""
+        plan = self._plan(history)
+        if plan is None:
+            return None
+        folded, inputs = plan
+        return folded, self._entry(await self.chain.ainvoke(inputs))
@@ -0,0 +1,252 @@
+"""Offset-indexed, memory-mapped storage for chunk text and metadata."""
+
+import os
+import json
+import mmap
+import pickle
+import shutil
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(doc: Document) -> bytes:
+    return json.dumps(
+        {"id": doc.id, "page_content": doc.page_content, "metadata": doc.metadata},
+        ensure_ascii=False
+    ).encode("utf-8")
+
+
+def _decode(raw: bytes) -> Document:
+    record = json.loads(raw)
+    return Document(id=record["id"], page_content=record["page_content"], metadata=record["metadata"])
+
+
+class ChunkStore:
+    """
+    Read-only chunk records addressed by FAISS position.
+
+    ``chunks.bin`` holds one JSON record per chunk, back to back, and
+    ``chunks.idx`` holds ``n + 1`` int64 offsets into it. ``chunks.ids``
+    maps chunk ids to positions, sorted by id for binary search. All
+    files are memory-mapped, so opening a store is constant time, lookups
+    only touch the pages of the requested chunks, and several processes
+    opening the same files share the OS page cache.
+    """
+
+    DATA_NAME = "chunks.bin"
+    OFFSETS_NAME = "chunks.idx"
+    IDS_NAME = "chunks.ids"
+
+    def __init__(self, directory: Path):
+        """
+        Open a chunk store.
+
+        Args:
+            directory: Directory containing chunks.bin and chunks.idx
+        """
+        self.directory = directory
+        self._offsets = np.load(directory / self.OFFSETS_NAME, mmap_mode="r")
+        self._file = open(directory / self.DATA_NAME, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        ids_path = directory / self.IDS_NAME
+        # Stores written before the id table existed get one built on first lookup
+        self._ids = np.load(ids_path, mmap_mode="r") if ids_path.exists() else None
+
+    @classmethod
+    def exists(cls, directory: Path) -> bool:
+        """Whether a chunk store has been written to the directory."""
+        return (directory / cls.OFFSETS_NAME).exists() and (directory / cls.DATA_NAME).exists()
+
+    @classmethod
+    def write(
+        cls,
+        directory: Path,
+        documents: Iterable[Document],
+        source: Optional["ChunkStore"] = None,
+        keep: Optional[np.ndarray] = None
+    ) -> int:
+        """
+        Write a chunk store, optionally starting with the records of another store.
+
+        Records copied from ``source`` are copied as raw bytes, so compaction
+        does not re-serialize chunks that are already on disk.
+
+        Args:
+            directory: Output directory
+            documents: Chunks to append after the source records, in position order
+            source: Existing store whose records come first
+            keep: Sorted positions of the source records to copy (default: all)
+
+        Returns:
+            Number of records written
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        offsets = [np.zeros(1, dtype=np.int64)]
+        ids = []
+
+        with open(directory / cls.DATA_NAME, "wb") as f:
+            if source is not None and len(source):
+                source_ids = source._ids_by_position()
+                if keep is None:
+                    with open(source.directory / cls.DATA_NAME, "rb") as src:
+                        shutil.copyfileobj(src, f, 16 * 1024 * 1024)
+                    offsets.append(np.asarray(source._offsets[1:], dtype=np.int64))
+                    ids.append(source_ids)
+                else:
+                    offsets.append(source._copy_records(f, keep))
+                    ids.append(source_ids[np.asarray(keep, dtype=np.int64)])
+            position = int(offsets[-1][-1]) if len(offsets[-1]) else 0
+            appended, appended_ids = [], []
+            for doc in documents:
+                record = _encode(doc)
+                f.write(record)
+                position += len(record)
+                appended.append(position)
+                appended_ids.append(doc.id.encode("utf-8"))
+            offsets.append(np.asarray(appended, dtype=np.int64))
+            ids.append(np.array(appended_ids, dtype=bytes))
+            f.flush()
+            os.fsync(f.fileno())
+
+        offsets = np.concatenate(offsets)
+        with open(directory / cls.OFFSETS_NAME, "wb") as f:
+            np.save(f, offsets)
+            f.flush()
+            os.fsync(f.fileno())
+
+        with open(directory / cls.IDS_NAME, "wb") as f:
+            np.save(f, cls._id_table(np.concatenate(ids)))
+            f.flush()
+            os.fsync(f.fileno())
+
+        return len(offsets) - 1
+
+    @staticmethod
+    def _id_table(ids: np.ndarray) -> np.ndarray:
+        """Ids (a bytes array in position order) with their positions, sorted by id."""
+        table = np.empty(len(ids), dtype=[("id", ids.dtype), ("position", "<i8")])
+        table["id"] = ids
+        table["position"] = np.arange(len(ids))
+        table.sort(order="id")
+        return table
+
+    def _copy_records(self, f, keep: np.ndarray) -> np.ndarray:
+        """Copy the given records as raw bytes, in runs; return their new end offsets."""
+        keep = np.asarray(keep, dtype=np.int64)
+        if not len(keep):
+            return np.zeros(0, dtype=np.int64)
+        data = memoryview(self._data)
+        run_starts = np.flatnonzero(np.diff(keep) != 1) + 1
+        for run in np.split(keep, run_starts):
+            start, end = int(self._offsets[run[0]]), int(self._offsets[run[-1] + 1])
+            f.write(data[start:end])
+        data.release()
+        sizes = np.asarray(self._offsets[keep + 1]) - np.asarray(self._offsets[keep])
+        return np.cumsum(sizes)
+
+    def _ids_by_position(self) -> np.ndarray:
+        """All chunk ids as a bytes array, in position order."""
+        if self._ids is None:
+            return np.array([doc.id.encode("utf-8") for doc in self.iter_documents()], dtype=bytes)
+        ids = np.empty(len(self), dtype=self._ids.dtype["id"])
+        ids[np.asarray(self._ids["position"])] = self._ids["id"]
+        return ids
+
+    def positions_of(self, ids: Sequence[str]) -> Dict[str, int]:
+        """
+        Look up the positions of chunk ids (binary search in the id table).
+
+        Args:
+            ids: Chunk ids
+
+        Returns:
+            Mapping of the ids found to their positions
+        """
+        if self._ids is None:
+            logger.info(f"Building chunk id table for {self.directory}")
+            self._ids = self._id_table(self._ids_by_position())
+        if not len(self._ids) or not ids:
+            return {}
+
+        table_ids = self._ids["id"]
+        width = table_ids.dtype.itemsize
+        candidates = [(i, i.encode("utf-8")) for i in ids]
+        candidates = [(i, key) for i, key in candidates if len(key) <= width]
+        if not candidates:
+            return {}
+
+        keys = np.array([key for _, key in candidates], dtype=table_ids.dtype)
+        indexes = np.minimum(np.searchsorted(table_ids, keys), len(table_ids) - 1)
+        matches = table_ids[indexes] == keys
+        positions = self._ids["position"][indexes]
+        return {
+            chunk_id: int(position)
+            for (chunk_id, _), match, position in zip(candidates, matches, positions)
+            if match
+        }
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def get(self, position: int) -> Document:
+        """Fetch the chunk at a FAISS position."""
+        start, end = int(self._offsets[position]), int(self._offsets[position + 1])
+        return _decode(self._data[start:end])
+
+    def get_many(self, positions: Sequence[int]) -> List[Document]:
+        """
+        Fetch several chunks in one pass, in the order requested.
+
+        Offsets are looked up together and records are read in file order,
+        so a top-k lookup touches only the pages holding those k records.
+        """
+        unique = np.unique(np.asarray(positions, dtype=np.int64))
+        starts = self._offsets[unique]
+        ends = self._offsets[unique + 1]
+        fetched = {
+            int(position): _decode(self._data[int(start):int(end)])
+            for position, start, end in zip(unique, starts, ends)
+        }
+        return [fetched[int(position)] for position in positions]
+
+    def iter_documents(self) -> Iterator[Document]:
+        """Iterate over all chunks in position order."""
+        for position in range(len(self)):
+            yield self.get(position)
+
+    def close(self) -> None:
+        """Release the memory maps."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+
+def read_pickled_docstore(directory: Path) -> List[Document]:
+    """
+    Read the chunks of a LangChain ``index.pkl`` (docstore, index_to_docstore_id) pair.
+
+    Only used to migrate old vector stores. Unpickling can execute code, so
+    only run this on directories you created.
+
+    Args:
+        directory: Directory containing index.pkl
+
+    Returns:
+        Chunks in FAISS position order
+    """
+    with open(directory / "index.pkl", "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    documents = []
+    for position in range(len(index_to_docstore_id)):
+        doc_id = index_to_docstore_id[position]
+        doc = docstore.search(doc_id)
+        documents.append(Document(id=doc_id, page_content=doc.page_content, metadata=doc.metadata))
+    return documents
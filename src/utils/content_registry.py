@@ -0,0 +1,185 @@
+"""Content hashes of indexed chunks and ingested files, stored next to the index."""
+
+import os
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from langchain_core.documents import Document
+
+from src.utils.context_builder import TOKEN_COUNT_KEY
+
+logger = logging.getLogger(__name__)
+
+FileState = Tuple[int, int, str]  # (mtime_ns, size, sha256)
+
+
+def chunk_hash(doc: Document) -> str:
+    """
+    SHA-256 of a chunk's text and metadata (so the same text from two files stays distinct).
+
+    The token count recorded at ingest is derived from the text, so it is left out.
+    """
+    metadata = {key: value for key, value in doc.metadata.items() if key != TOKEN_COUNT_KEY}
+    payload = json.dumps(
+        {"page_content": doc.page_content, "metadata": metadata},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def normalize_source(source: Optional[str]) -> Optional[str]:
+    """Canonical form of a source path, so ./data/a.txt and data/a.txt match."""
+    if not source:
+        return source
+    return str(Path(source).expanduser().resolve())
+
+
+def file_hash(path: Path) -> str:
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ContentRegistry:
+    """
+    SQLite record of which chunks and files are already in the index.
+
+    ``chunks`` maps each chunk's content hash to its docstore id and
+    normalized source path, which doubles as the source → chunk ids
+    mapping for per-document deletes. ``files`` keeps the mtime, size and
+    hash of every file that was fully ingested. Rows are written after the
+    chunks are durably appended, so a crash in between can at worst re-add
+    one batch.
+    """
+
+    DB_NAME = "content.db"
+    _QUERY_BATCH = 500
+
+    def __init__(self, directory: Path):
+        """
+        Open (or create) the registry.
+
+        Args:
+            directory: Vector store directory
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / self.DB_NAME
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "hash TEXT PRIMARY KEY, chunk_id TEXT NOT NULL, source TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_source ON chunks(source)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, sha256 TEXT NOT NULL)"
+            )
+
+    def chunk_count(self) -> int:
+        """Number of registered chunks."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def seen_hashes(self, hashes: Sequence[str]) -> Set[str]:
+        """Subset of the given hashes that are already registered."""
+        seen: Set[str] = set()
+        with self._lock:
+            for start in range(0, len(hashes), self._QUERY_BATCH):
+                batch = list(hashes[start:start + self._QUERY_BATCH])
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash FROM chunks WHERE hash IN ({placeholders})", batch
+                )
+                seen.update(row[0] for row in rows)
+        return seen
+
+    def add_chunks(self, documents: Iterable[Document]) -> None:
+        """Register chunks whose ids are set (hash computed from content)."""
+        rows = [
+            (chunk_hash(doc), doc.id, normalize_source(doc.metadata.get("source")))
+            for doc in documents
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO chunks VALUES (?, ?, ?)", rows)
+
+    def chunks_for_source(self, source: str) -> List[Tuple[str, str]]:
+        """(hash, chunk id) of every registered chunk of a source."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT hash, chunk_id FROM chunks WHERE source = ?", (normalize_source(source),)
+            ).fetchall()
+
+    def chunk_ids_for_source(self, source: str) -> List[str]:
+        """Chunk ids of a source."""
+        return [chunk_id for _, chunk_id in self.chunks_for_source(source)]
+
+    def remove_chunks(self, chunk_ids: Sequence[str]) -> None:
+        """Forget chunks by id."""
+        with self._lock, self._conn:
+            for start in range(0, len(chunk_ids), self._QUERY_BATCH):
+                batch = list(chunk_ids[start:start + self._QUERY_BATCH])
+                placeholders = ",".join("?" * len(batch))
+                self._conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({placeholders})", batch)
+
+    def file_state(self, path: Path) -> Optional[FileState]:
+        """Recorded (mtime_ns, size, sha256) of a file, if it was ingested."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime_ns, size, sha256 FROM files WHERE path = ?", (normalize_source(str(path)),)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def files_under(self, directory: Path) -> Dict[str, Tuple[int, int]]:
+        """(mtime_ns, size) of every recorded file below a directory, by normalized path."""
+        prefix = normalize_source(str(directory)).rstrip(os.sep) + os.sep
+        # Paths starting with the prefix sort between it and the prefix with its last character bumped
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, mtime_ns, size FROM files WHERE path >= ? AND path < ?", (prefix, upper)
+            ).fetchall()
+        return {path: (mtime_ns, size) for path, mtime_ns, size in rows}
+
+    def record_files(self, files: List[Tuple[Path, FileState]]) -> None:
+        """Record files as fully ingested."""
+        rows = [(normalize_source(str(path)), *state) for path, state in files]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", rows)
+
+    def forget_file(self, path: str) -> None:
+        """Drop a file's record so the next ingest loads it again."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM files WHERE path = ?", (normalize_source(path),))
+
+    def replace(self, documents: Iterable[Document]) -> None:
+        """
+        Forget all chunks and files and register ``documents`` instead, in one transaction.
+
+        Call only once the index holding exactly these chunks has been written.
+        """
+        rows = [
+            (chunk_hash(doc), doc.id, normalize_source(doc.metadata.get("source")))
+            for doc in documents
+        ]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("DELETE FROM files")
+            self._conn.executemany("INSERT OR IGNORE INTO chunks VALUES (?, ?, ?)", rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,166 @@
+"""Token-budgeted prompt packing for the RAG chain."""
+
+import re
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# Chunk metadata key holding the chunk's token count, set at ingest
+TOKEN_COUNT_KEY = "token_count"
+
+# Up to four word characters, or one symbol: close to (and slightly above) BPE tokenizer counts
+_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]")
+
+# Question slot of the history entry holding a rolling summary; no typed question starts with NUL
+SUMMARY_MARKER = "\x00summary"
+
+NO_CONTEXT = "No relevant context found."
+NO_HISTORY = "No previous conversation."
+SUMMARY_LABEL = "Summary of the earlier conversation:"
+_CHUNK_SEPARATOR = "\n\n---\n\n"
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens in a text.
+
+    The Groq models' tokenizers are not available locally, so this counts
+    short word pieces and symbols instead. It errs high for English, which
+    keeps packed prompts within their budget.
+    """
+    return len(_TOKEN_RE.findall(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text after ``max_tokens`` tokens, marking the cut with an ellipsis."""
+    if max_tokens <= 0:
+        return ""
+    for i, match in enumerate(_TOKEN_RE.finditer(text), 1):
+        if i == max_tokens:
+            end = match.end()
+            return text if not text[end:].strip() else text[:end] + "..."
+    return text
+
+
+def chunk_tokens(doc: Document) -> int:
+    """Token count of a chunk, from its metadata when recorded at ingest."""
+    count = doc.metadata.get(TOKEN_COUNT_KEY)
+    return count if isinstance(count, int) else count_tokens(doc.page_content)
+
+
+def split_summary(history: List[Tuple[str, str]]) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+    """The rolling summary at the start of a history, if any, and the exchanges after it."""
+    if history and history[0][0] == SUMMARY_MARKER:
+        return history[0][1], list(history[1:])
+    return None, list(history)
+
+
+def trim_history(history: List[Tuple[str, str]], max_exchanges: int) -> List[Tuple[str, str]]:
+    """The newest ``max_exchanges`` exchanges of a history, after its rolling summary if it has one."""
+    summary, exchanges = split_summary(history)
+    kept = exchanges[-max_exchanges:]
+    return [(SUMMARY_MARKER, summary)] + kept if summary is not None else kept
+
+
+@dataclass
+class ContextSettings:
+    """Prompt size limits."""
+
+    max_prompt_tokens: int = 3000          # Whole prompt: instructions, history, context and question
+    min_score: float = 0.0                 # Drop chunks whose vector similarity is below this (0 keeps all)
+    history_exchanges: int = 3             # Most recent exchanges considered for the prompt
+    max_history_tokens: int = 768          # History share of the budget; older exchanges are dropped first
+    max_history_entry_tokens: int = 256    # Each past question or answer is trimmed to this
+    memory: str = "window"                 # "window": recent exchanges verbatim; "summary": summary + last exchange
+    max_summary_tokens: int = 200          # Rolling summary length in summary memory
+
+
+class ContextBuilder:
+    """
+    Packs retrieved chunks and chat history into a prompt token budget.
+
+    The instructions and question are always included. The rolling
+    summary, if any, and recent history come next, each entry trimmed and
+    within its own share of the budget, then chunks in rank order while
+    they fit; a chunk too large for the remaining budget is skipped for
+    smaller ones after it. Chunk sizes come from the counts stored at
+    ingest, so packing does not re-tokenize them.
+    """
+
+    def __init__(self, template: str, settings: ContextSettings):
+        """
+        Initialize ContextBuilder.
+
+        Args:
+            template: Prompt template; its fixed text counts against the budget
+            settings: Budget and trimming limits
+        """
+        self.settings = settings
+        self.template_tokens = count_tokens(re.sub(r"\{\w+\}", "", template))
+
+    def build(self, question: str, docs: List[Document], history: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """
+        Pack a prompt's variable parts.
+
+        Args:
+            question: User question
+            docs: Retrieved chunks, best first
+            history: Conversation so far, oldest first
+
+        Returns:
+            ``context`` and ``chat_history`` strings, the ``docs`` that were
+            packed and the estimated ``prompt_tokens``
+        """
+        budget = self.settings.max_prompt_tokens - self.template_tokens - count_tokens(question)
+
+        chat_history, history_tokens = self._pack_history(history, min(budget, self.settings.max_history_tokens))
+        budget -= history_tokens
+
+        packed, parts = [], []
+        for doc in docs:
+            part = f"[Source {len(packed) + 1}: {doc.metadata.get('source', 'Unknown')}]\n"
+            cost = count_tokens(part) + chunk_tokens(doc) + (count_tokens(_CHUNK_SEPARATOR) if parts else 0)
+            if cost > budget:
+                continue
+            budget -= cost
+            packed.append(doc)
+            parts.append(part + doc.page_content)
+        context = _CHUNK_SEPARATOR.join(parts) if parts else NO_CONTEXT
+
+        prompt_tokens = self.settings.max_prompt_tokens - budget
+        if not parts:
+            prompt_tokens += count_tokens(NO_CONTEXT)
+        if len(packed) < len(docs):
+            logger.info(f"Packed {len(packed)} of {len(docs)} chunks into {prompt_tokens} prompt tokens")
+        return {"context": context, "chat_history": chat_history, "docs": packed, "prompt_tokens": prompt_tokens}
+
+    def _pack_history(self, history: List[Tuple[str, str]], budget: int) -> Tuple[str, int]:
+        """Summary and most recent exchanges that fit the budget, trimmed, as (text, tokens)."""
+        limit = self.settings.max_history_entry_tokens
+        summary, exchanges = split_summary(history)
+        recent = exchanges[-self.settings.history_exchanges:] if self.settings.history_exchanges > 0 else []
+
+        used = 0
+        if summary:
+            label_tokens = count_tokens(SUMMARY_LABEL) + 2
+            summary = truncate_tokens(summary, min(self.settings.max_summary_tokens, budget - label_tokens))
+            used = count_tokens(summary) + label_tokens if summary else 0
+
+        kept: List[Tuple[str, str]] = []
+        for question, answer in reversed(recent):
+            question, answer = truncate_tokens(question, limit), truncate_tokens(answer, limit)
+            cost = count_tokens(question) + count_tokens(answer) + 6  # Q/A labels and separators
+            if used + cost > budget:
+                break
+            kept.insert(0, (question, answer))
+            used += cost
+
+        parts = [f"{SUMMARY_LABEL} {summary}"] if summary else []
+        parts.extend(f"Q{i}: {q}\nA{i}: {a}" for i, (q, a) in enumerate(kept, 1))
+        if not parts:
+            return NO_HISTORY, count_tokens(NO_HISTORY)
+        return "\n\n".join(parts), used
@@ -0,0 +1,198 @@
+"""Polls a directory and keeps the index in sync with it."""
+
+import time
+import logging
+import threading
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from src.utils.content_registry import normalize_source
+from src.utils.ingestion import IngestionPipeline
+
+logger = logging.getLogger(__name__)
+
+FileStat = Tuple[int, int]  # (mtime_ns, size)
+
+
+@dataclass
+class SyncResult:
+    """What one sync applied to the index."""
+
+    files_added: int = 0
+    files_updated: int = 0
+    files_deleted: int = 0
+    chunks_added: int = 0
+    chunks_removed: int = 0
+    failed_files: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class DirectoryWatcher:
+    """
+    Keeps the index in sync with a directory by polling it.
+
+    Every ``interval`` seconds the supported files under the directory
+    are listed and their mtime and size compared with the previous scan.
+    Changes accumulate until the directory has been quiet for
+    ``debounce`` seconds, so a file still being copied, or a burst of
+    files, is synced once. A sync then ingests new files as one batched
+    ingest, re-indexes edited files (only their changed chunks are
+    embedded) and removes deleted files from the index.
+
+    The first scan is compared with the files recorded in the content
+    registry, so changes made while nothing was watching are picked up
+    too. Polling only stats files, which costs far less than any ingest
+    and works on every platform and on network mounts.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        ingestion_pipeline: IngestionPipeline,
+        interval: float = 2.0,
+        debounce: float = 1.0,
+        on_sync: Optional[Callable[[SyncResult], None]] = None
+    ):
+        """
+        Initialize DirectoryWatcher.
+
+        Args:
+            directory: Directory to watch (recursively)
+            ingestion_pipeline: Pipeline that indexes the changes
+            interval: Seconds between scans
+            debounce: Seconds without changes before a sync
+            on_sync: Called with the result of every sync
+        """
+        self.directory = Path(normalize_source(str(directory)))
+        self.ingestion_pipeline = ingestion_pipeline
+        self.interval = interval
+        self.debounce = debounce
+        self.on_sync = on_sync
+        self._known: Optional[Dict[str, FileStat]] = None
+        self._changed: Set[str] = set()
+        self._deleted: Set[str] = set()
+        self._last_change = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def scan(self) -> Dict[str, FileStat]:
+        """(mtime_ns, size) of every supported file under the directory."""
+        files: Dict[str, FileStat] = {}
+        for file_path in self.ingestion_pipeline.document_processor.find_documents(self.directory):
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
+                continue  # Deleted since it was listed
+            files[str(file_path)] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def poll(self) -> Optional[SyncResult]:
+        """
+        Scan once and sync if the directory has settled.
+
+        Returns:
+            The sync result, or None if nothing was synced
+        """
+        now = time.monotonic()
+        if not self.directory.is_dir():
+            # An unmounted or renamed directory must not read as every file deleted
+            logger.warning(f"Watched directory is missing: {self.directory}")
+            return None
+        if self._known is None:
+            registry = self.ingestion_pipeline.vectorstore_manager.content_registry
+            self._known = registry.files_under(self.directory)
+
+        current = self.scan()
+        changed = {path for path, stat in current.items() if self._known.get(path) != stat}
+        deleted = set(self._known) - set(current)
+        self._known = current
+
+        if changed or deleted:
+            self._changed = (self._changed | changed) - deleted
+            self._deleted = (self._deleted | deleted) - changed
+            self._last_change = now
+
+        if not (self._changed or self._deleted) or now - self._last_change < self.debounce:
+            return None
+        try:
+            return self.sync()
+        except Exception:
+            self._last_change = now
+            raise
+
+    def sync(self) -> SyncResult:
+        """
+        Apply the pending changes to the index.
+
+        Pending changes are cleared only once they are all applied. If the
+        sync fails it is retried after the next quiet period, which is safe
+        since ingests and deletes are idempotent.
+        """
+        pipeline = self.ingestion_pipeline
+        registry = pipeline.vectorstore_manager.content_registry
+        result = SyncResult()
+
+        for path in sorted(self._deleted):
+            result.chunks_removed += pipeline.vectorstore_manager.delete_source(path)
+            result.files_deleted += 1
+
+        new_files = [Path(path) for path in sorted(self._changed) if registry.file_state(Path(path)) is None]
+        if new_files:
+            progress = pipeline.ingest_files(new_files)
+            # New files are only skipped when they vanished before loading
+            result.files_added = len(new_files) - progress.files_failed - progress.files_skipped
+            result.chunks_added += progress.chunks_added
+            result.failed_files.extend(progress.failed_files)
+
+        for path in sorted(self._changed - {str(p) for p in new_files}):
+            try:
+                added, removed = pipeline.update_file(Path(path))
+            except FileNotFoundError:
+                continue  # Deleted since the scan; the next scan removes it
+            except Exception as e:
+                logger.warning(f"Could not re-index {path}: {e}")
+                result.failed_files.append(path)
+                continue
+            result.files_updated += 1
+            result.chunks_added += added
+            result.chunks_removed += removed
+
+        self._changed.clear()
+        self._deleted.clear()
+        logger.info(
+            f"Synced {self.directory}: {result.files_added} new, {result.files_updated} changed, "
+            f"{result.files_deleted} deleted files ({result.chunks_added} chunks added, "
+            f"{result.chunks_removed} removed)"
+        )
+        if self.on_sync is not None:
+            self.on_sync(result)
+        return result
+
+    def run(self) -> None:
+        """Poll until stopped. Blocks the calling thread."""
+        logger.info(f"Watching {self.directory} every {self.interval}s")
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Error syncing {self.directory}: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self) -> None:
+        """Poll in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="directory-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling and wait for a sync in progress to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
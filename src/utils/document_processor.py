@@ -1,8 +1,13 @@
 """Document loader and processor for RAG application."""
 
+import os
 import logging
+from collections import deque
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List
+from typing import Iterator, List, Optional
 from langchain_core.documents import Document
 from langchain_community.document_loaders import (
     TextLoader,
@@ -14,20 +19,47 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 logger = logging.getLogger(__name__)
 
+SUPPORTED_EXTENSIONS = [".txt", ".pdf", ".md", ".markdown", ".csv"]
+
+
+@dataclass
+class FileChunks:
+    """Chunks produced from one file, or the error that prevented it."""
+    
+    path: Path
+    chunks: List[Document] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+# Per-process DocumentProcessor used by the loading pool workers
+_worker_processor: Optional["DocumentProcessor"] = None
+
+
+def _init_worker(chunk_size: int, chunk_overlap: int) -> None:
+    global _worker_processor
+    _worker_processor = DocumentProcessor(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def _load_file_in_worker(file_path: Path) -> FileChunks:
+    return _worker_processor.load_and_split(file_path)
+
 
 class DocumentProcessor:
     """Handles document loading and processing."""
     
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200, load_workers: int = 1):
         """
         Initialize DocumentProcessor.
         
         Args:
             chunk_size: Size of text chunks
             chunk_overlap: Overlap between chunks
+            load_workers: Processes used to load and chunk directories
+                (1 loads in-process, 0 uses one per CPU)
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.load_workers = load_workers or os.cpu_count() or 1
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
@@ -44,29 +76,32 @@ class DocumentProcessor:
         Returns:
             List of Document objects
         """
-        suffix = file_path.suffix.lower()
-        
         try:
-            if suffix == ".txt":
-                loader = TextLoader(str(file_path), encoding="utf-8")
-            elif suffix == ".pdf":
-                loader = PyPDFLoader(str(file_path))
-            elif suffix in [".md", ".markdown"]:
-                loader = UnstructuredMarkdownLoader(str(file_path))
-            elif suffix == ".csv":
-                loader = CSVLoader(str(file_path))
-            else:
-                logger.warning(f"Unsupported file type: {suffix}")
-                return []
-            
-            documents = loader.load()
-            logger.info(f"Loaded {len(documents)} document(s) from {file_path.name}")
-            return documents
-            
+            return self._load(file_path)
         except Exception as e:
             logger.error(f"Error loading {file_path}: {e}")
             return []
     
+    def _load(self, file_path: Path) -> List[Document]:
+        """Load a single document, raising on parse errors."""
+        suffix = file_path.suffix.lower()
+        
+        if suffix == ".txt":
+            loader = TextLoader(str(file_path), encoding="utf-8")
+        elif suffix == ".pdf":
+            loader = PyPDFLoader(str(file_path))
+        elif suffix in [".md", ".markdown"]:
+            loader = UnstructuredMarkdownLoader(str(file_path))
+        elif suffix == ".csv":
+            loader = CSVLoader(str(file_path))
+        else:
+            logger.warning(f"Unsupported file type: {suffix}")
+            return []
+        
+        documents = loader.load()
+        logger.info(f"Loaded {len(documents)} document(s) from {file_path.name}")
+        return documents
+    
     def load_directory(self, directory_path: Path) -> List[Document]:
         """
         Load all supported documents from a directory.
@@ -77,21 +112,121 @@ class DocumentProcessor:
         Returns:
             List of Document objects
         """
-        supported_extensions = [".txt", ".pdf", ".md", ".markdown", ".csv"]
         all_documents = []
         
         if not directory_path.exists():
             logger.error(f"Directory not found: {directory_path}")
             return []
         
-        for file_path in directory_path.rglob("*"):
-            if file_path.is_file() and file_path.suffix.lower() in supported_extensions:
-                documents = self.load_document(file_path)
-                all_documents.extend(documents)
+        for file_path in self.find_documents(directory_path):
+            documents = self.load_document(file_path)
+            all_documents.extend(documents)
         
         logger.info(f"Loaded {len(all_documents)} total documents from {directory_path}")
         return all_documents
     
+    def find_documents(self, directory_path: Path) -> List[Path]:
+        """
+        List supported files under a directory, in a stable (sorted) order.
+        
+        Args:
+            directory_path: Path to directory
+            
+        Returns:
+            Sorted list of file paths
+        """
+        return sorted(
+            file_path for file_path in directory_path.rglob("*")
+            if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_EXTENSIONS
+        )
+    
+    def load_and_split(self, file_path: Path) -> FileChunks:
+        """
+        Load and chunk a single file, capturing any error instead of raising.
+        
+        Args:
+            file_path: Path to document
+            
+        Returns:
+            FileChunks with the file's chunks or its error
+        """
+        try:
+            documents = self._load(file_path)
+            return FileChunks(path=file_path, chunks=self.text_splitter.split_documents(documents))
+        except Exception as e:
+            logger.error(f"Error processing {file_path}: {e}")
+            return FileChunks(path=file_path, error=str(e))
+    
+    def iter_file_chunks(self, file_paths: List[Path]) -> Iterator[FileChunks]:
+        """
+        Load and chunk files, yielding one result per file in the given order.
+        
+        With more than one load worker, files are parsed and split in a
+        process pool. At most a few files per worker are in flight, so
+        results are streamed rather than accumulated. A file that fails,
+        even one that crashes its worker, is reported in its FileChunks
+        and the remaining files are still processed.
+        
+        Args:
+            file_paths: Files to process
+            
+        Yields:
+            FileChunks for each file, in input order
+        """
+        if self.load_workers <= 1 or len(file_paths) <= 1:
+            for file_path in file_paths:
+                yield self.load_and_split(file_path)
+            return
+        
+        workers = min(self.load_workers, len(file_paths))
+        max_in_flight = workers * 4
+        pending_paths = deque(file_paths)
+        in_flight = deque()
+        executor = self._create_pool(workers)
+        
+        try:
+            while pending_paths or in_flight:
+                while pending_paths and len(in_flight) < max_in_flight:
+                    file_path = pending_paths.popleft()
+                    in_flight.append((file_path, executor.submit(_load_file_in_worker, file_path)))
+                
+                file_path, future = in_flight.popleft()
+                try:
+                    yield future.result()
+                except BrokenProcessPool as e:
+                    # A worker died (e.g. a parser crash); the pool cannot tell which
+                    # file caused it, so every in-flight file is reported as failed
+                    failed = [file_path] + [path for path, _ in in_flight]
+                    logger.error(f"Loading worker crashed while processing {len(failed)} file(s): {e}")
+                    for failed_path in failed:
+                        yield FileChunks(path=failed_path, error=f"Worker process crashed: {e}")
+                    in_flight.clear()
+                    executor.shutdown(wait=False)
+                    executor = self._create_pool(workers)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def _create_pool(self, workers: int) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.chunk_size, self.chunk_overlap)
+        )
+    
+    def iter_directory_chunks(self, directory_path: Path) -> Iterator[FileChunks]:
+        """
+        Load and chunk every supported file under a directory, in file order.
+        
+        Args:
+            directory_path: Path to directory
+            
+        Yields:
+            FileChunks for each file
+        """
+        file_paths = self.find_documents(directory_path)
+        logger.info(f"Loading {len(file_paths)} files from {directory_path} with {self.load_workers} worker(s)")
+        yield from self.iter_file_chunks(file_paths)
+    
     def process_documents(self, documents: List[Document]) -> List[Document]:
         """
         Split documents into chunks.
@@ -123,10 +258,19 @@ class DocumentProcessor:
         """
         if path.is_file():
             documents = self.load_document(path)
-        elif path.is_dir():
-            documents = self.load_directory(path)
-        else:
+            return self.process_documents(documents)
+        
+        if not path.is_dir():
             logger.error(f"Path not found: {path}")
             return []
         
-        return self.process_documents(documents)
+        chunks = []
+        failed = 0
+        for result in self.iter_directory_chunks(path):
+            chunks.extend(result.chunks)
+            failed += result.error is not None
+        
+        if failed:
+            logger.warning(f"{failed} file(s) in {path} could not be processed")
+        logger.info(f"Created {len(chunks)} chunks from {path}")
+        return chunks
@@ -0,0 +1,96 @@
+"""Bounded cache for query embeddings."""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU cache of query embeddings with optional TTL."""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 0):
+        """
+        Initialize QueryEmbeddingCache.
+
+        Args:
+            max_size: Maximum number of cached embeddings (0 disables caching)
+            ttl_seconds: Time-to-live for entries in seconds (0 means no expiry)
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(text: str, model_name: str) -> Tuple[str, str]:
+        """Build a cache key from the model name and normalized query text."""
+        normalized = " ".join(text.lower().split())
+        return model_name, normalized
+
+    def get(self, key: Tuple[str, str]) -> Optional[List[float]]:
+        """
+        Look up an embedding, counting the hit or miss.
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            Cached embedding, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                metrics.CACHE_MISSES.labels("embedding").inc()
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            metrics.CACHE_HITS.labels("embedding").inc()
+            return entry[1]
+
+    def put(self, key: Tuple[str, str], embedding: List[float]) -> None:
+        """
+        Store an embedding, evicting the least recently used entry if full.
+
+        Args:
+            key: Key from make_key
+            embedding: Query embedding
+        """
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached embeddings."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Return size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
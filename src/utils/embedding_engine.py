@@ -0,0 +1,182 @@
+"""Batched, multi-core sentence-transformers embedding engine."""
+
+import os
+import atexit
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("torch", "onnx")
+
+
+@dataclass
+class EmbeddingSettings:
+    """Embedding throughput settings."""
+
+    batch_size: int = 64           # Texts per forward pass
+    num_processes: int = 1         # >1 starts a sentence-transformers multi-process pool for documents
+    # torch (or ONNX Runtime) intra-op threads per process (0: runtime default, or cores / processes in a pool).
+    # torch's thread count is process-wide, so the engine does not set it: call configure_torch_threads at startup.
+    torch_threads: int = 0
+    sort_by_length: bool = True    # Group texts of similar length to reduce padding
+    normalize: bool = False        # L2-normalize embeddings (changes distances; rebuild the index after toggling)
+    device: str = "cpu"
+    backend: str = "torch"         # "torch" (sentence-transformers) or "onnx" (ONNX Runtime, see onnx_embeddings)
+    onnx_path: str = ""            # Directory of the ONNX export, for the onnx backend
+    quantize: bool = False         # Run the int8 dynamic-quantized ONNX model
+
+
+def configure_torch_threads(settings: EmbeddingSettings) -> None:
+    """
+    Apply ``settings.torch_threads`` to torch in this process.
+
+    The setting is process-wide and affects every torch user, so only the
+    application entry point should call this, once, before embedding.
+    """
+    if settings.backend != "torch" or settings.torch_threads <= 0:
+        return
+    import torch
+    torch.set_num_threads(settings.torch_threads)
+
+
+class EmbeddingEngine(Embeddings):
+    """
+    LangChain Embeddings backed directly by a SentenceTransformer model.
+
+    Documents are encoded in batches of ``batch_size``. With
+    ``sort_by_length`` they are ordered longest first before batching, so
+    each batch pads to a similar length, and results are returned in the
+    original order. When ``num_processes`` is above one, document batches
+    are spread over a multi-process pool, started on first use. Queries
+    are always encoded in-process since a pool round trip would dominate
+    a single short text.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        settings: Optional[EmbeddingSettings] = None,
+        model: Optional[Any] = None
+    ):
+        """
+        Initialize EmbeddingEngine.
+
+        Args:
+            model_name: sentence-transformers model name or path
+            settings: Batch size, process pool and thread settings
+            model: Preloaded model exposing the SentenceTransformer encode API
+        """
+        self.model_name = model_name
+        self.settings = settings or EmbeddingSettings()
+        self._pool: Optional[Dict[str, Any]] = None
+        self._pool_lock = threading.Lock()
+
+        if model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise ImportError(
+                    "Could not import sentence_transformers. "
+                    "Please install it with `pip install sentence-transformers`."
+                ) from e
+            model = SentenceTransformer(model_name, device=self.settings.device)
+        self.model = model
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts as a float32 matrix, in input order.
+
+        Args:
+            texts: Texts to encode
+
+        Returns:
+            Array of shape (len(texts), dim)
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        order = None
+        if self.settings.sort_by_length:
+            order = np.argsort([-len(text) for text in texts], kind="stable")
+            texts = [texts[i] for i in order]
+
+        pool = self._get_pool() if len(texts) > self.settings.batch_size else None
+        if pool is not None:
+            vectors = self.model.encode_multi_process(
+                texts,
+                pool,
+                batch_size=self.settings.batch_size,
+                normalize_embeddings=self.settings.normalize
+            )
+        else:
+            vectors = self.model.encode(
+                texts,
+                batch_size=self.settings.batch_size,
+                normalize_embeddings=self.settings.normalize,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if order is not None:
+            restored = np.empty_like(vectors)
+            restored[order] = vectors
+            vectors = restored
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed document chunks in batches (and across processes if configured)."""
+        return self.encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query in-process."""
+        vector = self.model.encode(
+            [text],
+            batch_size=1,
+            normalize_embeddings=self.settings.normalize,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return np.asarray(vector[0], dtype=np.float32).tolist()
+
+    def _get_pool(self) -> Optional[Dict[str, Any]]:
+        """Start the multi-process pool on first use."""
+        if self.settings.num_processes <= 1:
+            return None
+        with self._pool_lock:
+            if self._pool is None:
+                # Workers are spawned and do not inherit torch.set_num_threads; they
+                # read OMP_NUM_THREADS at start-up, so split the cores between them
+                threads = self.settings.torch_threads or max(
+                    1, (os.cpu_count() or 1) // self.settings.num_processes
+                )
+                logger.info(
+                    f"Starting {self.settings.num_processes} embedding processes "
+                    f"with {threads} thread(s) each"
+                )
+                previous = os.environ.get("OMP_NUM_THREADS")
+                os.environ["OMP_NUM_THREADS"] = str(threads)
+                try:
+                    self._pool = self.model.start_multi_process_pool(
+                        target_devices=[self.settings.device] * self.settings.num_processes
+                    )
+                finally:
+                    if previous is None:
+                        os.environ.pop("OMP_NUM_THREADS", None)
+                    else:
+                        os.environ["OMP_NUM_THREADS"] = previous
+                atexit.register(self.close)
+            return self._pool
+
+    def close(self) -> None:
+        """Stop the multi-process pool, if running."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self.model.stop_multi_process_pool(self._pool)
+                self._pool = None
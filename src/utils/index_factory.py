@@ -0,0 +1,155 @@
+"""FAISS index construction for the supported index types."""
+
+import logging
+from dataclasses import dataclass
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+
+@dataclass
+class IndexSettings:
+    """Index type and tuning parameters."""
+
+    index_type: str = "flat"
+    nlist: int = 1024            # IVF: number of inverted lists
+    nprobe: int = 16             # IVF: lists visited per query
+    pq_m: int = 16               # IVF-PQ: sub-quantizers (must divide the dimension)
+    hnsw_m: int = 32             # HNSW: graph neighbours per node
+    ef_construction: int = 200   # HNSW: build-time beam width
+    ef_search: int = 64          # HNSW: query-time beam width
+    train_sample: int = 100000   # Max vectors used to train IVF/PQ
+
+
+def build_index(settings: IndexSettings, dim: int, num_vectors: int) -> faiss.Index:
+    """
+    Create an empty FAISS index of the configured type.
+
+    IVF list counts are capped so that at least 39 training points exist per
+    list, falling back to a flat index for corpora too small to train.
+
+    Args:
+        settings: Index settings
+        dim: Embedding dimension
+        num_vectors: Number of vectors available for training
+
+    Returns:
+        Untrained FAISS index
+    """
+    index_type = settings.index_type.lower()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{settings.index_type}', expected one of {INDEX_TYPES}")
+
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, settings.hnsw_m)
+        index.hnsw.efConstruction = settings.ef_construction
+        return index
+
+    train_points = min(num_vectors, settings.train_sample)
+    nlist = min(settings.nlist, train_points // 39)
+    if index_type == "ivf_pq" and train_points < 256:
+        nlist = 0
+    if nlist < 1:
+        logger.warning(
+            f"Only {num_vectors} vectors, too few to train {index_type}; using a flat index"
+        )
+        return faiss.IndexFlatL2(dim)
+    if nlist < settings.nlist:
+        logger.info(f"Reducing nlist from {settings.nlist} to {nlist} for {train_points} training vectors")
+
+    quantizer = faiss.IndexFlatL2(dim)
+    if index_type == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dim, nlist)
+
+    if dim % settings.pq_m != 0:
+        raise ValueError(f"pq_m={settings.pq_m} must divide the embedding dimension {dim}")
+    return faiss.IndexIVFPQ(quantizer, dim, nlist, settings.pq_m, 8)
+
+
+def train_index(index: faiss.Index, vectors: np.ndarray, sample_size: int, seed: int = 0) -> None:
+    """
+    Train an index on a random sample of vectors if it needs training.
+
+    Args:
+        index: FAISS index
+        vectors: All vectors, shape (n, dim)
+        sample_size: Maximum number of vectors to train on
+        seed: Random seed for sampling
+    """
+    if index.is_trained:
+        return
+
+    if len(vectors) > sample_size:
+        rng = np.random.default_rng(seed)
+        vectors = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+
+    logger.info(f"Training {type(index).__name__} on {len(vectors)} vectors...")
+    index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+
+
+def apply_search_params(index: faiss.Index, settings: IndexSettings) -> None:
+    """Set query-time parameters (nprobe / efSearch) on a built or loaded index."""
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = settings.ef_search
+        return
+
+    try:
+        faiss.extract_index_ivf(index).nprobe = settings.nprobe
+    except RuntimeError:
+        pass  # not an IVF index
+
+
+def search_params(index: faiss.Index, selector: faiss.IDSelector) -> faiss.SearchParameters:
+    """
+    Search parameters restricting results to ``selector``, keeping the index's nprobe / efSearch.
+
+    Per-call parameters replace the index defaults, so they are copied over.
+    """
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return faiss.SearchParameters(sel=selector)
+    return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+
+
+def reconstruct_all(index: faiss.Index, allow_lossy: bool = False) -> np.ndarray:
+    """
+    Recover the stored vectors of an index, in id order.
+
+    Args:
+        index: FAISS index
+        allow_lossy: Return decoded PQ approximations instead of raising.
+            Re-adding them to the same trained index reproduces (nearly) the same codes.
+
+    Raises:
+        RuntimeError: If the index only keeps lossy codes (PQ) and allow_lossy is False
+    """
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+
+    if ivf is not None:
+        if isinstance(ivf, faiss.IndexIVFPQ) and not allow_lossy:
+            raise RuntimeError("IVF-PQ stores lossy codes; vectors must be re-embedded")
+        ivf.make_direct_map()
+
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def describe_index(index: faiss.Index) -> str:
+    """Short human-readable description of an index."""
+    return f"{type(index).__name__}(ntotal={index.ntotal}, dim={index.d})"
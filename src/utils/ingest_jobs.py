@@ -0,0 +1,174 @@
+"""Background ingestion jobs run on a bounded worker pool."""
+
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.utils.ingestion import IngestionPipeline, IngestProgress
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+@dataclass
+class IngestJob:
+    """State of one ingestion job."""
+
+    job_id: str
+    path: str
+    status: str = QUEUED
+    progress: IngestProgress = field(default_factory=IngestProgress)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "path": self.path,
+            "status": self.status,
+            "progress": self.progress.to_dict(),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class IngestJobQueue:
+    """
+    Runs ingests in the background on at most ``max_workers`` threads.
+
+    Submitting returns at once with a job whose progress counters are
+    updated after every batch. Further jobs wait in the executor's queue.
+    Each batch is swapped into the index as it is added, so queries
+    keep being answered from the current index while a job runs. Only
+    the last ``history_size`` finished jobs are kept.
+    """
+
+    def __init__(self, ingestion_pipeline: IngestionPipeline, max_workers: int = 1, history_size: int = 100):
+        """
+        Initialize IngestJobQueue.
+
+        Args:
+            ingestion_pipeline: Pipeline that runs each ingest
+            max_workers: Jobs run at the same time
+            history_size: Finished jobs kept for status lookups
+        """
+        self.ingestion_pipeline = ingestion_pipeline
+        self.history_size = max(1, history_size)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="ingest-job")
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, path: Path) -> IngestJob:
+        """
+        Queue an ingest of a file or directory.
+
+        Args:
+            path: File or directory to ingest
+
+        Returns:
+            The queued job
+        """
+        job = IngestJob(job_id=str(uuid.uuid4()), path=str(path))
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        job.future = self._executor.submit(self._run, job, path)
+        logger.info(f"Queued ingest job {job.job_id} for {path}")
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        """Look up a job by id."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[IngestJob]:
+        """Known jobs, oldest first."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[IngestJob]:
+        """
+        Cancel a job.
+
+        A queued job never starts. A running job stops before its next
+        batch; batches already added stay in the index.
+
+        Args:
+            job_id: Job to cancel
+
+        Returns:
+            The job, or None if it is unknown
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, CANCELLED)
+        return job
+
+    def _run(self, job: IngestJob, path: Path) -> None:
+        if job.cancel_event.is_set():
+            self._finish(job, CANCELLED)
+            return
+
+        job.status = RUNNING
+        job.started_at = time.time()
+
+        def on_progress(progress: IngestProgress) -> None:
+            job.progress = progress
+
+        try:
+            progress = self.ingestion_pipeline.ingest(path, on_progress=on_progress, cancel=job.cancel_event)
+        except Exception as e:
+            logger.error(f"Ingest job {job.job_id} failed: {e}")
+            metrics.ERRORS.labels("ingest").inc()
+            job.error = str(e)
+            self._finish(job, FAILED)
+            return
+
+        job.progress = progress
+        self._finish(job, CANCELLED if progress.cancelled else COMPLETED)
+
+    def _finish(self, job: IngestJob, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        logger.info(f"Ingest job {job.job_id} {status}")
+        with self._lock:
+            self._prune()
+
+    def _prune(self) -> None:
+        """Drop the oldest finished jobs beyond the history size. Caller holds the lock."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history_size)]:
+            del self._jobs[job_id]
+
+    def shutdown(self) -> None:
+        """Cancel every job and wait for running ones to stop."""
+        for job in self.list():
+            self.cancel(job.job_id)
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,341 @@
+"""Streaming ingestion pipeline: load → split → embed → index, in bounded batches."""
+
+import time
+import queue
+import logging
+import threading
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from src.utils.content_registry import FileState, file_hash
+from src.utils.document_processor import DocumentProcessor
+from src.utils.vectorstore_manager import VectorStoreManager
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+@dataclass
+class IngestProgress:
+    """Running counters of an ingestion, passed to progress callbacks."""
+
+    files_total: int = 0
+    files_processed: int = 0
+    files_skipped: int = 0
+    files_failed: int = 0
+    chunks_added: int = 0
+    chunks_skipped: int = 0
+    chunks_removed: int = 0
+    batches_added: int = 0
+    elapsed_seconds: float = 0.0
+    cancelled: bool = False
+    failed_files: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+ProgressCallback = Callable[[IngestProgress], None]
+
+
+class IngestionPipeline:
+    """
+    Ingests a file or directory without materializing the corpus.
+
+    A loader thread reads and splits files (through the DocumentProcessor,
+    so in its process pool when configured) and packs chunks into batches
+    of ``batch_size``. Batches are handed over through a queue holding at
+    most ``queue_size`` of them, so loading blocks when embedding falls
+    behind. The calling thread embeds each batch and appends it to the
+    index. At any time memory holds at most ``queue_size + 2`` batches
+    plus the files in flight in the loader.
+
+    Re-ingesting is idempotent: files whose size and mtime, or failing
+    that content hash, match the last successful ingest are not loaded at
+    all, and chunks already in the index are skipped without embedding.
+    A file is recorded only once all of its chunks have been added. A
+    recorded file whose content changed is re-indexed in place, so its
+    stale chunks are removed rather than left searchable.
+    """
+
+    def __init__(
+        self,
+        document_processor: DocumentProcessor,
+        vectorstore_manager: VectorStoreManager,
+        batch_size: int = 256,
+        queue_size: int = 2
+    ):
+        """
+        Initialize IngestionPipeline.
+
+        Args:
+            document_processor: Loads and splits files
+            vectorstore_manager: Embeds and indexes chunks
+            batch_size: Chunks embedded and added to the index per batch
+            queue_size: Loaded batches buffered ahead of embedding
+        """
+        self.document_processor = document_processor
+        self.vectorstore_manager = vectorstore_manager
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(1, queue_size)
+
+    def ingest(
+        self,
+        path: Path,
+        on_progress: Optional[ProgressCallback] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> IngestProgress:
+        """
+        Ingest a file or directory.
+
+        Args:
+            path: File or directory to ingest
+            on_progress: Called with the current counters after every batch
+            cancel: Stops the ingest before the next batch once set
+
+        Returns:
+            Final progress counters
+        """
+        if path.is_dir():
+            file_paths = self.document_processor.find_documents(path)
+        elif path.is_file():
+            file_paths = [path]
+        else:
+            raise FileNotFoundError(f"Path not found: {path}")
+        return self.ingest_files(file_paths, on_progress, cancel)
+
+    def ingest_files(
+        self,
+        file_paths: List[Path],
+        on_progress: Optional[ProgressCallback] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> IngestProgress:
+        """
+        Ingest a list of files.
+
+        Batches already added when the ingest is cancelled stay in the
+        index, and their files are recorded, so ingesting again resumes
+        where the cancelled ingest stopped.
+
+        Args:
+            file_paths: Files to ingest
+            on_progress: Called with the current counters after every batch
+            cancel: Stops the ingest before the next batch once set
+
+        Returns:
+            Final progress counters
+        """
+        progress = IngestProgress(files_total=len(file_paths))
+        start = time.perf_counter()
+        changed, edited = self._changed_files(file_paths, progress)
+        batches: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        loader = threading.Thread(
+            target=self._load_batches,
+            args=(changed, batches, stop, progress),
+            name="ingest-loader",
+            daemon=True
+        )
+        loader.start()
+
+        try:
+            registry = self.vectorstore_manager.content_registry
+            for batch, completed_files in self._drain(batches):
+                if cancel is not None and cancel.is_set():
+                    progress.cancelled = True
+                    break
+                if batch:
+                    added = self.vectorstore_manager.add_documents(batch)
+                    progress.chunks_added += added
+                    progress.chunks_skipped += len(batch) - added
+                    progress.batches_added += 1
+                if completed_files:
+                    registry.record_files(completed_files)
+                progress.elapsed_seconds = time.perf_counter() - start
+                if on_progress is not None:
+                    on_progress(progress)
+        finally:
+            stop.set()
+            loader.join()
+
+        # Edited files replace their old chunks, one file at a time
+        for file_path, state in edited.items():
+            if progress.cancelled or (cancel is not None and cancel.is_set()):
+                progress.cancelled = True
+                break
+            progress.files_processed += 1
+            try:
+                chunks, added, removed = self._replace_file(file_path, state)
+            except ValueError as e:
+                logger.warning(str(e))
+                progress.files_failed += 1
+                progress.failed_files.append(str(file_path))
+                continue
+            progress.chunks_added += added
+            progress.chunks_skipped += chunks - added
+            progress.chunks_removed += removed
+            progress.elapsed_seconds = time.perf_counter() - start
+            if on_progress is not None:
+                on_progress(progress)
+
+        progress.elapsed_seconds = time.perf_counter() - start
+        if on_progress is not None:
+            on_progress(progress)
+        if progress.cancelled:
+            logger.info(f"Ingest cancelled after {progress.chunks_added} new chunks")
+            return progress
+        logger.info(
+            f"Ingested {progress.chunks_added} new chunks ({progress.chunks_skipped} already indexed, "
+            f"{progress.chunks_removed} stale removed) "
+            f"from {progress.files_processed} files ({progress.files_skipped} unchanged, "
+            f"{progress.files_failed} failed) in {progress.elapsed_seconds:.1f}s"
+        )
+        return progress
+
+    def update_file(self, path: Path) -> Tuple[int, int]:
+        """
+        Re-index one edited file in place.
+
+        Only chunks that changed are embedded and only stale ones removed,
+        so the cost is proportional to the file, not the corpus. A file
+        whose content hash matches its last ingest is not loaded.
+
+        Args:
+            path: File to re-index
+
+        Returns:
+            (chunks added, chunks removed)
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If the file could not be loaded or split
+        """
+        if not path.is_file():
+            raise FileNotFoundError(f"File not found: {path}")
+
+        stat = path.stat()
+        state = (stat.st_mtime_ns, stat.st_size, file_hash(path))
+        registry = self.vectorstore_manager.content_registry
+        recorded = registry.file_state(path)
+        if recorded is not None and recorded[2] == state[2]:
+            registry.record_files([(path, state)])
+            return 0, 0
+
+        _, added, removed = self._replace_file(path, state)
+        return added, removed
+
+    def _replace_file(self, path: Path, state: FileState) -> Tuple[int, int, int]:
+        """Load a file and replace its indexed chunks, as (chunks, chunks added, chunks removed)."""
+        result = self.document_processor.load_and_split(path)
+        if result.error is not None:
+            raise ValueError(f"Could not load {path}: {result.error}")
+
+        added, removed = self.vectorstore_manager.upsert_source(str(path), result.chunks)
+        self.vectorstore_manager.content_registry.record_files([(path, state)])
+        return len(result.chunks), added, removed
+
+    def _changed_files(
+        self,
+        file_paths: List[Path],
+        progress: IngestProgress
+    ) -> Tuple[Dict[Path, FileState], Dict[Path, FileState]]:
+        """
+        Files that differ from their last ingest, with their current state.
+
+        A file deleted since it was listed (e.g. an editor's temporary file)
+        is skipped, and chunks indexed from it before are removed.
+
+        Returns:
+            (files never ingested, recorded files whose content changed)
+        """
+        registry = self.vectorstore_manager.content_registry
+        changed: Dict[Path, FileState] = {}
+        edited: Dict[Path, FileState] = {}
+        for file_path in file_paths:
+            recorded = registry.file_state(file_path)
+            try:
+                stat = file_path.stat()
+                if recorded is not None and recorded[:2] == (stat.st_mtime_ns, stat.st_size):
+                    progress.files_skipped += 1
+                    continue
+                digest = file_hash(file_path)
+            except FileNotFoundError:
+                if recorded is not None:
+                    progress.chunks_removed += self.vectorstore_manager.delete_source(str(file_path))
+                progress.files_skipped += 1
+                continue
+
+            state = (stat.st_mtime_ns, stat.st_size, digest)
+            if recorded is not None and recorded[2] == digest:
+                # Touched but identical: remember the new mtime and skip loading
+                registry.record_files([(file_path, state)])
+                progress.files_skipped += 1
+                continue
+            if recorded is not None:
+                edited[file_path] = state
+            else:
+                changed[file_path] = state
+        return changed, edited
+
+    def _load_batches(
+        self,
+        files: Dict[Path, FileState],
+        batches: queue.Queue,
+        stop: threading.Event,
+        progress: IngestProgress
+    ) -> None:
+        """
+        Loader thread: split files into chunk batches and queue them.
+
+        Each queued item is (chunks, files completed by this batch), so a
+        file is recorded only after the batch holding its last chunk is added.
+        """
+        results = self.document_processor.iter_file_chunks(list(files))
+        try:
+            batch: List[Document] = []
+            completed: List[Tuple[Path, FileState]] = []
+            for result in results:
+                progress.files_processed += 1
+                if result.error is not None:
+                    progress.files_failed += 1
+                    progress.failed_files.append(str(result.path))
+                for chunk in result.chunks:
+                    batch.append(chunk)
+                    if len(batch) == self.batch_size:
+                        if not self._put(batches, (batch, completed), stop):
+                            return
+                        batch, completed = [], []
+                if result.error is None:
+                    completed.append((result.path, files[result.path]))
+            if batch or completed:
+                self._put(batches, (batch, completed), stop)
+            self._put(batches, _DONE, stop)
+        except Exception as e:
+            self._put(batches, e, stop)
+        finally:
+            results.close()
+
+    @staticmethod
+    def _put(batches: queue.Queue, item: Any, stop: threading.Event) -> bool:
+        """Block until there is room in the queue (backpressure) or the consumer stops."""
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _drain(batches: queue.Queue) -> Iterator[Tuple[List[Document], List[Tuple[Path, FileState]]]]:
+        while True:
+            item = batches.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
@@ -0,0 +1,316 @@
+"""BM25 inverted index over chunk text, for lexical and hybrid retrieval."""
+
+import os
+import re
+import math
+import logging
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# BM25 term-frequency saturation and length normalization
+K1 = 1.2
+B = 0.75
+
+MAX_TERM_BYTES = 64
+
+# Query terms in more than this fraction of the chunks only rescore chunks matched by rarer terms,
+# when that provably leaves the top k unchanged
+COMMON_TERM_RATIO = 0.01
+
+# Words, optionally joined by - _ . / so codes like ERR-1042, KB0012345 or v2.3.1 stay one term
+_TOKEN_RE = re.compile(r"[0-9a-z]+(?:[-_./][0-9a-z]+)*")
+_PART_RE = re.compile(r"[0-9a-z]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in is it its "
+    "of on or so that the their there these this to was we were what when where which "
+    "who why will with you your".split()
+)
+
+
+@dataclass
+class HybridSettings:
+    """How dense and lexical results are combined."""
+
+    dense_weight: float = 1.0     # RRF weight of the FAISS ranking
+    lexical_weight: float = 1.0   # RRF weight of the BM25 ranking (0 disables lexical search)
+    rrf_k: int = 60               # RRF rank offset: larger values flatten the rank curve
+    candidates: int = 20          # Results fetched from each side before fusion
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms of a text, without stopwords.
+
+    Compound terms are kept whole and also split into their parts, so a
+    query for ``ERR-1042`` matches it exactly and ``1042`` still matches.
+    """
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if len(token) > MAX_TERM_BYTES:
+            continue
+        if token not in STOPWORDS:
+            terms.append(token)
+        if not token.isalnum():
+            terms.extend(part for part in _PART_RE.findall(token) if part not in STOPWORDS)
+    return terms
+
+
+def query_terms(text: str) -> List[List[str]]:
+    """
+    Terms of a query, each as ``[term, *parts]``.
+
+    Parts are listed for compound terms only, as a fallback when the whole
+    term is not indexed.
+    """
+    groups = []
+    for token in dict.fromkeys(_TOKEN_RE.findall(text.lower())):
+        if len(token) > MAX_TERM_BYTES:
+            continue
+        parts = [] if token.isalnum() else [p for p in _PART_RE.findall(token) if p not in STOPWORDS]
+        if token not in STOPWORDS or parts:
+            groups.append([token, *parts])
+    return groups
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Document]],
+    weights: Sequence[float],
+    rrf_k: int = 60
+) -> List[Document]:
+    """
+    Merge rankings by weighted reciprocal rank, best first.
+
+    A chunk scores ``weight / (rrf_k + rank)`` in each ranking it appears
+    in. Only ranks are used, so BM25 scores and L2 distances need no
+    normalization against each other.
+    """
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for ranking, weight in zip(rankings, weights):
+        if weight <= 0:
+            continue
+        for rank, doc in enumerate(ranking, 1):
+            scores[doc.id] = scores.get(doc.id, 0.0) + weight / (rrf_k + rank)
+            docs.setdefault(doc.id, doc)
+    return [docs[chunk_id] for chunk_id in sorted(scores, key=scores.get, reverse=True)]
+
+
+def bm25_scores(
+    tfs: np.ndarray,
+    lengths: np.ndarray,
+    df: int,
+    num_docs: int,
+    avg_length: float
+) -> np.ndarray:
+    """BM25 contribution of one term to each document in its postings."""
+    idf = math.log(1 + (num_docs - df + 0.5) / (df + 0.5))
+    tfs = tfs.astype(np.float32)
+    norm = K1 * (1 - B + B * lengths.astype(np.float32) / max(avg_length, 1e-9))
+    return idf * tfs * (K1 + 1) / (tfs + norm)
+
+
+def bm25_upper_bound(df: int, num_docs: int) -> float:
+    """Largest BM25 contribution one term can make to any document (its idf times K1 + 1)."""
+    return math.log(1 + (num_docs - df + 0.5) / (df + 0.5)) * (K1 + 1)
+
+
+def _term_counts(documents: Iterable[Document]) -> Iterable[Tuple[Counter, int]]:
+    for doc in documents:
+        terms = tokenize(doc.page_content)
+        yield Counter(terms), len(terms)
+
+
+def _save(path: Path, array: np.ndarray) -> None:
+    with open(path, "wb") as f:
+        np.save(f, array)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class LexicalIndex:
+    """
+    Read-only BM25 postings for the positions of a base snapshot.
+
+    Stored next to ``index.faiss`` as memory-mapped arrays: the sorted term
+    dictionary, per-term offsets into the postings, the postings (position
+    and term frequency, sorted by position) and each position's length in
+    terms. Opening is constant time and a lookup is a binary search in
+    the dictionary plus one contiguous slice per query term, so the cost
+    depends on how many chunks contain the query terms, not on the size of
+    the corpus.
+    """
+
+    TERMS_NAME = "lexical.terms"
+    OFFSETS_NAME = "lexical.offsets"
+    DOCS_NAME = "lexical.docs"
+    TFS_NAME = "lexical.tfs"
+    LENGTHS_NAME = "lexical.lengths"
+
+    def __init__(self, directory: Path):
+        """
+        Open a lexical index.
+
+        Args:
+            directory: Snapshot directory containing the lexical.* files
+        """
+        self.directory = directory
+        self.terms = np.load(directory / self.TERMS_NAME, mmap_mode="r")
+        self.offsets = np.load(directory / self.OFFSETS_NAME, mmap_mode="r")
+        self.docs = np.load(directory / self.DOCS_NAME, mmap_mode="r")
+        self.tfs = np.load(directory / self.TFS_NAME, mmap_mode="r")
+        self.lengths = np.load(directory / self.LENGTHS_NAME, mmap_mode="r")
+        self.total_length = int(self.lengths.sum(dtype=np.int64))
+
+    @classmethod
+    def exists(cls, directory: Path) -> bool:
+        """Whether a lexical index has been written to the directory."""
+        return all(
+            (directory / name).exists()
+            for name in (cls.TERMS_NAME, cls.OFFSETS_NAME, cls.DOCS_NAME, cls.TFS_NAME, cls.LENGTHS_NAME)
+        )
+
+    @classmethod
+    def write(
+        cls,
+        directory: Path,
+        documents: Iterable[Document],
+        source: Optional["LexicalIndex"] = None,
+        keep: Optional[np.ndarray] = None
+    ) -> int:
+        """
+        Write a lexical index, optionally starting with the postings of another one.
+
+        Postings copied from ``source`` are renumbered, not re-tokenized, so
+        compaction only tokenizes the chunks added since the last snapshot.
+
+        Args:
+            directory: Output directory
+            documents: Chunks for the positions after the source's, in position order
+            source: Existing index whose positions come first
+            keep: Sorted positions of the source to keep (default: all)
+
+        Returns:
+            Number of positions written
+        """
+        term_parts: List[np.ndarray] = []
+        id_parts: List[np.ndarray] = []
+        doc_parts: List[np.ndarray] = []
+        tf_parts: List[np.ndarray] = []
+        length_parts: List[np.ndarray] = []
+        start = 0
+
+        if source is not None and len(source.lengths):
+            term_ids = np.repeat(
+                np.arange(len(source.terms), dtype=np.int32), np.diff(source.offsets).astype(np.int64)
+            )
+            docs = np.asarray(source.docs, dtype=np.int64)
+            tfs = np.asarray(source.tfs)
+            lengths = np.asarray(source.lengths)
+            if keep is not None:
+                keep = np.asarray(keep, dtype=np.int64)
+                renumber = np.full(len(lengths), -1, dtype=np.int64)
+                renumber[keep] = np.arange(len(keep))
+                docs = renumber[docs]
+                live = docs >= 0
+                term_ids, docs, tfs = term_ids[live], docs[live], tfs[live]
+                lengths = lengths[keep]
+            term_parts.append(np.asarray(source.terms))
+            id_parts.append(term_ids)
+            doc_parts.append(docs)
+            tf_parts.append(tfs)
+            length_parts.append(lengths)
+            start = len(lengths)
+
+        vocabulary: Dict[str, int] = {}
+        # Typed arrays keep a large compaction's postings at a few bytes each, not a Python int
+        new_ids, new_docs, new_tfs, new_lengths = array("i"), array("i"), array("H"), array("i")
+        for position, (counts, length) in enumerate(_term_counts(documents), start):
+            new_ids.extend([vocabulary.setdefault(term, len(vocabulary)) for term in counts])
+            new_docs.extend([position] * len(counts))
+            new_tfs.extend([min(tf, 65535) for tf in counts.values()])
+            new_lengths.append(length)
+        offset = len(term_parts[0]) if term_parts else 0
+        term_parts.append(np.array([term.encode("utf-8") for term in vocabulary], dtype=bytes))
+        id_parts.append(np.frombuffer(new_ids, dtype=np.int32) + offset)
+        doc_parts.append(np.frombuffer(new_docs, dtype=np.int32).astype(np.int64))
+        tf_parts.append(np.frombuffer(new_tfs, dtype=np.uint16))
+        length_parts.append(np.frombuffer(new_lengths, dtype=np.int32))
+
+        # One sorted dictionary for both parts; terms no longer in any chunk are dropped
+        terms, renumber = np.unique(np.concatenate(term_parts), return_inverse=True)
+        term_ids = renumber.reshape(-1)[np.concatenate(id_parts)]
+        counts = np.bincount(term_ids, minlength=len(terms))
+        used = counts > 0
+        term_ids = (np.cumsum(used) - 1)[term_ids]
+        terms, counts = terms[used], counts[used]
+
+        docs = np.concatenate(doc_parts)
+        order = np.lexsort((docs, term_ids))
+        lengths = np.concatenate(length_parts)
+
+        directory.mkdir(parents=True, exist_ok=True)
+        _save(directory / cls.TERMS_NAME, terms)
+        _save(directory / cls.OFFSETS_NAME, np.concatenate([[0], np.cumsum(counts)]).astype(np.int64))
+        _save(directory / cls.DOCS_NAME, docs[order].astype(np.int32))
+        _save(directory / cls.TFS_NAME, np.concatenate(tf_parts)[order].astype(np.uint16))
+        _save(directory / cls.LENGTHS_NAME, lengths.astype(np.int32))
+        return len(lengths)
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, term frequencies) of the chunks containing a term."""
+        key = term.encode("utf-8")
+        # Longer keys would be truncated to the dictionary's width and could match a prefix
+        if not len(self.terms) or len(key) > self.terms.dtype.itemsize:
+            return _EMPTY
+        i = int(np.searchsorted(self.terms, key))
+        if i == len(self.terms) or self.terms[i] != key:
+            return _EMPTY
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self.docs[start:end], self.tfs[start:end]
+
+
+_EMPTY = (np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.uint16))
+
+
+class LexicalDelta:
+    """
+    Append-only postings for the delta rows, shared by successive index versions.
+
+    Like the delta vectors, each version only reads the rows below its
+    ``delta_count``, so appends never disturb a reader.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.lengths: List[int] = []
+        self.cumulative_lengths: List[int] = [0]
+
+    def add(self, documents: Sequence[Document], start: int) -> None:
+        """Index chunks as delta rows ``start`` onwards. Callers serialize appends."""
+        for row, (counts, length) in enumerate(_term_counts(documents), start):
+            for term, tf in counts.items():
+                self.postings.setdefault(term, []).append((row, tf))
+            self.lengths.append(length)
+            self.cumulative_lengths.append(self.cumulative_lengths[-1] + length)
+
+    def lookup(self, term: str, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, term frequencies) of the first ``count`` rows containing a term."""
+        entries = self.postings.get(term)
+        if not entries:
+            return _EMPTY
+        postings = np.array(entries[:], dtype=np.int64).reshape(-1, 2)
+        postings = postings[postings[:, 0] < count]
+        return postings[:, 0], postings[:, 1]
+
+    def total_length(self, count: int) -> int:
+        """Summed length in terms of the first ``count`` rows."""
+        return self.cumulative_lengths[count]
@@ -0,0 +1,255 @@
+"""Process-wide metrics in the Prometheus text exposition format."""
+
+import os
+import time
+import logging
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from sub-millisecond prompt packing to slow LLM answers
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class Counter:
+    """
+    Monotonic count, optionally split by labels.
+
+    With labels, call :meth:`labels` for the child to increment.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._value = 0
+        self._children: Dict[Tuple[str, ...], "Counter"] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> "Counter":
+        """Child counter for one combination of label values."""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, Counter(self.name, self.documentation))
+        return child
+
+    def inc(self, amount: float = 1) -> None:
+        """Add a non-negative amount."""
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def samples(self) -> List[str]:
+        if not self.labelnames:
+            return [f"{self.name} {_format_value(self._value)}"]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+            for values, child in sorted(self._children.items())
+        ]
+
+
+class Gauge:
+    """Value that goes up and down, either set directly or read from a function at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Optional[Callable[[], Optional[float]]] = None):
+        self.name = name
+        self.documentation = documentation
+        self._value: Optional[float] = None
+        self._function = function
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def set_function(self, function: Optional[Callable[[], Optional[float]]]) -> None:
+        """Read the value from ``function`` at each scrape; it may return None for no sample."""
+        self._function = function
+
+    def samples(self) -> List[str]:
+        value = self._value
+        if self._function is not None:
+            try:
+                value = self._function()
+            except Exception as e:
+                logger.warning(f"Could not read gauge {self.name}: {e}")
+                value = None
+        return [] if value is None else [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram:
+    """
+    Distribution of observed values in cumulative buckets.
+
+    An observation is a binary search in the bucket bounds and two
+    additions under a lock, well under a microsecond, so it can sit on the
+    query path.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # Last slot counts values above every bound
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record one value."""
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def time(self) -> "_Timer":
+        """Context manager observing the seconds spent in its block."""
+        return _Timer(self)
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{_format_value(bound)}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {_format_value(total)}")
+        lines.append(f"{self.name}_count {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class MetricsRegistry:
+    """Ordered collection of metrics rendered together for a scrape."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format (version 0.0.4)."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+def resident_memory_bytes() -> Optional[int]:
+    """Current resident set size of this process, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+REGISTRY = MetricsRegistry()
+
+QUERY_EMBEDDING_SECONDS = REGISTRY.register(Histogram(
+    "rag_query_embedding_seconds", "Time to embed a query or a batch of queries, cache lookups included"
+))
+FAISS_SEARCH_SECONDS = REGISTRY.register(Histogram(
+    "rag_faiss_search_seconds", "Time of one FAISS search over a query matrix"
+))
+LEXICAL_SEARCH_SECONDS = REGISTRY.register(Histogram(
+    "rag_lexical_search_seconds", "Time of one BM25 query in hybrid search"
+))
+PROMPT_BUILD_SECONDS = REGISTRY.register(Histogram(
+    "rag_prompt_build_seconds", "Time to pack context and history into the prompt budget"
+))
+TTFT_SECONDS = REGISTRY.register(Histogram(
+    "rag_time_to_first_token_seconds", "Time from the start of a streamed query to its first answer token"
+))
+LLM_SECONDS = REGISTRY.register(Histogram(
+    "rag_llm_seconds", "Time the LLM took to generate one answer"
+))
+CACHE_HITS = REGISTRY.register(Counter(
+    "rag_cache_hits_total", "Cache lookups that found an entry", ["cache"]
+))
+CACHE_MISSES = REGISTRY.register(Counter(
+    "rag_cache_misses_total", "Cache lookups that found nothing", ["cache"]
+))
+SESSIONS_CREATED = REGISTRY.register(Counter(
+    "rag_sessions_created_total", "Conversation sessions created by this process"
+))
+SESSIONS_ACTIVE = REGISTRY.register(Gauge(
+    "rag_sessions_active", "Live conversation sessions in the session store"
+))
+INGESTED_CHUNKS = REGISTRY.register(Counter(
+    "rag_ingested_chunks_total", "New chunks embedded and added to the vector store"
+))
+ERRORS = REGISTRY.register(Counter(
+    "rag_errors_total", "Failed operations", ["stage"]
+))
+INDEX_CHUNKS = REGISTRY.register(Gauge(
+    "rag_index_chunks", "Live chunks in the served vector index"
+))
+RESIDENT_MEMORY_BYTES = REGISTRY.register(Gauge(
+    "process_resident_memory_bytes", "Resident memory size in bytes", resident_memory_bytes
+))
+
+
+def render() -> str:
+    """The process's metrics, ready to serve at ``/metrics``."""
+    return REGISTRY.render()
@@ -0,0 +1,319 @@
+"""ONNX Runtime embedding engine, optionally int8-quantized, loaded from a local export."""
+
+import os
+import json
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.utils.embedding_engine import EmbeddingSettings
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "model.onnx"
+QUANTIZED_MODEL_NAME = "model.int8.onnx"
+TOKENIZER_NAME = "tokenizer.json"
+CONFIG_NAME = "embedding_config.json"
+
+# Minimum cosine similarity to the sentence-transformers vectors
+FP32_MIN_COSINE = 0.9999
+INT8_MIN_COSINE = 0.99
+
+PARITY_TEXTS = [
+    "How do I reset my password?",
+    "VPN access requires a hardware token and manager approval.",
+    "Error ERR-1042 means the license server is unreachable.",
+    "Expense reports must be submitted within thirty days of purchase, "
+    "with receipts attached for every item above the limit.",
+    "What is retrieval augmented generation?",
+    "x",
+]
+
+
+def _import_onnxruntime():
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise ImportError(
+            "Could not import onnxruntime. "
+            "Please install it with `pip install onnxruntime`."
+        ) from e
+    return onnxruntime
+
+
+def quantize_model(directory: Path) -> Path:
+    """
+    Write the int8 dynamic-quantized model next to the fp32 one.
+
+    Weights are stored as int8 and activations are quantized on the fly,
+    so no calibration data is needed.
+
+    Args:
+        directory: ONNX export directory
+
+    Returns:
+        Path of the quantized model
+    """
+    _import_onnxruntime()
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    target = directory / QUANTIZED_MODEL_NAME
+    # Quantize to a temporary name so concurrent workers never load a partial file
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".onnx")
+    os.close(fd)
+    try:
+        quantize_dynamic(str(directory / MODEL_NAME), tmp, weight_type=QuantType.QInt8)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    logger.info(f"Wrote int8 model to {target}")
+    return target
+
+
+class OnnxEmbeddingEngine(Embeddings):
+    """
+    LangChain Embeddings running an exported transformer with ONNX Runtime.
+
+    Produces the same vectors as :class:`EmbeddingEngine` for the model it
+    was exported from (within float tolerance, or int8 tolerance when
+    quantized), without importing torch. Tokenization, pooling and
+    normalization follow the sentence-transformers model, as recorded in
+    the export. Batching and length sorting follow ``settings``;
+    ``torch_threads`` sets ONNX Runtime's intra-op threads and
+    ``num_processes`` is ignored.
+    """
+
+    def __init__(
+        self,
+        model_path: Path,
+        settings: Optional[EmbeddingSettings] = None,
+        session: Optional[Any] = None,
+        tokenizer: Optional[Any] = None
+    ):
+        """
+        Initialize OnnxEmbeddingEngine.
+
+        Args:
+            model_path: Directory written by :func:`export_model`
+            settings: Batch size, thread, normalization and quantization settings
+            session: Preloaded session exposing the onnxruntime InferenceSession API
+            tokenizer: Preloaded tokenizer exposing the tokenizers Tokenizer API
+        """
+        self.model_path = Path(model_path)
+        self.settings = settings or EmbeddingSettings()
+        config_path = self.model_path / CONFIG_NAME
+        if not config_path.exists():
+            raise FileNotFoundError(
+                f"No ONNX export in {self.model_path}; run `python rag_app.py export-onnx` first"
+            )
+        self.config: Dict[str, Any] = json.loads(config_path.read_text(encoding="utf-8"))
+        if self.config["pooling"] not in ("mean", "cls"):
+            raise ValueError(f"Unsupported pooling mode: {self.config['pooling']}")
+
+        if tokenizer is None:
+            try:
+                from tokenizers import Tokenizer
+            except ImportError as e:
+                raise ImportError(
+                    "Could not import tokenizers. "
+                    "Please install it with `pip install tokenizers`."
+                ) from e
+            tokenizer = Tokenizer.from_file(str(self.model_path / TOKENIZER_NAME))
+        tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+        self.tokenizer = tokenizer
+
+        if session is None:
+            onnxruntime = _import_onnxruntime()
+            model_file = self.model_path / (QUANTIZED_MODEL_NAME if self.settings.quantize else MODEL_NAME)
+            if self.settings.quantize and not model_file.exists():
+                model_file = quantize_model(self.model_path)
+            options = onnxruntime.SessionOptions()
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if self.settings.torch_threads > 0:
+                options.intra_op_num_threads = self.settings.torch_threads
+            session = onnxruntime.InferenceSession(
+                str(model_file), options, providers=["CPUExecutionProvider"]
+            )
+            logger.info(f"Loaded ONNX embedding model {model_file}")
+        self.session = session
+        self.input_names = [model_input.name for model_input in session.get_inputs()]
+
+    @property
+    def model_name(self) -> str:
+        """Name of the sentence-transformers model the export was made from."""
+        return self.config["model_name"]
+
+    def _encode_batch(self, texts: Sequence[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(list(texts))
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {name: inputs[name] for name in self.input_names})[0]
+
+        if self.config["pooling"] == "cls":
+            return hidden[:, 0]
+        mask = inputs["attention_mask"][:, :, None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts as a float32 matrix, in input order.
+
+        Args:
+            texts: Texts to encode
+
+        Returns:
+            Array of shape (len(texts), dim)
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        order = None
+        if self.settings.sort_by_length:
+            order = np.argsort([-len(text) for text in texts], kind="stable")
+            texts = [texts[i] for i in order]
+
+        batch_size = self.settings.batch_size
+        vectors = np.concatenate([
+            self._encode_batch(texts[start:start + batch_size])
+            for start in range(0, len(texts), batch_size)
+        ]).astype(np.float32)
+        if self.config["normalize"] or self.settings.normalize:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+        if order is not None:
+            restored = np.empty_like(vectors)
+            restored[order] = vectors
+            vectors = restored
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed document chunks in batches."""
+        return self.encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query."""
+        return self.encode([text])[0].tolist()
+
+    def close(self) -> None:
+        """Nothing to release; present for parity with EmbeddingEngine."""
+
+
+def check_parity(
+    reference: Embeddings,
+    candidate: Embeddings,
+    texts: Sequence[str] = PARITY_TEXTS,
+    min_cosine: float = FP32_MIN_COSINE
+) -> float:
+    """
+    Check that two embedding engines produce matching vectors.
+
+    Args:
+        reference: Engine whose vectors are expected (e.g. the torch backend)
+        candidate: Engine under test
+        texts: Texts to embed with both
+        min_cosine: Lowest acceptable cosine similarity for any text
+
+    Returns:
+        The lowest cosine similarity found
+
+    Raises:
+        ValueError: If the dimensions differ or any text is below ``min_cosine``
+    """
+    expected = np.asarray(reference.embed_documents(list(texts)), dtype=np.float32)
+    actual = np.asarray(candidate.embed_documents(list(texts)), dtype=np.float32)
+    if expected.shape != actual.shape:
+        raise ValueError(f"Embedding shapes differ: {expected.shape} vs {actual.shape}")
+
+    norms = np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    cosines = (expected * actual).sum(axis=1) / np.clip(norms, 1e-12, None)
+    worst = float(cosines.min())
+    if worst < min_cosine:
+        text = texts[int(cosines.argmin())]
+        raise ValueError(f"Embeddings diverge: cosine {worst:.5f} < {min_cosine} for {text!r}")
+    return worst
+
+
+def export_model(
+    model_name: str,
+    directory: Path,
+    quantize: bool = False,
+    opset: int = 14
+) -> Dict[str, float]:
+    """
+    Export a sentence-transformers model for :class:`OnnxEmbeddingEngine`.
+
+    Needs torch and sentence-transformers, so run it once on a build
+    machine; the API nodes only need onnxruntime and tokenizers. The
+    export is checked against the torch model before returning.
+
+    Args:
+        model_name: sentence-transformers model name or path
+        directory: Output directory
+        quantize: Also write and check the int8 dynamic-quantized model
+        opset: ONNX opset version
+
+    Returns:
+        Lowest cosine similarity to the torch vectors, per exported variant
+
+    Raises:
+        ValueError: If the model's pooling is unsupported or an export fails the parity check
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    from src.utils.embedding_engine import EmbeddingEngine
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    pooling = next(module for module in st_model if isinstance(module, Pooling)).get_pooling_mode_str()
+    if pooling not in ("mean", "cls"):
+        raise ValueError(f"Unsupported pooling mode: {pooling}")
+    transformer = st_model[0].auto_model.eval()
+    hf_tokenizer = st_model.tokenizer
+
+    directory.mkdir(parents=True, exist_ok=True)
+    sample = hf_tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            str(directory / MODEL_NAME),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]},
+            opset_version=opset
+        )
+    hf_tokenizer.backend_tokenizer.save(str(directory / TOKENIZER_NAME))
+    config = {
+        "model_name": model_name,
+        "max_seq_length": st_model.max_seq_length,
+        "pooling": pooling,
+        "normalize": any(isinstance(module, Normalize) for module in st_model),
+        "pad_token_id": hf_tokenizer.pad_token_id,
+        "pad_token": hf_tokenizer.pad_token,
+    }
+    (directory / CONFIG_NAME).write_text(json.dumps(config, indent=2), encoding="utf-8")
+    logger.info(f"Exported {model_name} to {directory}")
+
+    reference = EmbeddingEngine(model_name, model=st_model)
+    results = {
+        "fp32": check_parity(reference, OnnxEmbeddingEngine(directory), min_cosine=FP32_MIN_COSINE)
+    }
+    if quantize:
+        quantize_model(directory)
+        results["int8"] = check_parity(
+            reference,
+            OnnxEmbeddingEngine(directory, EmbeddingSettings(quantize=True)),
+            min_cosine=INT8_MIN_COSINE
+        )
+    return results
@@ -1,26 +1,55 @@
 """RAG Chain implementation."""
 
+import time
 import logging
-from typing import List, Dict, Any, Tuple
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple, Iterator, AsyncIterator, Optional
+
+import numpy as np
 from langchain_core.documents import Document
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
 
 from src.utils.grok_llm import GrokLLM
 from src.utils.vectorstore_manager import VectorStoreManager
+from src.utils.answer_cache import SemanticAnswerCache
+from src.utils.context_builder import (
+    TOKEN_COUNT_KEY, ContextBuilder, ContextSettings, split_summary, trim_history, truncate_tokens
+)
+from src.utils.chat_memory import MEMORY_MODES, ConversationSummarizer
+from src.utils.session_store import History
+from src.utils import metrics
 
 logger = logging.getLogger(__name__)
 
 
 class RAGChain:
-    """Retrieval Augmented Generation chain with conversation memory."""
+    """
+    Retrieval Augmented Generation chain with conversation memory.
+    
+    The chain keeps its own ``chat_history`` for single-user use (the CLI).
+    A server shares one chain between all sessions instead. It passes
+    each session's history to :meth:`query` or :meth:`stream`, and records
+    the exchange itself, so the chain holds no per-session state.
+    
+    With ``summary`` memory, all but the last exchange are folded into a
+    rolling summary after each answer. The chain does this for its own
+    history on a background thread; a server uses :attr:`summarizer` once
+    the response has been sent.
+    """
+    
+    # Exchanges kept in history
+    MAX_HISTORY = 5
     
     def __init__(
         self,
         llm: GrokLLM,
         vectorstore_manager: VectorStoreManager,
-        top_k: int = 4
+        top_k: int = 4,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        context_settings: Optional[ContextSettings] = None
     ):
         """
         Initialize RAG chain.
@@ -29,11 +58,30 @@ class RAGChain:
             llm: Grok LLM instance
             vectorstore_manager: Vector store manager
             top_k: Number of documents to retrieve
+            answer_cache: Optional semantic answer cache, may be shared between chains
+            context_settings: Prompt token budget, score threshold and history trimming
         """
         self.llm = llm
         self.vectorstore_manager = vectorstore_manager
         self.top_k = top_k
-        self.chat_history: List[Tuple[str, str]] = []
+        self.answer_cache = answer_cache
+        self.context_settings = context_settings or ContextSettings()
+        if self.context_settings.memory not in MEMORY_MODES:
+            raise ValueError(
+                f"Unknown memory mode: {self.context_settings.memory} (expected one of {', '.join(MEMORY_MODES)})"
+            )
+        self.summarizer: Optional[ConversationSummarizer] = None
+        if self.context_settings.memory == "summary":
+            self.summarizer = ConversationSummarizer(
+                llm,
+                max_summary_tokens=self.context_settings.max_summary_tokens,
+                max_entry_tokens=self.context_settings.max_history_entry_tokens
+            )
+        self.chat_history: History = []
+        self._history_lock = threading.Lock()
+        self._summary_executor: Optional[ThreadPoolExecutor] = None
+        self._summary_future: Optional[Future] = None
+        self.last_ttft: Optional[float] = None
         self.chain = self._create_chain()
     
     def _create_chain(self):
@@ -56,86 +104,182 @@ Question: {question}
 Answer: """
         
         prompt = ChatPromptTemplate.from_template(template)
+        self.context_builder = ContextBuilder(template, self.context_settings)
         
-        # Create the chain
-        chain = (
-            {
-                "context": lambda x: self._format_docs(
-                    self.vectorstore_manager.similarity_search(
-                        self._get_contextualized_question(x["question"]), 
-                        k=self.top_k
-                    )
-                ),
-                "question": RunnablePassthrough(),
-                "chat_history": lambda x: self._format_chat_history()
-            }
-            | RunnablePassthrough.assign(
-                context=lambda x: x["context"],
-                question=lambda x: x["question"],
-                chat_history=lambda x: x["chat_history"]
-            )
-            | prompt
-            | self.llm
-            | StrOutputParser()
+        # Retrieve once, then feed the same documents to the prompt and the sources
+        retrieve = RunnablePassthrough.assign(
+            docs=RunnableLambda(self._retrieve, afunc=self._aretrieve)
         )
+        format_inputs = RunnableLambda(self._format_inputs)
+        
+        # Kept separately so streaming can emit sources before generation starts,
+        # and batches can format the documents of one shared search
+        self.format_chain = format_inputs
+        self.retrieval_chain = retrieve | format_inputs
+        self.answer_chain = prompt | self.llm | StrOutputParser()
+        
+        # Output keeps the intermediate results: question, docs, context, chat_history, prompt_tokens, answer
+        chain = self.retrieval_chain | RunnablePassthrough.assign(answer=self.answer_chain)
         
         return chain
     
-    def _format_docs(self, docs: List[Document]) -> str:
-        """Format documents for context."""
-        if not docs:
-            return "No relevant context found."
+    def _format_inputs(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Pack context and history into the token budget; docs become the packed chunks."""
+        with metrics.PROMPT_BUILD_SECONDS.time():
+            packed = self.context_builder.build(inputs["question"], inputs["docs"], inputs.get("history", []))
+        return {**inputs, **packed}
+    
+    def _retrieve(self, inputs: Dict[str, Any]) -> List[Document]:
+        """Retrieve documents for the (contextualized) question."""
+        question = self._get_contextualized_question(inputs["question"], inputs.get("history", []))
+        embedding = inputs.get("query_embedding")
+        if embedding is not None:
+            hits = self.vectorstore_manager.similarity_search_with_score_by_vector(
+                embedding, k=self.top_k, query=question
+            )
+        else:
+            hits = self.vectorstore_manager.similarity_search_with_score(question, k=self.top_k)
+        return self._relevant(hits)
+    
+    async def _aretrieve(self, inputs: Dict[str, Any]) -> List[Document]:
+        """Async retrieval step: runs embedding and search off the event loop."""
+        question = self._get_contextualized_question(inputs["question"], inputs.get("history", []))
+        embedding = inputs.get("query_embedding")
+        if embedding is not None:
+            hits = await self.vectorstore_manager.asimilarity_search_with_score_by_vector(
+                embedding, k=self.top_k, query=question
+            )
+        else:
+            hits = await self.vectorstore_manager.asimilarity_search_with_score(question, k=self.top_k)
+        return self._relevant(hits)
+    
+    def _relevant(self, hits: List[Tuple[Document, Optional[float]]]) -> List[Document]:
+        """
+        Drop chunks whose vector similarity is below ``min_score``.
         
-        formatted = []
-        for i, doc in enumerate(docs, 1):
-            source = doc.metadata.get("source", "Unknown")
-            content = doc.page_content
-            formatted.append(f"[Source {i}: {source}]\n{content}")
+        Chunks found only by keyword search have no similarity and are kept.
+        """
+        min_score = self.context_settings.min_score
+        return [doc for doc, score in hits if score is None or score >= min_score]
+    
+    def _prepare(self, question: str, history: History) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """
+        Run retrieval for a question, consulting the answer cache if enabled.
+        
+        Returns:
+            Tuple of (prompt inputs, cached response or None)
+        """
+        inputs: Dict[str, Any] = {"question": question, "history": history}
+        if self.answer_cache is None:
+            return self.retrieval_chain.invoke(inputs), None
+        
+        inputs["query_embedding"] = self.vectorstore_manager.embed_query(
+            self._get_contextualized_question(question, history)
+        )
+        inputs["content_version"] = self.vectorstore_manager.content_version
+        
+        # Without history the question alone decides the answer, so skip retrieval too
+        if not history:
+            cached = self.answer_cache.lookup(inputs["query_embedding"], inputs["content_version"])
+            if cached is not None:
+                return inputs, cached
+        
+        inputs = self.retrieval_chain.invoke(inputs)
+        return inputs, self._lookup_with_docs(inputs)
+    
+    async def _aprepare(self, question: str, history: History) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Async variant of :meth:`_prepare`."""
+        inputs: Dict[str, Any] = {"question": question, "history": history}
+        if self.answer_cache is None:
+            return await self.retrieval_chain.ainvoke(inputs), None
         
-        return "\n\n---\n\n".join(formatted)
+        inputs["query_embedding"] = await self.vectorstore_manager.aembed_query(
+            self._get_contextualized_question(question, history)
+        )
+        inputs["content_version"] = self.vectorstore_manager.content_version
+        
+        if not history:
+            cached = self.answer_cache.lookup(inputs["query_embedding"], inputs["content_version"])
+            if cached is not None:
+                return inputs, cached
+        
+        inputs = await self.retrieval_chain.ainvoke(inputs)
+        return inputs, self._lookup_with_docs(inputs)
     
-    def _format_chat_history(self) -> str:
-        """Format chat history for the prompt."""
-        if not self.chat_history:
-            return "No previous conversation."
+    def _lookup_with_docs(self, inputs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """With chat history, only reuse answers built from the same chunks."""
+        if not inputs["history"]:
+            return None
         
-        formatted = []
-        for i, (question, answer) in enumerate(self.chat_history[-3:], 1):  # Last 3 exchanges
-            formatted.append(f"Q{i}: {question}\nA{i}: {answer}")
+        return self.answer_cache.lookup(
+            inputs["query_embedding"],
+            inputs["content_version"],
+            chunk_ids=[doc.id for doc in inputs["docs"]]
+        )
+    
+    def _cache_answer(self, inputs: Dict[str, Any], answer: str) -> None:
+        """Store a freshly generated answer in the answer cache."""
+        if self.answer_cache is None or "query_embedding" not in inputs:
+            return
         
-        return "\n\n".join(formatted)
+        self.answer_cache.store(
+            inputs["query_embedding"],
+            inputs["content_version"],
+            answer=answer,
+            sources=self._format_sources(inputs["docs"]),
+            chunk_ids=[doc.id for doc in inputs["docs"]]
+        )
+    
+    def _format_sources(self, docs: List[Document]) -> List[Dict[str, Any]]:
+        """Format retrieved documents as source snippets for the response (without internal metadata)."""
+        return [
+            {
+                "content": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content,
+                "metadata": {key: value for key, value in doc.metadata.items() if key != TOKEN_COUNT_KEY}
+            }
+            for doc in docs
+        ]
     
-    def _get_contextualized_question(self, question: str) -> str:
+    def _get_contextualized_question(self, question: str, history: History) -> str:
         """Get contextualized question based on chat history for better retrieval."""
-        if not self.chat_history:
+        _, exchanges = split_summary(history)
+        if not exchanges:
             return question
         
         # For follow-up questions, combine with context from previous question
         # This helps with pronouns like "it", "that", "this", etc.
-        last_q, last_a = self.chat_history[-1]
+        last_q, last_a = exchanges[-1]
         
         # Check if question seems like a follow-up (contains pronouns or is very short)
         follow_up_indicators = ["it", "this", "that", "they", "them", "what about", "how about", "and"]
         is_follow_up = any(indicator in question.lower() for indicator in follow_up_indicators) or len(question.split()) < 5
         
         if is_follow_up:
-            # Combine context for better retrieval
-            return f"{last_q} {question}"
+            # Combine context for better retrieval; a long previous question is trimmed
+            return f"{truncate_tokens(last_q, self.context_settings.max_history_entry_tokens)} {question}"
         
         return question
     
     def clear_history(self) -> None:
         """Clear conversation history."""
-        self.chat_history.clear()
+        with self._history_lock:
+            self.chat_history.clear()
         logger.info("Chat history cleared")
     
-    def query(self, question: str, maintain_history: bool = True) -> Dict[str, Any]:
+    def query(
+        self,
+        question: str,
+        maintain_history: bool = True,
+        history: Optional[History] = None
+    ) -> Dict[str, Any]:
         """
         Query the RAG system.
         
         Args:
             question: User question
             maintain_history: Whether to add this exchange to chat history
+            history: Conversation to continue instead of the chain's own; the
+                caller then records the exchange (the chain never modifies it)
             
         Returns:
             Dictionary with answer and retrieved documents
@@ -143,55 +287,410 @@ Answer: """
         if not self.vectorstore_manager.is_initialized():
             return {
                 "answer": "Error: Vector store not initialized. Please ingest documents first.",
-                "sources": []
+                "sources": [],
+                "error": True
             }
         
         try:
-            # Retrieve relevant documents using contextualized question
-            contextualized_q = self._get_contextualized_question(question)
-            relevant_docs = self.vectorstore_manager.similarity_search(
-                contextualized_q, k=self.top_k
-            )
+            # Retrieve once and reuse the documents for the prompt and the sources
+            inputs, cached = self._prepare(question, self.chat_history if history is None else history)
+            if cached is not None:
+                self._record_exchange(question, cached["answer"], maintain_history and history is None)
+                return cached
             
-            # Generate answer
-            answer = self.chain.invoke({"question": question})
-            
-            # Add to history if requested
-            if maintain_history:
-                self.chat_history.append((question, answer))
-                # Keep only last 5 exchanges to manage context size
-                if len(self.chat_history) > 5:
-                    self.chat_history = self.chat_history[-5:]
-            
-            # Extract sources
-            sources = [
-                {
-                    "content": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content,
-                    "metadata": doc.metadata
-                }
-                for doc in relevant_docs
-            ]
+            with metrics.LLM_SECONDS.time():
+                answer = self.answer_chain.invoke(inputs)
+            self._cache_answer(inputs, answer)
+            return self._build_response(question, {**inputs, "answer": answer}, maintain_history and history is None)
             
+        except Exception as e:
+            logger.error(f"Error during query: {e}")
+            metrics.ERRORS.labels("query").inc()
             return {
-                "answer": answer,
-                "sources": sources
+                "answer": f"Error processing query: {str(e)}",
+                "sources": [],
+                "error": True
             }
+    
+    async def aquery(
+        self,
+        question: str,
+        maintain_history: bool = True,
+        history: Optional[History] = None
+    ) -> Dict[str, Any]:
+        """
+        Query the RAG system without blocking the event loop.
+        
+        Retrieval runs on the vector store's bounded thread pool and the LLM
+        call uses its native async client.
+        
+        Args:
+            question: User question
+            maintain_history: Whether to add this exchange to chat history
+            history: Conversation to continue instead of the chain's own; the
+                caller then records the exchange (the chain never modifies it)
+            
+        Returns:
+            Dictionary with answer and retrieved documents
+        """
+        if not self.vectorstore_manager.is_initialized():
+            return {
+                "answer": "Error: Vector store not initialized. Please ingest documents first.",
+                "sources": [],
+                "error": True
+            }
+        
+        try:
+            inputs, cached = await self._aprepare(question, self.chat_history if history is None else history)
+            if cached is not None:
+                self._record_exchange(question, cached["answer"], maintain_history and history is None)
+                return cached
+            
+            with metrics.LLM_SECONDS.time():
+                answer = await self.answer_chain.ainvoke(inputs)
+            self._cache_answer(inputs, answer)
+            return self._build_response(question, {**inputs, "answer": answer}, maintain_history and history is None)
             
         except Exception as e:
             logger.error(f"Error during query: {e}")
+            metrics.ERRORS.labels("query").inc()
             return {
                 "answer": f"Error processing query: {str(e)}",
-                "sources": []
+                "sources": [],
+                "error": True
             }
     
-    def batch_query(self, questions: List[str]) -> List[Dict[str, Any]]:
+    def stream(
+        self,
+        question: str,
+        maintain_history: bool = True,
+        history: Optional[History] = None
+    ) -> Iterator[Dict[str, Any]]:
         """
-        Process multiple queries.
+        Stream a RAG answer as events.
+        
+        Yields a ``sources`` event once retrieval finishes, then one ``token``
+        event per answer chunk, then a ``done`` event carrying the full answer
+        and timings. The exchange is added to chat history only after the
+        answer has been fully generated.
+        
+        Args:
+            question: User question
+            maintain_history: Whether to add this exchange to chat history
+            history: Conversation to continue instead of the chain's own; the
+                caller then records the exchange (the chain never modifies it)
+            
+        Yields:
+            Event dictionaries with a ``type`` key
+        """
+        if not self.vectorstore_manager.is_initialized():
+            yield {"type": "error", "message": "Vector store not initialized. Please ingest documents first."}
+            return
+        
+        start = time.perf_counter()
+        try:
+            inputs, cached = self._prepare(question, self.chat_history if history is None else history)
+            if cached is not None:
+                yield {"type": "sources", "sources": cached["sources"]}
+                yield {"type": "token", "content": cached["answer"]}
+                yield self._finish_stream(
+                    question, cached["answer"], time.perf_counter() - start, start, maintain_history and history is None
+                )
+                return
+            
+            yield {"type": "sources", "sources": self._format_sources(inputs["docs"])}
+            
+            chunks = []
+            ttft = None
+            llm_start = time.perf_counter()
+            for chunk in self.answer_chain.stream(inputs):
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                    metrics.TTFT_SECONDS.observe(ttft)
+                chunks.append(chunk)
+                yield {"type": "token", "content": chunk}
+            metrics.LLM_SECONDS.observe(time.perf_counter() - llm_start)
+            
+            answer = "".join(chunks)
+            self._cache_answer(inputs, answer)
+            yield self._finish_stream(
+                question, answer, ttft, start, maintain_history and history is None, inputs["prompt_tokens"]
+            )
+            
+        except Exception as e:
+            logger.error(f"Error during streaming query: {e}")
+            metrics.ERRORS.labels("stream").inc()
+            yield {"type": "error", "message": f"Error processing query: {str(e)}"}
+    
+    async def astream(
+        self,
+        question: str,
+        maintain_history: bool = True,
+        history: Optional[History] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async variant of :meth:`stream` for the API.
+        
+        Args:
+            question: User question
+            maintain_history: Whether to add this exchange to chat history
+            history: Conversation to continue instead of the chain's own; the
+                caller then records the exchange (the chain never modifies it)
+            
+        Yields:
+            Event dictionaries with a ``type`` key
+        """
+        if not self.vectorstore_manager.is_initialized():
+            yield {"type": "error", "message": "Vector store not initialized. Please ingest documents first."}
+            return
+        
+        start = time.perf_counter()
+        try:
+            inputs, cached = await self._aprepare(question, self.chat_history if history is None else history)
+            if cached is not None:
+                yield {"type": "sources", "sources": cached["sources"]}
+                yield {"type": "token", "content": cached["answer"]}
+                yield self._finish_stream(
+                    question, cached["answer"], time.perf_counter() - start, start, maintain_history and history is None
+                )
+                return
+            
+            yield {"type": "sources", "sources": self._format_sources(inputs["docs"])}
+            
+            chunks = []
+            ttft = None
+            llm_start = time.perf_counter()
+            async for chunk in self.answer_chain.astream(inputs):
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                    metrics.TTFT_SECONDS.observe(ttft)
+                chunks.append(chunk)
+                yield {"type": "token", "content": chunk}
+            metrics.LLM_SECONDS.observe(time.perf_counter() - llm_start)
+            
+            answer = "".join(chunks)
+            self._cache_answer(inputs, answer)
+            yield self._finish_stream(
+                question, answer, ttft, start, maintain_history and history is None, inputs["prompt_tokens"]
+            )
+            
+        except Exception as e:
+            logger.error(f"Error during streaming query: {e}")
+            metrics.ERRORS.labels("stream").inc()
+            yield {"type": "error", "message": f"Error processing query: {str(e)}"}
+    
+    def _finish_stream(
+        self,
+        question: str,
+        answer: str,
+        ttft: Optional[float],
+        start: float,
+        maintain_history: bool,
+        prompt_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Commit a completed stream to history and build the final event."""
+        total = time.perf_counter() - start
+        self.last_ttft = ttft
+        logger.info(
+            f"Streamed answer: ttft={ttft * 1000 if ttft is not None else 0:.0f}ms "
+            f"total={total * 1000:.0f}ms prompt_tokens={prompt_tokens}"
+        )
+        self._record_exchange(question, answer, maintain_history)
+        return {
+            "type": "done",
+            "answer": answer,
+            "ttft_ms": round(ttft * 1000, 1) if ttft is not None else None,
+            "total_ms": round(total * 1000, 1),
+            "prompt_tokens": prompt_tokens
+        }
+    
+    def _build_response(
+        self,
+        question: str,
+        result: Dict[str, Any],
+        maintain_history: bool
+    ) -> Dict[str, Any]:
+        """Record the exchange and shape the chain output into a response."""
+        answer = result["answer"]
+        self._record_exchange(question, answer, maintain_history)
+        
+        return {
+            "answer": answer,
+            "sources": self._format_sources(result["docs"]),
+            "prompt_tokens": result["prompt_tokens"]
+        }
+    
+    def _record_exchange(self, question: str, answer: str, maintain_history: bool) -> None:
+        """Add an exchange to the chain's own chat history if requested."""
+        if not maintain_history:
+            return
+        
+        with self._history_lock:
+            self.chat_history.append((question, answer))
+            # Keep only the last exchanges (and the rolling summary) to manage context size
+            self.chat_history = trim_history(self.chat_history, self.MAX_HISTORY)
+        
+        if self.summarizer is not None:
+            # Summarized after the answer is returned, one update at a time
+            if self._summary_executor is None:
+                self._summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-summary")
+            self._summary_future = self._summary_executor.submit(self._summarize_history)
+    
+    def _summarize_history(self) -> None:
+        """Fold the chain's own history into its rolling summary."""
+        with self._history_lock:
+            history = list(self.chat_history)
+        try:
+            summarized = self.summarizer.summarize(history)
+        except Exception as e:
+            logger.warning(f"Could not update the conversation summary: {e}")
+            metrics.ERRORS.labels("summary").inc()
+            return
+        if summarized is None:
+            return
+        
+        folded, entry = summarized
+        with self._history_lock:
+            # Cleared or trimmed meanwhile: the summary no longer describes the oldest entries
+            if self.chat_history[:len(folded)] != folded:
+                return
+            self.chat_history = [entry] + self.chat_history[len(folded):]
+    
+    def wait_for_summary(self, timeout: Optional[float] = None) -> None:
+        """Block until the pending update of the chain's own summary, if any, has finished."""
+        future = self._summary_future
+        if future is not None:
+            future.result(timeout)
+    
+    def _split_cached(
+        self,
+        questions: List[str],
+        embeddings: np.ndarray
+    ) -> Tuple[List[Dict[str, Any]], List[Optional[Dict[str, Any]]]]:
+        """
+        Build standalone inputs for a batch and look each question up in the answer cache.
+        
+        Returns:
+            Tuple of (inputs per question, cached response or None per question)
+        """
+        content_version = self.vectorstore_manager.content_version
+        inputs = [
+            {"question": question, "history": [], "query_embedding": embedding, "content_version": content_version}
+            for question, embedding in zip(questions, embeddings)
+        ]
+        if self.answer_cache is None:
+            return inputs, [None] * len(questions)
+        return inputs, [self.answer_cache.lookup(embedding, content_version) for embedding in embeddings]
+    
+    def _batch_results(
+        self,
+        inputs: List[Dict[str, Any]],
+        cached: List[Optional[Dict[str, Any]]],
+        answers: List[Any]
+    ) -> List[Dict[str, Any]]:
+        """Merge cached responses with generated answers (or per-question errors), in question order."""
+        generated = iter(answers)
+        results = []
+        for item, hit in zip(inputs, cached):
+            if hit is not None:
+                results.append(hit)
+                continue
+            answer = next(generated)
+            if isinstance(answer, Exception):
+                logger.error(f"Error during batch query: {answer}")
+                metrics.ERRORS.labels("batch").inc()
+                results.append({"answer": f"Error processing query: {str(answer)}", "sources": [], "error": True})
+                continue
+            self._cache_answer(item, answer)
+            results.append({
+                "answer": answer,
+                "sources": self._format_sources(item["docs"]),
+                "prompt_tokens": item["prompt_tokens"]
+            })
+        return results
+    
+    @staticmethod
+    def _batch_error(questions: List[str], message: str) -> List[Dict[str, Any]]:
+        """The same error result for every question of a batch."""
+        return [{"answer": message, "sources": [], "error": True} for _ in questions]
+    
+    def batch_query(self, questions: List[str], max_concurrency: int = 4) -> List[Dict[str, Any]]:
+        """
+        Answer a batch of independent questions.
+        
+        All questions are embedded in one call and searched as one matrix,
+        then up to ``max_concurrency`` LLM calls run at a time. Each question
+        is answered on its own: no history is read or recorded.
+        
+        Args:
+            questions: List of questions
+            max_concurrency: LLM calls in flight at once
+            
+        Returns:
+            List of results, in question order
+        """
+        if not questions:
+            return []
+        if not self.vectorstore_manager.is_initialized():
+            return self._batch_error(questions, "Error: Vector store not initialized. Please ingest documents first.")
+        
+        try:
+            embeddings = self.vectorstore_manager.embed_queries(questions)
+            inputs, cached = self._split_cached(questions, embeddings)
+            pending = [i for i, hit in enumerate(cached) if hit is None]
+            hit_lists = self.vectorstore_manager.similarity_search_with_score_by_vectors(
+                embeddings[pending], k=self.top_k, queries=[questions[i] for i in pending]
+            )
+            for i, hits in zip(pending, hit_lists):
+                inputs[i] = self.format_chain.invoke({**inputs[i], "docs": self._relevant(hits)})
+        except Exception as e:
+            logger.error(f"Error during batch retrieval: {e}")
+            metrics.ERRORS.labels("batch").inc(len(questions))
+            return self._batch_error(questions, f"Error processing query: {str(e)}")
+        
+        answers = self.answer_chain.batch(
+            [inputs[i] for i in pending],
+            config={"max_concurrency": max(1, max_concurrency)},
+            return_exceptions=True
+        )
+        return self._batch_results(inputs, cached, answers)
+    
+    async def abatch_query(self, questions: List[str], max_concurrency: int = 4) -> List[Dict[str, Any]]:
+        """
+        Async variant of :meth:`batch_query` for the API.
+        
+        Embedding and search run on the vector store's bounded thread pool
+        and the LLM calls use the native async client.
         
         Args:
             questions: List of questions
+            max_concurrency: LLM calls in flight at once
             
         Returns:
-            List of results
+            List of results, in question order
         """
-        return [self.query(q) for q in questions]
+        if not questions:
+            return []
+        if not self.vectorstore_manager.is_initialized():
+            return self._batch_error(questions, "Error: Vector store not initialized. Please ingest documents first.")
+        
+        try:
+            embeddings = await self.vectorstore_manager.aembed_queries(questions)
+            inputs, cached = self._split_cached(questions, embeddings)
+            pending = [i for i, hit in enumerate(cached) if hit is None]
+            hit_lists = await self.vectorstore_manager.asimilarity_search_with_score_by_vectors(
+                embeddings[pending], k=self.top_k, queries=[questions[i] for i in pending]
+            )
+            for i, hits in zip(pending, hit_lists):
+                inputs[i] = self.format_chain.invoke({**inputs[i], "docs": self._relevant(hits)})
+        except Exception as e:
+            logger.error(f"Error during batch retrieval: {e}")
+            metrics.ERRORS.labels("batch").inc(len(questions))
+            return self._batch_error(questions, f"Error processing query: {str(e)}")
+        
+        answers = await self.answer_chain.abatch(
+            [inputs[i] for i in pending],
+            config={"max_concurrency": max(1, max_concurrency)},
+            return_exceptions=True
+        )
+        return self._batch_results(inputs, cached, answers)
@@ -0,0 +1,210 @@
+"""Minimal pipelining client for the Redis protocol (RESP2)."""
+
+import socket
+import logging
+import threading
+from typing import Any, Callable, List, Optional, Sequence
+from urllib.parse import unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class RedisError(Exception):
+    """Error reply from the server."""
+
+
+class _Connection:
+    def __init__(self, host: str, port: int, timeout: float):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+
+    def send(self, commands: Sequence[Sequence[Any]]) -> None:
+        self.sock.sendall(b"".join(_encode(command) for command in commands))
+
+    def read_reply(self) -> Any:
+        line = self.reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            return RedisError(payload.decode("utf-8"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Connection closed by server")
+            return data[:-2]
+        if kind == b"*":
+            count = int(payload)
+            return None if count < 0 else [self.read_reply() for _ in range(count)]
+        raise ConnectionError(f"Unexpected reply from server: {line!r}")
+
+    def close(self) -> None:
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def _raise_errors(replies: Sequence[Any]) -> None:
+    for reply in replies:
+        if isinstance(reply, RedisError):
+            raise reply
+
+
+def _encode(command: Sequence[Any]) -> bytes:
+    parts = [b"*%d\r\n" % len(command)]
+    for arg in command:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, str):
+            data = arg.encode("utf-8")
+        else:
+            data = repr(arg).encode("ascii") if isinstance(arg, float) else str(arg).encode("ascii")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+class RedisClient:
+    """
+    Thread-safe client speaking the Redis protocol, with a small connection pool.
+
+    :meth:`pipeline` sends a batch of commands in one write and reads all
+    replies back, so a batch costs a single network round trip. Works with
+    Redis and protocol-compatible servers (Valkey, KeyDB, Dragonfly).
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", timeout: float = 5.0, max_idle: int = 8):
+        """
+        Initialize RedisClient. Connections are opened on first use.
+
+        Args:
+            url: redis://[:password@]host[:port][/db]
+            timeout: Socket timeout in seconds
+            max_idle: Idle connections kept for reuse
+        """
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported Redis URL scheme: {parsed.scheme!r}")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle: List[_Connection] = []
+        self._lock = threading.Lock()
+
+    def execute(self, *command: Any) -> Any:
+        """Run one command and return its reply."""
+        return self.pipeline([command])[0]
+
+    def pipeline(self, commands: Sequence[Sequence[Any]]) -> List[Any]:
+        """
+        Run commands in one round trip.
+
+        Returns:
+            Replies in command order
+
+        Raises:
+            RedisError: If any command failed (after all replies were read)
+        """
+        connection = self._acquire()
+        try:
+            connection.send(commands)
+            replies = [connection.read_reply() for _ in commands]
+        except (OSError, ValueError):
+            connection.close()
+            raise
+        self._release(connection)
+
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    def transaction(
+        self,
+        keys: Sequence[str],
+        reads: Sequence[Sequence[Any]],
+        write: Callable[[List[Any]], Optional[Sequence[Sequence[Any]]]]
+    ) -> Optional[List[Any]]:
+        """
+        Optimistic transaction (WATCH, MULTI, EXEC) in two round trips.
+
+        ``reads`` run once ``keys`` are watched. ``write`` turns their
+        replies into the commands to commit, or None to commit nothing. The
+        server drops the commit if another client changed a watched key in
+        between.
+
+        Returns:
+            The committed commands' replies, or None if nothing was committed
+
+        Raises:
+            RedisError: If any command failed
+        """
+        connection = self._acquire()
+        try:
+            connection.send([("WATCH", *keys), *reads])
+            replies = [connection.read_reply() for _ in range(len(reads) + 1)]
+            _raise_errors(replies)
+            commands = write(replies[1:])
+            if commands is None:
+                connection.send([("UNWATCH",)])
+                _raise_errors([connection.read_reply()])
+                result = None
+            else:
+                batch = [("MULTI",), *commands, ("EXEC",)]
+                connection.send(batch)
+                queued = [connection.read_reply() for _ in batch]
+                _raise_errors(queued[:-1])
+                result = queued[-1]
+        except BaseException:
+            # The connection may still be watching or inside MULTI
+            connection.close()
+            raise
+        self._release(connection)
+
+        _raise_errors(result or [])
+        return result
+
+    def _acquire(self) -> _Connection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        connection = _Connection(self.host, self.port, self.timeout)
+        setup = []
+        if self.password is not None:
+            setup.append(("AUTH", self.username, self.password) if self.username else ("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            connection.send(setup)
+            for reply in [connection.read_reply() for _ in setup]:
+                if isinstance(reply, RedisError):
+                    connection.close()
+                    raise reply
+        return connection
+
+    def _release(self, connection: _Connection) -> None:
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def close(self) -> None:
+        """Close idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
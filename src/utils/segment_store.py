@@ -0,0 +1,360 @@
+"""Incremental, append-only persistence for the FAISS vector store."""
+
+import os
+import json
+import shutil
+import itertools
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+
+from src.utils.chunk_store import ChunkStore, read_pickled_docstore
+from src.utils.lexical_index import LexicalIndex
+from src.utils.vector_index import VectorIndex, read_index
+
+logger = logging.getLogger(__name__)
+
+
+def _fsync_dir(path: Path) -> None:
+    """Flush directory entries so renames survive a crash (no-op where unsupported)."""
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write a file via a temp file, fsync and rename."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def remap_positions(positions: Iterable[int], removed: np.ndarray) -> List[int]:
+    """
+    Shift positions down past removed ones (which are dropped).
+
+    Args:
+        positions: Positions before compaction
+        removed: Sorted positions left out of the compacted snapshot
+
+    Returns:
+        Surviving positions in the new numbering
+    """
+    removed_set = set(int(r) for r in removed)
+    return [
+        int(p) - int(np.searchsorted(removed, p))
+        for p in positions
+        if int(p) not in removed_set
+    ]
+
+
+class MigrationRequiredError(RuntimeError):
+    """The vector store still uses the pickled docstore format."""
+
+
+class SegmentStore:
+    """
+    On-disk layout made of a compacted base snapshot plus append-only segments.
+
+    Layout under ``root``::
+
+        manifest.json            # committed state, replaced atomically
+        base-000003/index.faiss  # last compacted snapshot, opened memory-mapped
+        base-000003/chunks.bin   # its chunks, see ChunkStore
+        base-000003/chunks.idx
+        base-000003/lexical.*    # BM25 postings of its chunks, see LexicalIndex
+        segments/000004.npy      # vectors appended since the snapshot
+        segments/000004.jsonl    # write-ahead log of the matching chunks
+
+    Appending a batch writes one segment pair and then a new manifest, so an
+    ingest costs time proportional to the batch. Deletions are recorded in
+    the manifest as tombstoned positions (base positions first, then
+    segment rows in replay order) until compaction drops them. Files not
+    referenced by the manifest are leftovers from an interrupted write and
+    are ignored.
+
+    Directories written before the chunk store existed (``index.faiss`` and
+    a pickled ``index.pkl`` docstore) are never unpickled on load; convert
+    them once with ``migrate``.
+    """
+
+    MANIFEST_NAME = "manifest.json"
+    FORMAT_VERSION = 1
+
+    def __init__(self, root: Path):
+        """
+        Initialize SegmentStore.
+
+        Args:
+            root: Vector store directory
+        """
+        self.root = root
+        self.segments_dir = root / "segments"
+        self._lock = threading.Lock()
+        self._manifest = self._read_manifest()
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        manifest_path = self.root / self.MANIFEST_NAME
+        if manifest_path.exists():
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        # Legacy layout: a single save_local snapshot at the root
+        base = "." if (self.root / "index.faiss").exists() else None
+        return {"format": self.FORMAT_VERSION, "sequence": 0, "base": base, "segments": [], "tombstones": []}
+
+    def _commit_manifest(self, manifest: Dict[str, Any]) -> None:
+        """Atomically replace the manifest. Caller holds the lock."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        _atomic_write_bytes(
+            self.root / self.MANIFEST_NAME,
+            json.dumps(manifest, indent=2).encode("utf-8")
+        )
+        _fsync_dir(self.root)
+        self._manifest = manifest
+
+    def _next_name(self, manifest: Dict[str, Any]) -> str:
+        manifest["sequence"] += 1
+        return f"{manifest['sequence']:06d}"
+
+    def exists(self) -> bool:
+        """Whether anything has been committed to this store."""
+        return self._manifest["base"] is not None or bool(self._manifest["segments"])
+
+    def needs_migration(self) -> bool:
+        """Whether the base snapshot still uses the pickled docstore."""
+        base_dir = self.base_dir
+        return base_dir is not None and not ChunkStore.exists(base_dir)
+
+    @property
+    def pending_segments(self) -> List[str]:
+        """Segments appended since the last compaction."""
+        return list(self._manifest["segments"])
+
+    @property
+    def tombstones(self) -> List[int]:
+        """Deleted positions not yet compacted away."""
+        return list(self._manifest.get("tombstones", []))
+
+    @property
+    def base_dir(self) -> Optional[Path]:
+        """Directory of the committed base snapshot, if any."""
+        base = self._manifest["base"]
+        return self.root / base if base is not None else None
+
+    def load(self, mmap: bool = True) -> Optional[VectorIndex]:
+        """
+        Open the base snapshot and replay committed segments.
+
+        Args:
+            mmap: Memory-map the base index instead of reading it into RAM
+
+        Returns:
+            VectorIndex, or None if nothing has been committed
+
+        Raises:
+            MigrationRequiredError: If the base snapshot has not been migrated
+        """
+        manifest = self._manifest
+        if not self.exists():
+            return None
+        if self.needs_migration():
+            raise MigrationRequiredError(
+                f"{self.root} uses the old pickled docstore; run 'python rag_app.py migrate' to convert it"
+            )
+
+        vector_index = VectorIndex.open(self.base_dir, mmap=mmap) if self.base_dir is not None else None
+
+        for name in manifest["segments"]:
+            vectors = np.load(self.segments_dir / f"{name}.npy")
+            with open(self.segments_dir / f"{name}.jsonl", "r", encoding="utf-8") as f:
+                documents = [
+                    Document(id=r["id"], page_content=r["page_content"], metadata=r["metadata"])
+                    for r in map(json.loads, f)
+                ]
+
+            if vector_index is None:
+                vector_index = VectorIndex(vectors.shape[1])
+            vector_index = vector_index.with_added(vectors, documents)
+
+        if manifest["segments"]:
+            logger.info(f"Replayed {len(manifest['segments'])} segment(s) from {self.root}")
+        if vector_index is not None:
+            vector_index = vector_index.with_deleted(manifest.get("tombstones", []))
+        return vector_index
+
+    def append(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        vectors: np.ndarray
+    ) -> str:
+        """
+        Durably append a batch of chunks as a new segment.
+
+        Args:
+            ids: Docstore ids of the chunks
+            texts: Chunk texts
+            metadatas: Chunk metadata
+            vectors: Chunk embeddings, shape (n, dim)
+
+        Returns:
+            Segment name
+        """
+        with self._lock:
+            manifest = json.loads(json.dumps(self._manifest))
+            name = self._next_name(manifest)
+            self.segments_dir.mkdir(parents=True, exist_ok=True)
+
+            lines = "".join(
+                json.dumps({"id": i, "page_content": t, "metadata": m}) + "\n"
+                for i, t, m in zip(ids, texts, metadatas)
+            )
+            _atomic_write_bytes(self.segments_dir / f"{name}.jsonl", lines.encode("utf-8"))
+
+            tmp_vectors = self.segments_dir / f"{name}.npy.tmp"
+            with open(tmp_vectors, "wb") as f:
+                np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_vectors, self.segments_dir / f"{name}.npy")
+            _fsync_dir(self.segments_dir)
+
+            manifest["segments"].append(name)
+            self._commit_manifest(manifest)
+
+        logger.info(f"Appended segment {name} with {len(ids)} chunks")
+        return name
+
+    def add_tombstones(self, positions: Iterable[int]) -> None:
+        """
+        Durably mark positions as deleted.
+
+        Args:
+            positions: Positions as seen by the loaded VectorIndex
+        """
+        with self._lock:
+            manifest = json.loads(json.dumps(self._manifest))
+            manifest["tombstones"] = sorted(set(manifest.get("tombstones", [])) | {int(p) for p in positions})
+            self._commit_manifest(manifest)
+
+    def write_base(
+        self,
+        index: faiss.Index,
+        documents: Iterable[Document],
+        covered_segments: List[str],
+        source_chunks: Optional[ChunkStore] = None,
+        keep: Optional[np.ndarray] = None,
+        removed: Optional[np.ndarray] = None,
+        source_lexical: Optional[LexicalIndex] = None
+    ) -> Path:
+        """
+        Write a compacted snapshot and drop the segments it already contains.
+
+        The snapshot is written to a fresh directory and only becomes visible
+        when the manifest is replaced, so a crash mid-write leaves the previous
+        state intact. Segments appended after the snapshot was taken are kept.
+
+        Args:
+            index: Complete FAISS index for the snapshot (not mutated concurrently)
+            documents: Chunks for the index positions after those of ``source_chunks``
+            covered_segments: Segments whose chunks are included in the snapshot
+            source_chunks: Existing chunk store to copy first, byte for byte
+            keep: Sorted positions of ``source_chunks`` to copy (default: all)
+            removed: Sorted tombstoned positions left out of the snapshot. Other
+                tombstones (added meanwhile) are shifted to the new numbering.
+                None means the snapshot replaces everything and clears tombstones.
+            source_lexical: Lexical index of ``source_chunks``, renumbered instead
+                of re-tokenizing the copied chunks
+
+        Returns:
+            Directory of the new snapshot
+        """
+        with self._lock:
+            manifest = json.loads(json.dumps(self._manifest))
+            base_name = f"base-{self._next_name(manifest)}"
+            # Reserve the sequence number before releasing the lock for the slow write
+            self._commit_manifest(manifest)
+
+        documents = list(documents)
+        base_dir = self.root / base_name
+        base_dir.mkdir(parents=True, exist_ok=True)
+        faiss.write_index(index, str(base_dir / "index.faiss"))
+        count = ChunkStore.write(base_dir, documents, source=source_chunks, keep=keep)
+        if count != index.ntotal:
+            raise RuntimeError(f"Snapshot has {index.ntotal} vectors but {count} chunks")
+        if source_chunks is not None and source_lexical is None:
+            # No postings to copy: tokenize the copied chunks too
+            copied = source_chunks.iter_documents() if keep is None else source_chunks.get_many([int(p) for p in keep])
+            LexicalIndex.write(base_dir, itertools.chain(copied, documents))
+        else:
+            LexicalIndex.write(base_dir, documents, source=source_lexical, keep=keep)
+        _fsync_dir(base_dir)
+
+        with self._lock:
+            manifest = json.loads(json.dumps(self._manifest))
+            old_base = manifest["base"]
+            manifest["base"] = base_name
+            manifest["segments"] = [s for s in manifest["segments"] if s not in covered_segments]
+            manifest["tombstones"] = (
+                remap_positions(manifest.get("tombstones", []), removed) if removed is not None else []
+            )
+            self._commit_manifest(manifest)
+
+        self._remove_files(old_base, covered_segments)
+        logger.info(f"Compacted vector store into {base_name}")
+        return base_dir
+
+    def migrate(self) -> int:
+        """
+        Convert a pickled-docstore snapshot into the chunk store format.
+
+        The FAISS index is kept as is and chunk ids are preserved; pending
+        segments are left for the next compaction. The old files are removed
+        only after the new snapshot has been committed.
+
+        Returns:
+            Number of chunks migrated (0 if the store was already up to date)
+        """
+        if not self.needs_migration():
+            return 0
+
+        base_dir = self.base_dir
+        index = read_index(base_dir / "index.faiss", mmap=False)
+        documents = read_pickled_docstore(base_dir)
+        logger.info(f"Migrating {len(documents)} chunks in {base_dir} to the chunk store format")
+        self.write_base(index, documents, covered_segments=[])
+        return len(documents)
+
+    def _remove_files(self, old_base: Optional[str], segments: List[str]) -> None:
+        """Delete files no longer referenced by the manifest."""
+        # Files may still be memory-mapped by this or another process; where the
+        # OS refuses to delete them they are simply left behind, unreferenced.
+        try:
+            if old_base == ".":
+                for legacy in ("index.faiss", "index.pkl"):
+                    (self.root / legacy).unlink(missing_ok=True)
+            elif old_base is not None:
+                shutil.rmtree(self.root / old_base, ignore_errors=True)
+        except OSError as e:
+            logger.warning(f"Could not remove old snapshot {old_base}: {e}")
+
+        for name in segments:
+            for suffix in (".npy", ".jsonl"):
+                (self.segments_dir / f"{name}{suffix}").unlink(missing_ok=True)
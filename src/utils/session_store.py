@@ -0,0 +1,612 @@
+"""Conversation session stores: in-memory, SQLite and Redis-protocol backends."""
+
+import json
+import math
+import time
+import uuid
+import logging
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.utils import metrics
+from src.utils.context_builder import SUMMARY_MARKER, split_summary, trim_history
+from src.utils.redis_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+# A conversation: (question, answer) pairs, oldest first
+History = List[Tuple[str, str]]
+
+SESSION_BACKENDS = ("memory", "sqlite", "redis")
+
+
+class SessionStore(ABC):
+    """
+    Conversation history per session, bounded in count, age and length.
+
+    A session is only its last ``max_history`` (question, answer) pairs,
+    after the rolling summary if summary memory keeps one (the summary is
+    never trimmed away), so one shared RAGChain can serve every session. Sessions idle for
+    longer than ``ttl_seconds`` expire (0 disables expiry), and creating a
+    session beyond ``max_sessions`` evicts the least recently used one.
+
+    The in-memory store serves one process. The SQLite and Redis stores
+    are shared, so any API worker or node can continue any session.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 3600, max_history: int = 5):
+        """
+        Initialize the store.
+
+        Args:
+            max_sessions: Maximum number of live sessions
+            ttl_seconds: Idle time after which a session expires (0 means no expiry)
+            max_history: Exchanges kept per session
+        """
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_seconds = ttl_seconds
+        self.max_history = max(1, max_history)
+
+    def create(self) -> str:
+        """Start a new, empty session and return its id."""
+        session_id = str(uuid.uuid4())
+        self._create(session_id)
+        metrics.SESSIONS_CREATED.inc()
+        logger.info(f"Created new session: {session_id}")
+        return session_id
+
+    @abstractmethod
+    def _create(self, session_id: str) -> None:
+        """Insert an empty session, evicting the least recently used beyond the limit."""
+
+    @abstractmethod
+    def get_history(self, session_id: str) -> Optional[History]:
+        """
+        A session's history, marking the session as used.
+
+        Returns:
+            The history, or None if the session does not exist or has expired
+        """
+
+    @abstractmethod
+    def append(self, session_id: str, question: str, answer: str) -> None:
+        """
+        Record an exchange, trimming the history to ``max_history`` exchanges.
+
+        A rolling summary at the start of the history is always kept.
+
+        A session evicted while its query was running is recreated, so the
+        exchange is not lost.
+        """
+
+    @abstractmethod
+    def fold_history(self, session_id: str, folded: History, entry: Tuple[str, str]) -> bool:
+        """
+        Replace the oldest entries of a session, ``folded``, with one entry.
+
+        Summary memory stores its rolling summary this way once the older
+        exchanges have been summarized. The fold is a compare-and-set: it
+        only happens if the history still starts with exactly ``folded``,
+        so a history trimmed or cleared while the summary was written is
+        left alone. Exchanges appended meanwhile stay after the entry.
+        ``folded`` must leave at least the newest exchange out. The session
+        is not marked as used.
+
+        Returns:
+            False if the session does not exist or no longer starts with ``folded``
+        """
+
+    @abstractmethod
+    def clear(self, session_id: str) -> bool:
+        """Empty a session's history. Returns False if the session does not exist."""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Remove a session. Returns False if it did not exist."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, float]:
+        """Live session count and created/evicted/expired counters."""
+
+    def __len__(self) -> int:
+        return int(self.stats()["active"])
+
+    def close(self) -> None:
+        """Release connections held by the store."""
+
+
+@dataclass
+class _Session:
+    history: History = field(default_factory=list)
+    last_access: float = 0.0
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Sessions in a process-local ordered dict.
+
+    Entries are kept in access order, so expiry and LRU eviction only
+    look at the oldest sessions.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 10000,
+        ttl_seconds: float = 3600,
+        max_history: int = 5,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize InMemorySessionStore.
+
+        Args:
+            max_sessions: Maximum number of live sessions
+            ttl_seconds: Idle time after which a session expires (0 means no expiry)
+            max_history: Exchanges kept per session
+            clock: Monotonic time source
+        """
+        super().__init__(max_sessions, ttl_seconds, max_history)
+        self._clock = clock
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._evicted = 0
+        self._expired = 0
+
+    def _create(self, session_id: str) -> None:
+        with self._lock:
+            self._insert(session_id, _Session())
+
+    def get_history(self, session_id: str) -> Optional[History]:
+        with self._lock:
+            session = self._touch(session_id)
+            return list(session.history) if session is not None else None
+
+    def append(self, session_id: str, question: str, answer: str) -> None:
+        with self._lock:
+            session = self._touch(session_id)
+            if session is None:
+                session = _Session()
+                self._insert(session_id, session)
+            session.history.append((question, answer))
+            session.history[:] = trim_history(session.history, self.max_history)
+
+    def fold_history(self, session_id: str, folded: History, entry: Tuple[str, str]) -> bool:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session.history[:len(folded)] != list(folded):
+                return False
+            session.history[:len(folded)] = [entry]
+            return True
+
+    def clear(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._touch(session_id)
+            if session is None:
+                return False
+            session.history.clear()
+            return True
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            self._expire(self._clock())
+            return {
+                "active": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "created": self._created,
+                "evicted": self._evicted,
+                "expired": self._expired
+            }
+
+    def _touch(self, session_id: str) -> Optional[_Session]:
+        """Look up a live session and move it to the most recently used end. Caller holds the lock."""
+        now = self._clock()
+        self._expire(now)
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def _insert(self, session_id: str, session: _Session) -> None:
+        """Add a session, evicting the least recently used if full. Caller holds the lock."""
+        now = self._clock()
+        self._expire(now)
+        while len(self._sessions) >= self.max_sessions:
+            self._sessions.popitem(last=False)
+            self._evicted += 1
+        session.last_access = now
+        self._sessions[session_id] = session
+        self._created += 1
+
+    def _expire(self, now: float) -> None:
+        """Drop sessions idle for longer than the TTL, oldest first. Caller holds the lock."""
+        if self.ttl_seconds <= 0:
+            return
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access < self.ttl_seconds:
+                return
+            del self._sessions[session_id]
+            self._expired += 1
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions in a SQLite database, shared by the processes of one host.
+
+    Each operation is a single transaction. History is stored as one JSON
+    row per session, and ``last_access`` is indexed, so expiry and LRU
+    eviction are range deletes.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_sessions: int = 10000,
+        ttl_seconds: float = 3600,
+        max_history: int = 5,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Initialize SQLiteSessionStore.
+
+        Args:
+            path: Database file
+            max_sessions: Maximum number of live sessions
+            ttl_seconds: Idle time after which a session expires (0 means no expiry)
+            max_history: Exchanges kept per session
+            clock: Wall-clock time source (shared between processes)
+        """
+        super().__init__(max_sessions, ttl_seconds, max_history)
+        self._clock = clock
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, last_access REAL NOT NULL, history TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions(last_access)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction taken up front, so concurrent processes never interleave read-modify-write."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _count(self, conn: sqlite3.Connection, name: str, amount: int) -> None:
+        if amount:
+            conn.execute(
+                "INSERT INTO counters VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, amount)
+            )
+
+    def _expire(self, conn: sqlite3.Connection, now: float) -> None:
+        if self.ttl_seconds > 0:
+            expired = conn.execute("DELETE FROM sessions WHERE last_access <= ?", (now - self.ttl_seconds,)).rowcount
+            self._count(conn, "expired", expired)
+
+    def _insert(self, conn: sqlite3.Connection, session_id: str, history: History, now: float) -> None:
+        self._expire(conn, now)
+        conn.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)", (session_id, now, json.dumps(history)))
+        self._count(conn, "created", 1)
+        excess = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] - self.max_sessions
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY last_access LIMIT ?)", (excess,)
+            )
+            self._count(conn, "evicted", excess)
+
+    def _load(self, conn: sqlite3.Connection, session_id: str, now: float) -> Optional[History]:
+        """Live session's history, touching it. Runs inside a transaction."""
+        self._expire(conn, now)
+        row = conn.execute("SELECT history FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE sessions SET last_access = ? WHERE id = ?", (now, session_id))
+        return [tuple(exchange) for exchange in json.loads(row[0])]
+
+    def _create(self, session_id: str) -> None:
+        with self._transaction() as conn:
+            self._insert(conn, session_id, [], self._clock())
+
+    def get_history(self, session_id: str) -> Optional[History]:
+        with self._transaction() as conn:
+            return self._load(conn, session_id, self._clock())
+
+    def append(self, session_id: str, question: str, answer: str) -> None:
+        now = self._clock()
+        with self._transaction() as conn:
+            history = self._load(conn, session_id, now)
+            if history is None:
+                self._insert(conn, session_id, [(question, answer)], now)
+                return
+            history = trim_history(history + [(question, answer)], self.max_history)
+            conn.execute("UPDATE sessions SET history = ? WHERE id = ?", (json.dumps(history), session_id))
+
+    def fold_history(self, session_id: str, folded: History, entry: Tuple[str, str]) -> bool:
+        with self._transaction() as conn:
+            row = conn.execute("SELECT history FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                return False
+            history = [tuple(exchange) for exchange in json.loads(row[0])]
+            if history[:len(folded)] != list(folded):
+                return False
+            conn.execute(
+                "UPDATE sessions SET history = ? WHERE id = ?",
+                (json.dumps([entry] + history[len(folded):]), session_id)
+            )
+            return True
+
+    def clear(self, session_id: str) -> bool:
+        with self._transaction() as conn:
+            if self._load(conn, session_id, self._clock()) is None:
+                return False
+            conn.execute("UPDATE sessions SET history = '[]' WHERE id = ?", (session_id,))
+            return True
+
+    def delete(self, session_id: str) -> bool:
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._transaction() as conn:
+            self._expire(conn, self._clock())
+            active = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        return {
+            "active": active,
+            "max_sessions": self.max_sessions,
+            "created": counters.get("created", 0),
+            "evicted": counters.get("evicted", 0),
+            "expired": counters.get("expired", 0)
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Sessions in Redis (or a protocol-compatible server), shared by every node.
+
+    Each session's exchanges are a list trimmed to ``max_history``; its
+    rolling summary, if any, is a separate key so trimming never drops it.
+    A sorted set scores sessions by last access: it marks which sessions exist,
+    drops idle ones by score range and gives the least recently used for
+    eviction. Every operation is one pipelined round trip. A second
+    round trip is needed only to evict or to count expired sessions. The
+    history keys also carry a TTL, so Redis frees abandoned sessions
+    itself.
+    """
+
+    def __init__(
+        self,
+        client: RedisClient,
+        max_sessions: int = 10000,
+        ttl_seconds: float = 3600,
+        max_history: int = 5,
+        prefix: str = "rag:session:",
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Initialize RedisSessionStore.
+
+        Args:
+            client: Connection to the server
+            max_sessions: Maximum number of live sessions
+            ttl_seconds: Idle time after which a session expires (0 means no expiry)
+            max_history: Exchanges kept per session
+            prefix: Key prefix, so several deployments can share a server
+            clock: Wall-clock time source (shared between nodes)
+        """
+        super().__init__(max_sessions, ttl_seconds, max_history)
+        self.client = client
+        self.prefix = prefix
+        self._clock = clock
+        self._index = f"{prefix}index"
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}{session_id}"
+
+    def _summary_key(self, session_id: str) -> str:
+        return f"{self.prefix}summary:{session_id}"
+
+    def _counter(self, name: str) -> str:
+        return f"{self.prefix}stats:{name}"
+
+    def _expire_command(self, now: float) -> Tuple:
+        # With no TTL this removes nothing, keeping reply positions the same
+        cutoff = now - self.ttl_seconds if self.ttl_seconds > 0 else "-inf"
+        return ("ZREMRANGEBYSCORE", self._index, "-inf", cutoff)
+
+    def _ttl_commands(self, *keys: str) -> List[Tuple]:
+        if self.ttl_seconds <= 0:
+            return []
+        return [("EXPIRE", key, max(1, math.ceil(self.ttl_seconds))) for key in keys]
+
+    def _after(self, expired: int, created: int = 0, size: int = 0) -> None:
+        """Count expired sessions and evict the least recently used beyond the limit (second round trip)."""
+        commands: List[Tuple] = []
+        if expired:
+            commands.append(("INCRBY", self._counter("expired"), expired))
+        if created:
+            commands.append(("INCRBY", self._counter("created"), created))
+        excess = size - self.max_sessions
+        if excess > 0:
+            evicted = self.client.execute("ZPOPMIN", self._index, excess)
+            evicted_ids = [member.decode("utf-8") for member in evicted[::2]]
+            if evicted_ids:
+                commands.append(("DEL", *[
+                    key for session_id in evicted_ids
+                    for key in (self._key(session_id), self._summary_key(session_id))
+                ]))
+                commands.append(("INCRBY", self._counter("evicted"), len(evicted_ids)))
+        if commands:
+            self.client.pipeline(commands)
+
+    def _create(self, session_id: str) -> None:
+        now = self._clock()
+        expired, _, size = self.client.pipeline([
+            self._expire_command(now),
+            ("ZADD", self._index, now, session_id),
+            ("ZCARD", self._index)
+        ])
+        self._after(expired, created=1, size=size)
+
+    def get_history(self, session_id: str) -> Optional[History]:
+        now = self._clock()
+        replies = self.client.pipeline([
+            self._expire_command(now),
+            ("ZADD", self._index, "XX", "CH", now, session_id),  # Touch only if it still exists
+            ("ZSCORE", self._index, session_id),
+            ("GET", self._summary_key(session_id)),
+            ("LRANGE", self._key(session_id), 0, -1),
+            *self._ttl_commands(self._key(session_id), self._summary_key(session_id))
+        ])
+        expired, _, score, summary, items = replies[:5]
+        self._after(expired)
+        if score is None:
+            return None
+        history = [tuple(json.loads(item)) for item in items]
+        return [(SUMMARY_MARKER, summary.decode("utf-8"))] + history if summary is not None else history
+
+    def append(self, session_id: str, question: str, answer: str) -> None:
+        now = self._clock()
+        replies = self.client.pipeline([
+            self._expire_command(now),
+            ("ZADD", self._index, now, session_id),
+            ("RPUSH", self._key(session_id), json.dumps([question, answer])),
+            ("LTRIM", self._key(session_id), -self.max_history, -1),
+            *self._ttl_commands(self._key(session_id), self._summary_key(session_id)),
+            ("ZCARD", self._index)
+        ])
+        expired, added, size = replies[0], replies[1], replies[-1]
+        if added:
+            # A recreated session must not pick up history left under its keys
+            self.client.pipeline([
+                ("LTRIM", self._key(session_id), -1, -1),
+                ("DEL", self._summary_key(session_id))
+            ])
+        self._after(expired, created=added, size=size if added else 0)
+
+    def fold_history(self, session_id: str, folded: History, entry: Tuple[str, str]) -> bool:
+        key, summary_key = self._key(session_id), self._summary_key(session_id)
+        summary, exchanges = split_summary(folded)
+        if not exchanges:
+            return False
+
+        def write(replies: List) -> Optional[List[Tuple]]:
+            score, stored_summary, items = replies
+            if score is None or (stored_summary.decode("utf-8") if stored_summary is not None else None) != summary:
+                return None
+            if [tuple(json.loads(item)) for item in items] != exchanges:
+                return None
+            return [
+                ("LTRIM", key, len(exchanges), -1),
+                ("SET", summary_key, entry[1]),
+                *self._ttl_commands(summary_key)
+            ]
+
+        # Watching both keys makes the check and the fold atomic: an append,
+        # trim, clear or delete in between drops the fold
+        committed = self.client.transaction(
+            [key, summary_key],
+            [
+                ("ZSCORE", self._index, session_id),
+                ("GET", summary_key),
+                ("LRANGE", key, 0, len(exchanges) - 1)
+            ],
+            write
+        )
+        return committed is not None
+
+    def clear(self, session_id: str) -> bool:
+        expired, score, _ = self.client.pipeline([
+            self._expire_command(self._clock()),
+            ("ZSCORE", self._index, session_id),
+            ("DEL", self._key(session_id), self._summary_key(session_id))
+        ])
+        self._after(expired)
+        return score is not None
+
+    def delete(self, session_id: str) -> bool:
+        removed, _ = self.client.pipeline([
+            ("ZREM", self._index, session_id),
+            ("DEL", self._key(session_id), self._summary_key(session_id))
+        ])
+        return removed > 0
+
+    def stats(self) -> Dict[str, float]:
+        expired, active, counters = self.client.pipeline([
+            self._expire_command(self._clock()),
+            ("ZCARD", self._index),
+            ("MGET", self._counter("created"), self._counter("evicted"), self._counter("expired"))
+        ])
+        self._after(expired)
+        created, evicted, expired_total = (int(value or 0) for value in counters)
+        return {
+            "active": active,
+            "max_sessions": self.max_sessions,
+            "created": created,
+            "evicted": evicted,
+            "expired": expired_total + expired
+        }
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def create_session_store(
+    backend: str = "memory",
+    max_sessions: int = 10000,
+    ttl_seconds: float = 3600,
+    max_history: int = 5,
+    sqlite_path: Optional[Path] = None,
+    redis_url: str = "redis://localhost:6379/0"
+) -> SessionStore:
+    """
+    Create a session store for the configured backend.
+
+    Args:
+        backend: memory, sqlite or redis
+        max_sessions: Maximum number of live sessions
+        ttl_seconds: Idle time after which a session expires (0 means no expiry)
+        max_history: Exchanges kept per session
+        sqlite_path: Database file for the sqlite backend
+        redis_url: Server URL for the redis backend
+
+    Returns:
+        SessionStore
+    """
+    limits = dict(max_sessions=max_sessions, ttl_seconds=ttl_seconds, max_history=max_history)
+    if backend == "memory":
+        return InMemorySessionStore(**limits)
+    if backend == "sqlite":
+        if sqlite_path is None:
+            raise ValueError("The sqlite session backend needs a database path")
+        return SQLiteSessionStore(sqlite_path, **limits)
+    if backend == "redis":
+        return RedisSessionStore(RedisClient(redis_url), **limits)
+    raise ValueError(f"Unknown session backend '{backend}', expected one of {SESSION_BACKENDS}")
@@ -0,0 +1,479 @@
+"""Searchable, immutable index versions made of a read-only base snapshot and an in-memory delta."""
+
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+
+from src.utils.chunk_store import ChunkStore
+from src.utils.index_factory import search_params
+from src.utils.lexical_index import COMMON_TERM_RATIO, LexicalDelta, LexicalIndex, bm25_scores, bm25_upper_bound, query_terms
+
+logger = logging.getLogger(__name__)
+
+
+def read_index(path: Path, mmap: bool = True) -> faiss.Index:
+    """
+    Read a FAISS index, memory-mapping its vector storage when possible.
+
+    A memory-mapped index is read-only: never add vectors to it.
+    """
+    if mmap:
+        try:
+            return faiss.read_index(str(path), faiss.IO_FLAG_MMAP_IFC)
+        except (AttributeError, RuntimeError) as e:
+            logger.warning(f"Memory-mapped read of {path} failed ({e}); reading into memory")
+    return faiss.read_index(str(path))
+
+
+_NO_POSTINGS = (np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.uint16))
+
+
+@dataclass
+class _Postings:
+    base_docs: np.ndarray
+    base_tfs: np.ndarray
+    delta_positions: np.ndarray
+    delta_tfs: np.ndarray
+
+    @property
+    def df(self) -> int:
+        return len(self.base_docs) + len(self.delta_positions)
+
+
+class _DeltaBuffer:
+    """
+    Append-only vectors and chunks shared by successive index versions.
+
+    Each version reads only the first ``delta_count`` rows it was created
+    with. Appends write past the rows any published version reads, so
+    readers never need a lock. When the array grows, the rows are copied
+    to a new array first; versions still holding the old array keep
+    reading valid rows.
+    """
+
+    def __init__(self, dim: int, capacity: int = 1024):
+        self.vectors = np.empty((capacity, dim), dtype=np.float32)
+        self.docs: List[Document] = []
+        self.positions: Dict[str, int] = {}
+        self.lexical = LexicalDelta()
+        self.count = 0
+
+    def append(self, vectors: np.ndarray, documents: Sequence[Document]) -> None:
+        """Append rows. Callers serialize appends (the store's write lock)."""
+        end = self.count + len(vectors)
+        if end > len(self.vectors):
+            grown = np.empty((max(end, 2 * len(self.vectors)), self.vectors.shape[1]), dtype=np.float32)
+            grown[:self.count] = self.vectors[:self.count]
+            self.vectors = grown
+        self.vectors[self.count:end] = vectors
+        self.docs.extend(documents)
+        self.lexical.add(documents, self.count)
+        for offset, doc in enumerate(documents):
+            self.positions[doc.id] = self.count + offset
+        self.count = end
+
+    def copy(self, count: int) -> "_DeltaBuffer":
+        """Independent buffer holding the first ``count`` rows."""
+        buffer = _DeltaBuffer(self.vectors.shape[1], capacity=max(count, 1024))
+        buffer.append(self.vectors[:count], self.docs[:count])
+        return buffer
+
+
+class VectorIndex:
+    """
+    Immutable version of the index: a base snapshot plus a delta.
+
+    Positions ``0 .. base_count - 1`` live in the base FAISS index (usually
+    memory-mapped and never modified) with chunks in a ChunkStore. Vectors
+    added since the last compaction form the delta, searched exactly.
+    Search queries both and merges the results by distance.
+
+    Writers never modify a published version: :meth:`with_added` and
+    :meth:`with_deleted` return the next version, which the store swaps
+    in with a single reference assignment. A reader that took a version
+    searches it consistently however many writes happen meanwhile, and
+    never waits for them.
+
+    Deleted positions are tombstoned rather than removed, since the base
+    is read-only (and HNSW does not support removal at all); searches
+    skip them and compaction drops them.
+
+    Chunk text is also indexed for BM25 (:meth:`lexical_search`), in the
+    same layout: a read-only inverted index stored with the base, plus
+    postings appended with the delta.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        base_index: Optional[faiss.Index] = None,
+        base_chunks: Optional[ChunkStore] = None,
+        base_dir: Optional[Path] = None,
+        base_lexical: Optional[LexicalIndex] = None,
+        delta: Optional[_DeltaBuffer] = None,
+        delta_count: int = 0,
+        deleted: FrozenSet[int] = frozenset(),
+        version: int = 0,
+        content_version: int = 0
+    ):
+        """
+        Initialize VectorIndex.
+
+        Args:
+            dim: Embedding dimension
+            base_index: Read-only base FAISS index
+            base_chunks: Chunks for the base index positions
+            base_dir: Directory the base was loaded from, if any
+            base_lexical: BM25 postings for the base positions
+            delta: Delta buffer shared with the previous version
+            delta_count: Delta rows visible in this version
+            deleted: Tombstoned positions
+            version: Version number, increased by every change
+            content_version: Increased only by changes to the chunks, not by
+                compaction or rebuilds that keep them
+        """
+        self.dim = dim
+        self.base_index = base_index
+        self.base_chunks = base_chunks
+        self.base_dir = base_dir
+        self.base_lexical = base_lexical
+        self._delta = delta if delta is not None else _DeltaBuffer(dim)
+        self.delta_count = delta_count
+        self.deleted = deleted
+        self.version = version
+        self.content_version = content_version
+        self._base_params: Optional[Tuple] = None
+        self._delta_deleted: Optional[np.ndarray] = None
+        self._deleted_sorted: Optional[np.ndarray] = None
+
+    @classmethod
+    def open(cls, base_dir: Path, mmap: bool = True) -> "VectorIndex":
+        """
+        Open a base snapshot directory.
+
+        Raises:
+            FileNotFoundError: If the directory has no chunk store (see SegmentStore.migrate)
+        """
+        if not ChunkStore.exists(base_dir):
+            raise FileNotFoundError(f"No chunk store in {base_dir}")
+        base_index = read_index(base_dir / "index.faiss", mmap=mmap)
+        base_chunks = ChunkStore(base_dir)
+        if not LexicalIndex.exists(base_dir):
+            # Snapshot written before lexical search existed: index its chunks once
+            logger.info(f"Building the lexical index for {base_dir}")
+            LexicalIndex.write(base_dir, base_chunks.iter_documents())
+        return cls(base_index.d, base_index, base_chunks, base_dir, LexicalIndex(base_dir))
+
+    @property
+    def base_count(self) -> int:
+        return self.base_index.ntotal if self.base_index is not None else 0
+
+    @property
+    def ntotal(self) -> int:
+        """Stored vectors, including tombstoned ones."""
+        return self.base_count + self.delta_count
+
+    @property
+    def live_count(self) -> int:
+        """Searchable (not deleted) vectors."""
+        return self.ntotal - len(self.deleted)
+
+    def _next(self, **changes) -> "VectorIndex":
+        fields = dict(
+            base_index=self.base_index,
+            base_chunks=self.base_chunks,
+            base_dir=self.base_dir,
+            base_lexical=self.base_lexical,
+            delta=self._delta,
+            delta_count=self.delta_count,
+            deleted=self.deleted,
+            version=self.version + 1,
+            content_version=self.content_version + 1
+        )
+        fields.update(changes)
+        return VectorIndex(self.dim, **fields)
+
+    def with_added(self, vectors: np.ndarray, documents: Sequence[Document]) -> "VectorIndex":
+        """Next version, with vectors and their chunks added to the delta."""
+        delta = self._delta
+        if delta.count != self.delta_count:
+            # Not the latest version: branch off rather than overwrite rows others can see
+            delta = delta.copy(self.delta_count)
+        delta.append(np.ascontiguousarray(vectors, dtype=np.float32), documents)
+        return self._next(delta=delta, delta_count=delta.count)
+
+    def with_deleted(self, positions: Iterable[int]) -> "VectorIndex":
+        """Next version, with positions tombstoned so searches no longer return them."""
+        positions = {int(p) for p in positions} - self.deleted
+        if not positions:
+            return self
+        return self._next(deleted=self.deleted | positions)
+
+    def positions_of(self, ids: Iterable[str]) -> List[int]:
+        """Live positions of the given chunk ids (unknown or deleted ids are skipped)."""
+        ids = list(ids)
+        positions = []
+        if self.base_chunks is not None:
+            positions.extend(self.base_chunks.positions_of(ids).values())
+        delta_positions = self._delta.positions
+        positions.extend(
+            self.base_count + delta_positions[i]
+            for i in ids
+            if delta_positions.get(i, self.delta_count) < self.delta_count
+        )
+        return sorted(p for p in set(positions) if p not in self.deleted)
+
+    def live_mask(self) -> np.ndarray:
+        """Boolean mask over all positions, False where deleted."""
+        mask = np.ones(self.ntotal, dtype=bool)
+        if self.deleted:
+            mask[np.fromiter(self.deleted, dtype=np.int64)] = False
+        return mask
+
+    def _base_search_params(self) -> Optional[faiss.SearchParameters]:
+        """Search parameters excluding tombstoned base positions (built once per version)."""
+        if self._base_params is None:
+            deleted = np.fromiter(sorted(p for p in self.deleted if p < self.base_count), dtype=np.int64)
+            if self.base_index is None or not len(deleted):
+                self._base_params = (None, None)
+            else:
+                # The selector must outlive the parameters that point to it
+                selector = faiss.IDSelectorNot(faiss.IDSelectorBatch(deleted))
+                self._base_params = (search_params(self.base_index, selector), selector)
+        return self._base_params[0]
+
+    def _deleted_delta_rows(self) -> np.ndarray:
+        """Tombstoned delta rows, relative to the delta (built once per version)."""
+        if self._delta_deleted is None:
+            base_count = self.base_count
+            self._delta_deleted = np.fromiter(
+                sorted(p - base_count for p in self.deleted if p >= base_count), dtype=np.int64
+            )
+        return self._delta_deleted
+
+    def delta_vectors(self, start: int = 0) -> np.ndarray:
+        """Vectors in the delta from ``start`` onwards."""
+        if start >= self.delta_count:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return self._delta.vectors[start:self.delta_count]
+
+    def delta_documents(self, start: int = 0) -> List[Document]:
+        """Chunks in the delta from ``start`` onwards."""
+        return self._delta.docs[start:self.delta_count]
+
+    def get_documents(self, positions: Sequence[int]) -> List[Document]:
+        """Fetch chunks by position, batching base lookups."""
+        base_count = self.base_count
+        base_positions = [p for p in positions if p < base_count]
+        base_docs = dict(zip(base_positions, self.base_chunks.get_many(base_positions))) if base_positions else {}
+        delta_docs = self._delta.docs
+        return [
+            base_docs[p] if p < base_count else delta_docs[p - base_count]
+            for p in positions
+        ]
+
+    def iter_documents(self):
+        """Iterate over all chunks in position order."""
+        if self.base_chunks is not None:
+            yield from self.base_chunks.iter_documents()
+        yield from self.delta_documents()
+
+    def search(self, queries: np.ndarray, k: int) -> List[List[Tuple[Document, float]]]:
+        """
+        Search base and delta for a batch of query vectors.
+
+        Args:
+            queries: Query vectors, shape (n, dim)
+            k: Number of results per query
+
+        Returns:
+            For each query, up to k (document, L2 distance) pairs, closest first
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        candidates: List[List[Tuple[float, int]]] = [[] for _ in range(len(queries))]
+
+        if self.base_count:
+            distances, labels = self.base_index.search(
+                queries, min(k, self.base_count), params=self._base_search_params()
+            )
+            for row, (dist_row, label_row) in enumerate(zip(distances, labels)):
+                candidates[row].extend((float(d), int(l)) for d, l in zip(dist_row, label_row) if l >= 0)
+
+        if self.delta_count:
+            # Exact search over the rows of this version; over-fetch to make up for tombstones
+            deleted = self._deleted_delta_rows()
+            vectors = self.delta_vectors()
+            distances, labels = faiss.knn(queries, vectors, min(k + len(deleted), self.delta_count))
+            live = ~np.isin(labels, deleted)
+            offset = self.base_count
+            for row, (dist_row, label_row, live_row) in enumerate(zip(distances, labels, live)):
+                candidates[row].extend(
+                    (float(d), int(l) + offset) for d, l, ok in zip(dist_row, label_row, live_row) if ok and l >= 0
+                )
+
+        results = []
+        for row in candidates:
+            top = sorted(row)[:k]
+            docs = self.get_documents([position for _, position in top])
+            results.append([(doc, distance) for doc, (distance, _) in zip(docs, top)])
+        return results
+
+    def lexical_search(self, query: str, k: int) -> List[Tuple[Document, float]]:
+        """
+        BM25 search over the chunk text of base and delta.
+
+        A compound query term (``ERR-1042``) is matched whole, falling back
+        to its parts only when no chunk contains it. When the query has rare
+        terms, common ones (in more than COMMON_TERM_RATIO of the chunks)
+        first only add to the scores of chunks the rare terms matched, so
+        their long posting lists are binary-searched instead of scanned.
+        That result is kept only if its k-th score beats the most a chunk
+        matching just the common terms could score; otherwise every posting
+        is scored. Either way the results are exact BM25.
+
+        Collection statistics (chunk count, average length, document
+        frequencies) include tombstoned chunks until compaction drops
+        them, which shifts scores slightly but never returns a deleted chunk.
+
+        Args:
+            query: Query text
+            k: Number of results
+
+        Returns:
+            Up to k (document, BM25 score) pairs, best first
+        """
+        if not self.ntotal:
+            return []
+
+        lexical = self._delta.lexical
+        base_length = self.base_lexical.total_length if self.base_lexical is not None else 0
+        avg_length = (base_length + lexical.total_length(self.delta_count)) / self.ntotal
+
+        terms: Dict[str, _Postings] = {}
+        for group in query_terms(query):
+            whole = self._postings(group[0])
+            if whole.df or len(group) == 1:
+                terms[group[0]] = whole
+                continue
+            for part in group[1:]:
+                terms.setdefault(part, self._postings(part))
+        postings = [p for p in terms.values() if p.df]
+        if not postings:
+            return []
+
+        cutoff = COMMON_TERM_RATIO * self.ntotal
+        rare = [p for p in postings if p.df <= cutoff] or postings
+        common = [p for p in postings if p.df > cutoff] if len(rare) < len(postings) else []
+
+        positions, scores = self._bm25(rare, common, avg_length)
+        if common:
+            # MaxScore check: a chunk without any rare term scores below this bound
+            bound = sum(bm25_upper_bound(p.df, self.ntotal) for p in common)
+            if len(scores) < k or np.partition(scores, len(scores) - k)[len(scores) - k] <= bound:
+                positions, scores = self._bm25(postings, [], avg_length)
+
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            positions, scores = positions[top], scores[top]
+        order = np.lexsort((positions, -scores))
+        docs = self.get_documents([int(p) for p in positions[order]])
+        return list(zip(docs, (float(score) for score in scores[order])))
+
+    def _bm25(
+        self,
+        postings: List["_Postings"],
+        rescored: List["_Postings"],
+        avg_length: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Summed BM25 scores of the live chunks matching any of ``postings``, as (positions, scores).
+
+        Terms in ``rescored`` only add to the scores of those chunks.
+        """
+        matched = [self._score(p, avg_length) for p in postings]
+        positions = np.concatenate([m[0] for m in matched])
+        scores = np.concatenate([m[1] for m in matched])
+        if len(matched) > 1:
+            # Sum the terms' contributions per chunk
+            positions, inverse = np.unique(positions, return_inverse=True)
+            scores = np.bincount(inverse.reshape(-1), weights=scores).astype(np.float32)
+        for p in rescored:
+            hit_positions, hit_scores = self._score(p, avg_length, at=positions)
+            scores[np.searchsorted(positions, hit_positions)] += hit_scores
+
+        if self.deleted:
+            live = ~np.isin(positions, self._deleted_positions())
+            positions, scores = positions[live], scores[live]
+        return positions, scores
+
+    def _postings(self, term: str) -> "_Postings":
+        """A term's postings in base and visible delta rows (base ones are memory-mapped views)."""
+        base_docs, base_tfs = self.base_lexical.postings(term) if self.base_lexical is not None else _NO_POSTINGS
+        rows, delta_tfs = self._delta.lexical.lookup(term, self.delta_count)
+        return _Postings(base_docs, base_tfs, rows + self.base_count, delta_tfs)
+
+    def _score(
+        self,
+        postings: "_Postings",
+        avg_length: float,
+        at: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        BM25 contributions of one term, as sorted (positions, scores).
+
+        Args:
+            postings: The term's postings
+            avg_length: Average chunk length in terms
+            at: Sorted positions to restrict scoring to (default: every posting)
+        """
+        parts = []
+        for docs, tfs, section in (
+            (postings.base_docs, postings.base_tfs, slice(None, self.base_count)),
+            (postings.delta_positions, postings.delta_tfs, slice(self.base_count, None))
+        ):
+            if not len(docs):
+                continue
+            docs = np.asarray(docs, dtype=np.int64) if at is None else docs
+            if at is not None:
+                # Binary-search the candidates in the (sorted) posting list
+                lo, hi = np.searchsorted(at, [section.start or 0, section.stop or np.iinfo(np.int64).max])
+                candidates = at[lo:hi]
+                # Cast the few candidates, or numpy would cast the whole posting list
+                index = np.searchsorted(docs, candidates.astype(docs.dtype))
+                index = np.minimum(index, len(docs) - 1)
+                hit = np.asarray(docs[index]) == candidates
+                docs, tfs = candidates[hit], np.asarray(tfs[index[hit]])
+            parts.append((docs, np.asarray(tfs)))
+        if not parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        positions = np.concatenate([docs for docs, _ in parts])
+        tfs = np.concatenate([tfs.astype(np.uint16) for _, tfs in parts])
+        return positions, bm25_scores(tfs, self._lengths(positions), postings.df, self.ntotal, avg_length)
+
+    def _lengths(self, positions: np.ndarray) -> np.ndarray:
+        """Length in terms of the chunks at the given positions."""
+        lengths = np.empty(len(positions), dtype=np.int32)
+        in_base = positions < self.base_count
+        if in_base.any():
+            lengths[in_base] = self.base_lexical.lengths[positions[in_base]]
+        if not in_base.all():
+            delta_lengths = self._delta.lexical.lengths
+            lengths[~in_base] = [delta_lengths[p - self.base_count] for p in positions[~in_base]]
+        return lengths
+
+    def _deleted_positions(self) -> np.ndarray:
+        """Tombstoned positions as a sorted array (built once per version)."""
+        if self._deleted_sorted is None:
+            self._deleted_sorted = np.fromiter(sorted(self.deleted), dtype=np.int64)
+        return self._deleted_sorted
+
+    def close(self) -> None:
+        """Release memory maps held by the base chunks."""
+        if self.base_chunks is not None:
+            self.base_chunks.close()
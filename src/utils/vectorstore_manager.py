@@ -1,11 +1,35 @@
 """Vector store manager for RAG application."""
 
+import asyncio
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from typing import Iterable, List, Optional, Tuple
+
+import faiss
+import numpy as np
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.utils.content_registry import ContentRegistry, chunk_hash
+from src.utils.embedding_cache import QueryEmbeddingCache
+from src.utils.embedding_engine import EMBEDDING_BACKENDS, EmbeddingEngine, EmbeddingSettings
+from src.utils.onnx_embeddings import OnnxEmbeddingEngine
+from src.utils.index_factory import (
+    IndexSettings,
+    build_index,
+    train_index,
+    apply_search_params,
+    reconstruct_all,
+    describe_index,
+)
+from src.utils.segment_store import SegmentStore, MigrationRequiredError, remap_positions
+from src.utils.chunk_store import ChunkStore
+from src.utils.vector_index import VectorIndex, read_index
+from src.utils.lexical_index import HybridSettings, reciprocal_rank_fusion
+from src.utils.context_builder import TOKEN_COUNT_KEY, count_tokens
+from src.utils import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -13,85 +37,532 @@ logger = logging.getLogger(__name__)
 class VectorStoreManager:
     """Manages vector store operations for document retrieval."""
     
+    # Compact once this fraction of the stored vectors is tombstoned
+    COMPACTION_TOMBSTONE_RATIO = 0.1
+    
     def __init__(
         self,
         vectorstore_path: Path,
-        embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+        embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
+        search_workers: int = 4,
+        query_cache_size: int = 1024,
+        query_cache_ttl: float = 0,
+        index_settings: Optional[IndexSettings] = None,
+        compaction_segments: int = 16,
+        mmap_index: bool = True,
+        embedding_settings: Optional[EmbeddingSettings] = None,
+        hybrid_settings: Optional[HybridSettings] = None
     ):
         """
         Initialize VectorStoreManager.
         
         Args:
             vectorstore_path: Path to store/load vector database
-            embedding_model: HuggingFace embedding model name
+            embedding_model: sentence-transformers embedding model name
+            search_workers: Size of the thread pool used for async searches
+            query_cache_size: Number of query embeddings to cache (0 disables)
+            query_cache_ttl: Query embedding cache TTL in seconds (0 means no expiry)
+            index_settings: FAISS index type and tuning (defaults to a flat index)
+            compaction_segments: Pending segments that trigger a background compaction
+            mmap_index: Memory-map the index snapshot instead of reading it into RAM
+            embedding_settings: Embedding backend, batch size, process pool and thread settings
+            hybrid_settings: Weights for fusing BM25 with dense results (defaults to equal weights)
         """
         self.vectorstore_path = vectorstore_path
         self.embedding_model = embedding_model
-        self.embeddings = HuggingFaceEmbeddings(model_name=embedding_model)
-        self.vectorstore: Optional[FAISS] = None
+        self.embeddings = self._create_embeddings(embedding_model, embedding_settings or EmbeddingSettings())
+        self.index_settings = index_settings or IndexSettings()
+        self.hybrid_settings = hybrid_settings or HybridSettings()
+        self.mmap_index = mmap_index
+        # Current immutable index version: readers take the reference once and
+        # search it lock-free; writers build the next version and assign it
+        self.vector_index: Optional[VectorIndex] = None
+        self.query_cache = QueryEmbeddingCache(
+            max_size=query_cache_size,
+            ttl_seconds=query_cache_ttl
+        )
+        
+        # Appends go to small segments; a background compaction folds them into a snapshot
+        self.store = SegmentStore(vectorstore_path)
+        # Content hashes of indexed chunks and ingested files, for idempotent re-ingest
+        self.content_registry = ContentRegistry(vectorstore_path)
+        self.compaction_segments = compaction_segments
+        self._write_lock = threading.RLock()
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        
+        # Bounded pool so embedding and FAISS work never runs on the event loop
+        self._search_executor = ThreadPoolExecutor(
+            max_workers=search_workers,
+            thread_name_prefix="vectorstore-search"
+        )
         
         # Try to load existing vectorstore
         self._load_vectorstore()
     
+    @staticmethod
+    def _create_embeddings(embedding_model: str, settings: EmbeddingSettings) -> Embeddings:
+        """Build the embedding engine for the configured backend."""
+        if settings.backend not in EMBEDDING_BACKENDS:
+            raise ValueError(
+                f"Unknown embedding backend '{settings.backend}'. Choose from: {', '.join(EMBEDDING_BACKENDS)}"
+            )
+        if settings.backend == "torch":
+            return EmbeddingEngine(model_name=embedding_model, settings=settings)
+        
+        engine = OnnxEmbeddingEngine(Path(settings.onnx_path), settings)
+        if engine.model_name != embedding_model:
+            # Vectors from another model do not match the index
+            logger.warning(
+                f"ONNX export in {settings.onnx_path} is of {engine.model_name}, not {embedding_model}"
+            )
+        return engine
+    
     def _load_vectorstore(self) -> None:
         """Load existing vectorstore from disk."""
-        index_path = self.vectorstore_path / "index.faiss"
-        if index_path.exists():
+        if self.store.exists():
             try:
-                self.vectorstore = FAISS.load_local(
-                    str(self.vectorstore_path),
-                    self.embeddings,
-                    allow_dangerous_deserialization=True
+                self.vector_index = self.store.load(mmap=self.mmap_index)
+                if self.vector_index.base_index is not None:
+                    apply_search_params(self.vector_index.base_index, self.index_settings)
+                logger.info(
+                    f"Loaded existing vectorstore from {self.vectorstore_path}: "
+                    f"{self.vector_index.ntotal} chunks"
                 )
-                logger.info(f"Loaded existing vectorstore from {self.vectorstore_path}")
+                if self.vector_index.ntotal and not self.content_registry.chunk_count():
+                    # Store written before hashes were recorded: register its chunks once
+                    logger.info("Registering content hashes of existing chunks...")
+                    self.content_registry.add_chunks(self.vector_index.iter_documents())
+            except MigrationRequiredError as e:
+                logger.error(str(e))
+                self.vector_index = None
             except Exception as e:
                 logger.warning(f"Failed to load vectorstore: {e}")
-                self.vectorstore = None
+                self.vector_index = None
     
-    def create_vectorstore(self, documents: List[Document]) -> None:
+    def create_vectorstore(self, documents: List[Document]) -> int:
         """
-        Create new vectorstore from documents.
+        Create new vectorstore from documents, replacing any existing one.
+        
+        The content registry is reset to the new chunks only after the new
+        snapshot is committed, so a failed rebuild leaves both the old index
+        and its chunk and file records in place.
         
         Args:
             documents: List of LangChain Document objects
+            
+        Returns:
+            Number of chunks indexed (duplicates within the list are dropped)
         """
         if not documents:
             raise ValueError("Cannot create vectorstore from empty documents list")
         
         logger.info(f"Creating vectorstore with {len(documents)} documents...")
-        self.vectorstore = FAISS.from_documents(documents, self.embeddings)
-        self.save_vectorstore()
+        documents = self._unique(self._with_ids(documents))
+        vectors = self._embed_documents(documents)
+        
+        with self._compaction_lock, self._write_lock:
+            index = self._build_trained_index(vectors)
+            index.add(vectors)
+            self._install_snapshot(index, documents, source_chunks=None, content_changed=True)
+            self.content_registry.replace(documents)
+        metrics.INGESTED_CHUNKS.inc(len(documents))
         logger.info("Vectorstore created successfully")
+        return len(documents)
+    
+    def _build_trained_index(self, vectors: np.ndarray) -> faiss.Index:
+        """Build an index of the configured type and train it on the given vectors."""
+        index = build_index(self.index_settings, vectors.shape[1], len(vectors))
+        train_index(index, vectors, self.index_settings.train_sample)
+        apply_search_params(index, self.index_settings)
+        return index
+    
+    def _install_snapshot(
+        self,
+        index: faiss.Index,
+        documents: Iterable[Document],
+        source_chunks: Optional[ChunkStore],
+        content_changed: bool = False
+    ) -> None:
+        """Persist a full snapshot covering every pending segment and serve from it."""
+        base_dir = self.store.write_base(
+            index, documents, self.store.pending_segments, source_chunks=source_chunks
+        )
+        self._swap_to_base(base_dir, delta_start=None, content_changed=content_changed)
     
-    def add_documents(self, documents: List[Document]) -> None:
+    def _swap_to_base(
+        self,
+        base_dir: Path,
+        delta_start: Optional[int],
+        removed: Optional[np.ndarray] = None,
+        content_changed: bool = False
+    ) -> None:
         """
-        Add documents to existing vectorstore.
+        Replace the served index with a freshly written snapshot.
+        
+        Args:
+            base_dir: Snapshot directory
+            delta_start: Delta entries from this offset were added after the
+                snapshot was taken and are carried over (None carries nothing)
+            removed: Tombstoned positions the snapshot left out; tombstones
+                added meanwhile are carried over in the new numbering
+            content_changed: Whether the snapshot holds different chunks than
+                the served index; compaction and rebuilds keep the content version
+        """
+        new_index = VectorIndex.open(base_dir, mmap=self.mmap_index)
+        apply_search_params(new_index.base_index, self.index_settings)
+        
+        old_index = self.vector_index
+        if old_index is not None and delta_start is not None:
+            if old_index.delta_count > delta_start:
+                new_index = new_index.with_added(
+                    old_index.delta_vectors(delta_start), old_index.delta_documents(delta_start)
+                )
+            if removed is None:
+                removed = np.zeros(0, dtype=np.int64)
+            new_index = new_index.with_deleted(remap_positions(old_index.deleted, removed))
+        
+        # Not yet visible to readers, so it can still be numbered in place
+        new_index.version = old_index.version + 1 if old_index is not None else 1
+        if old_index is None:
+            new_index.content_version = 1
+        else:
+            new_index.content_version = old_index.content_version + (1 if content_changed else 0)
+        self.vector_index = new_index
+    
+    def rebuild_index(self, index_type: Optional[str] = None) -> None:
+        """
+        Rebuild the FAISS index, optionally switching index type.
+        
+        Vectors are recovered from the current index where possible and
+        re-embedded from the stored chunks otherwise (e.g. from IVF-PQ).
+        Chunk ids are kept unchanged.
+        
+        Args:
+            index_type: New index type (flat, ivf_flat, ivf_pq, hnsw); defaults to the configured one
+        """
+        if self.vector_index is None:
+            raise ValueError("Vectorstore not initialized")
+        
+        if index_type is not None:
+            self.index_settings.index_type = index_type
+        
+        with self._compaction_lock, self._write_lock:
+            current = self.vector_index
+            live = current.live_mask()
+            documents = [doc for doc, keep in zip(current.iter_documents(), live) if keep]
+            try:
+                base_vectors = (
+                    reconstruct_all(current.base_index)
+                    if current.base_index is not None
+                    else np.zeros((0, current.dim), dtype=np.float32)
+                )
+                vectors = np.vstack([base_vectors, current.delta_vectors()])[live]
+            except RuntimeError as e:
+                logger.info(f"{e}; re-embedding {len(documents)} chunks")
+                vectors = self._embed_documents(documents)
+            
+            logger.info(f"Rebuilding {len(documents)} vectors as {self.index_settings.index_type}...")
+            index = self._build_trained_index(vectors)
+            index.add(vectors)
+            self._install_snapshot(index, documents, source_chunks=None)
+        logger.info(f"Index rebuilt: {describe_index(index)}")
+    
+    def add_documents(self, documents: List[Document]) -> int:
+        """
+        Add documents to existing vectorstore, skipping chunks already indexed.
+        
+        Chunks are identified by a hash of their text and metadata, so
+        re-ingesting the same content is a no-op and is not re-embedded.
         
         Args:
             documents: List of LangChain Document objects
+            
+        Returns:
+            Number of new chunks added
+            
+        Raises:
+            MigrationRequiredError: If the store on disk has not been migrated yet
         """
         if not documents:
             logger.warning("No documents to add")
-            return
+            return 0
         
-        if self.vectorstore is None:
-            self.create_vectorstore(documents)
-        else:
-            logger.info(f"Adding {len(documents)} documents to vectorstore...")
-            self.vectorstore.add_documents(documents)
-            self.save_vectorstore()
-            logger.info("Documents added successfully")
+        if self.store.needs_migration():
+            # Creating a fresh store here would discard the unmigrated chunks
+            raise MigrationRequiredError(
+                f"{self.vectorstore_path} must be migrated before adding documents: run 'python rag_app.py migrate'"
+            )
+        
+        if self.vector_index is None:
+            return self.create_vectorstore(documents)
+        
+        documents = self._new_documents(self._with_ids(documents))
+        if not documents:
+            logger.info("All documents are already indexed")
+            return 0
+        
+        logger.info(f"Adding {len(documents)} documents to vectorstore...")
+        vectors = self._embed_documents(documents)
+        
+        with self._write_lock:
+            # Re-check under the lock: a concurrent ingest may have added some meanwhile
+            new_documents = self._new_documents(documents)
+            if len(new_documents) < len(documents):
+                keep = {doc.id for doc in new_documents}
+                mask = [doc.id in keep for doc in documents]
+                documents, vectors = new_documents, vectors[mask]
+            if not documents:
+                return 0
+            
+            # Only the new batch is written; the snapshot on disk is left untouched
+            self.store.append(
+                [doc.id for doc in documents],
+                [doc.page_content for doc in documents],
+                [doc.metadata for doc in documents],
+                vectors
+            )
+            self.vector_index = self.vector_index.with_added(vectors, documents)
+            self.content_registry.add_chunks(documents)
+        
+        metrics.INGESTED_CHUNKS.inc(len(documents))
+        logger.info("Documents added successfully")
+        self._maybe_compact()
+        return len(documents)
+    
+    @staticmethod
+    def _with_ids(documents: List[Document]) -> List[Document]:
+        """
+        Copies of the documents, with their content hash as id where none is set.
+        
+        Each chunk's token count is recorded in its metadata, so prompt
+        packing never re-tokenizes it (the hash ignores the count).
+        """
+        return [
+            Document(
+                id=doc.id or chunk_hash(doc),
+                page_content=doc.page_content,
+                metadata=(
+                    doc.metadata if TOKEN_COUNT_KEY in doc.metadata
+                    else {**doc.metadata, TOKEN_COUNT_KEY: count_tokens(doc.page_content)}
+                )
+            )
+            for doc in documents
+        ]
+    
+    @staticmethod
+    def _unique(documents: List[Document]) -> List[Document]:
+        """Drop repeated chunks within a list, keeping the first."""
+        seen = set()
+        unique = []
+        for doc in documents:
+            key = chunk_hash(doc)
+            if key not in seen:
+                seen.add(key)
+                unique.append(doc)
+        return unique
+    
+    def _new_documents(self, documents: List[Document]) -> List[Document]:
+        """Chunks not yet in the index, without repeats."""
+        documents = self._unique(documents)
+        seen = self.content_registry.seen_hashes([chunk_hash(doc) for doc in documents])
+        return [doc for doc in documents if chunk_hash(doc) not in seen]
+    
+    def delete_source(self, source: str) -> int:
+        """
+        Remove every chunk of a source document.
+        
+        Chunks are tombstoned, so the cost is proportional to the document,
+        not the index; space is reclaimed by the next compaction.
+        
+        Args:
+            source: Source path, as recorded in the chunks' ``source`` metadata
+            
+        Returns:
+            Number of chunks removed
+        """
+        with self._write_lock:
+            removed = self._delete_ids(self.content_registry.chunk_ids_for_source(source))
+            self.content_registry.forget_file(source)
+        
+        logger.info(f"Removed {removed} chunks of {source}")
+        self._maybe_compact()
+        return removed
+    
+    def upsert_source(self, source: str, documents: List[Document]) -> Tuple[int, int]:
+        """
+        Replace the chunks of a source document with a new version.
+        
+        Unchanged chunks are kept as they are (not re-embedded); only new
+        chunks are embedded and only stale ones are removed. New chunks are
+        added before stale ones are removed, so the document never
+        disappears from search midway.
+        
+        Args:
+            source: Source path, as recorded in the chunks' ``source`` metadata
+            documents: Current chunks of the document
+            
+        Returns:
+            (chunks added, chunks removed)
+        """
+        documents = self._with_ids(documents)
+        current = {chunk_hash(doc) for doc in documents}
+        
+        added = self.add_documents(documents) if documents else 0
+        with self._write_lock:
+            stale = [
+                chunk_id for digest, chunk_id in self.content_registry.chunks_for_source(source)
+                if digest not in current
+            ]
+            removed = self._delete_ids(stale)
+        
+        logger.info(f"Updated {source}: {added} chunks added, {removed} removed")
+        self._maybe_compact()
+        return added, removed
+    
+    def _delete_ids(self, ids: List[str]) -> int:
+        """Tombstone chunks by id, durably. Caller holds the write lock."""
+        if self.vector_index is None or not ids:
+            return 0
+        
+        positions = self.vector_index.positions_of(ids)
+        if positions:
+            self.store.add_tombstones(positions)
+            self.vector_index = self.vector_index.with_deleted(positions)
+        self.content_registry.remove_chunks(ids)
+        return len(positions)
+    
+    def _embed_documents(self, documents: List[Document]) -> np.ndarray:
+        """Embed chunk texts as a float32 matrix."""
+        texts = [doc.page_content for doc in documents]
+        return np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
     
     def save_vectorstore(self) -> None:
-        """Save vectorstore to disk."""
-        if self.vectorstore is None:
+        """Save a full snapshot of the vectorstore to disk (compaction)."""
+        if self.vector_index is None:
             logger.warning("No vectorstore to save")
             return
         
-        self.vectorstore_path.mkdir(parents=True, exist_ok=True)
-        self.vectorstore.save_local(str(self.vectorstore_path))
+        self.compact()
         logger.info(f"Vectorstore saved to {self.vectorstore_path}")
     
+    def compact(self) -> None:
+        """
+        Fold pending segments into a new snapshot on disk, dropping deleted chunks.
+        
+        The delta is copied under the write lock; the slow snapshot write
+        happens without blocking ingestion, and appends or deletes made
+        meanwhile are carried over to the new index.
+        """
+        with self._compaction_lock:
+            with self._write_lock:
+                current = self.vector_index
+                if current is None or not (self.store.pending_segments or current.deleted):
+                    return
+                base_count = current.base_count
+                delta_start = current.delta_count
+                delta_vectors = current.delta_vectors()
+                delta_docs = current.delta_documents()
+                removed = np.fromiter(sorted(current.deleted), dtype=np.int64)
+                covered_segments = self.store.pending_segments
+            
+            base_removed = removed[removed < base_count]
+            delta_keep = np.ones(delta_start, dtype=bool)
+            delta_keep[removed[removed >= base_count] - base_count] = False
+            delta_vectors = delta_vectors[delta_keep]
+            delta_docs = [doc for doc, keep in zip(delta_docs, delta_keep) if keep]
+            
+            keep = None
+            if current.base_dir is not None:
+                # Private, fully loaded copy: a memory-mapped index must not be written to
+                index = read_index(current.base_dir / "index.faiss", mmap=False)
+                if len(base_removed):
+                    keep = np.setdiff1d(np.arange(base_count), base_removed)
+                    base_vectors = reconstruct_all(index, allow_lossy=True)[keep]
+                    index.reset()
+                    index.add(base_vectors)
+            else:
+                index = self._build_trained_index(delta_vectors)
+            index.add(delta_vectors)
+            
+            # Existing chunk records are copied byte for byte; only the delta is serialized
+            base_dir = self.store.write_base(
+                index,
+                delta_docs,
+                covered_segments,
+                source_chunks=current.base_chunks,
+                keep=keep,
+                removed=removed,
+                source_lexical=current.base_lexical
+            )
+            
+            with self._write_lock:
+                if self.vector_index is current:
+                    self._swap_to_base(base_dir, delta_start=delta_start, removed=removed)
+    
+    def _maybe_compact(self) -> None:
+        """Start a background compaction once enough segments or tombstones have piled up."""
+        current = self.vector_index
+        too_many_deleted = current is not None and (
+            len(current.deleted) > self.COMPACTION_TOMBSTONE_RATIO * current.ntotal
+        )
+        if len(self.store.pending_segments) < self.compaction_segments and not too_many_deleted:
+            return
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        
+        def run():
+            try:
+                self.compact()
+            except Exception as e:
+                logger.error(f"Background compaction failed: {e}")
+        
+        self._compaction_thread = threading.Thread(target=run, name="vectorstore-compaction", daemon=True)
+        self._compaction_thread.start()
+    
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a query, reusing cached embeddings for repeated questions.
+        
+        Args:
+            query: Search query
+            
+        Returns:
+            Query embedding
+        """
+        with metrics.QUERY_EMBEDDING_SECONDS.time():
+            key = QueryEmbeddingCache.make_key(query, self.embedding_model)
+            embedding = self.query_cache.get(key)
+            if embedding is None:
+                embedding = self.embeddings.embed_query(query)
+                self.query_cache.put(key, embedding)
+        return embedding
+    
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embed a batch of queries, encoding the uncached ones in a single call.
+        
+        Args:
+            queries: Search queries
+        
+        Returns:
+            Array of shape (len(queries), dim), in input order
+        """
+        with metrics.QUERY_EMBEDDING_SECONDS.time():
+            keys = [QueryEmbeddingCache.make_key(query, self.embedding_model) for query in queries]
+            embeddings: List[Optional[List[float]]] = [self.query_cache.get(key) for key in keys]
+            
+            # Repeated questions in a batch are encoded once
+            misses = list(dict.fromkeys(query for query, embedding in zip(queries, embeddings) if embedding is None))
+            if misses:
+                encoded = dict(zip(misses, self.embeddings.embed_documents(misses)))
+                for i, query in enumerate(queries):
+                    if embeddings[i] is None:
+                        embeddings[i] = encoded[query]
+                        self.query_cache.put(keys[i], encoded[query])
+        
+        return np.asarray(embeddings, dtype=np.float32)
+    
     def similarity_search(self, query: str, k: int = 4) -> List[Document]:
         """
         Perform similarity search on vectorstore.
@@ -103,17 +574,292 @@ class VectorStoreManager:
         Returns:
             List of relevant documents
         """
-        if self.vectorstore is None:
+        if self.vector_index is None:
             logger.error("Vectorstore not initialized")
             return []
         
-        results = self.vectorstore.similarity_search(query, k=k)
+        return self.similarity_search_by_vector(self.embed_query(query), k=k, query=query)
+    
+    def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, Optional[float]]]:
+        """
+        Perform similarity search, returning each document's vector similarity.
+        
+        Args:
+            query: Search query
+            k: Number of results to return
+            
+        Returns:
+            List of (document, similarity) pairs, best first; see :meth:`_similarity`
+        """
+        if self.vector_index is None:
+            logger.error("Vectorstore not initialized")
+            return []
+        
+        return self.similarity_search_with_score_by_vector(self.embed_query(query), k=k, query=query)
+    
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        query: Optional[str] = None
+    ) -> List[Document]:
+        """
+        Perform similarity search with an already computed query embedding.
+        
+        Args:
+            embedding: Query embedding
+            k: Number of results to return
+            query: Query text; when given, BM25 results are fused in (hybrid search)
+            
+        Returns:
+            List of relevant documents
+        """
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k=k, query=query)]
+    
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        query: Optional[str] = None
+    ) -> List[Tuple[Document, Optional[float]]]:
+        """
+        Perform similarity search with an already computed query embedding, with scores.
+        
+        Args:
+            embedding: Query embedding
+            k: Number of results to return
+            query: Query text; when given, BM25 results are fused in (hybrid search)
+            
+        Returns:
+            List of (document, similarity) pairs, best first
+        """
+        index = self.vector_index  # One version for the whole search
+        if index is None:
+            logger.error("Vectorstore not initialized")
+            return []
+        
+        embeddings = np.asarray([embedding], dtype=np.float32)
+        results = self._search(index, embeddings, [query] if query is not None else None, k)[0]
         logger.info(f"Found {len(results)} relevant documents for query")
         return results
     
+    def similarity_search_by_vectors(
+        self,
+        embeddings: np.ndarray,
+        k: int = 4,
+        queries: Optional[List[str]] = None
+    ) -> List[List[Document]]:
+        """
+        Search a batch of query embeddings as one matrix against one index version.
+        
+        Args:
+            embeddings: Query embeddings, shape (n, dim)
+            k: Number of results per query
+            queries: Query texts, for hybrid search
+            
+        Returns:
+            For each query, its relevant documents
+        """
+        return [
+            [doc for doc, _ in hits]
+            for hits in self.similarity_search_with_score_by_vectors(embeddings, k=k, queries=queries)
+        ]
+    
+    def similarity_search_with_score_by_vectors(
+        self,
+        embeddings: np.ndarray,
+        k: int = 4,
+        queries: Optional[List[str]] = None
+    ) -> List[List[Tuple[Document, Optional[float]]]]:
+        """
+        Batch variant of :meth:`similarity_search_with_score_by_vector`.
+        
+        Args:
+            embeddings: Query embeddings, shape (n, dim)
+            k: Number of results per query
+            queries: Query texts, for hybrid search
+            
+        Returns:
+            For each query, its (document, similarity) pairs
+        """
+        index = self.vector_index
+        if index is None:
+            logger.error("Vectorstore not initialized")
+            return [[] for _ in range(len(embeddings))]
+        if not len(embeddings):
+            return []
+        
+        results = self._search(index, embeddings, queries, k)
+        logger.info(f"Searched {len(results)} queries in one batch")
+        return results
+    
+    def lexical_search(self, query: str, k: int = 4) -> List[Document]:
+        """
+        BM25 search over chunk text only.
+        
+        Args:
+            query: Search query
+            k: Number of results to return
+            
+        Returns:
+            List of matching documents, best first
+        """
+        index = self.vector_index
+        if index is None:
+            logger.error("Vectorstore not initialized")
+            return []
+        
+        return [doc for doc, _ in index.lexical_search(query, k)]
+    
+    @staticmethod
+    def _similarity(distance: float) -> float:
+        """
+        Similarity score of an L2 search distance.
+        
+        FAISS returns squared L2 distances, so for unit-length embeddings
+        (as produced by all-MiniLM-L6-v2 and most sentence-transformers
+        models) this is their cosine similarity: 1 for the same direction,
+        0 for unrelated text.
+        """
+        return 1.0 - float(distance) / 2.0
+    
+    def _search(
+        self,
+        index: VectorIndex,
+        embeddings: np.ndarray,
+        queries: Optional[List[str]],
+        k: int
+    ) -> List[List[Tuple[Document, Optional[float]]]]:
+        """
+        Dense search, fused with BM25 by reciprocal rank when query texts are given.
+        
+        Both sides fetch ``candidates`` results from the same index version,
+        so the fused list is a consistent snapshot. Scores are vector
+        similarities; chunks found only by BM25 have none (None).
+        """
+        settings = self.hybrid_settings
+        hybrid = queries is not None and settings.lexical_weight > 0
+        if not hybrid:
+            with metrics.FAISS_SEARCH_SECONDS.time():
+                dense = index.search(embeddings, k)
+            return [[(doc, self._similarity(distance)) for doc, distance in hits] for hits in dense]
+        
+        candidates = max(k, settings.candidates)
+        dense = [[] for _ in queries]
+        if settings.dense_weight > 0:
+            with metrics.FAISS_SEARCH_SECONDS.time():
+                dense = index.search(embeddings, candidates)
+        results = []
+        for hits, query in zip(dense, queries):
+            scores = {doc.id: self._similarity(distance) for doc, distance in hits}
+            with metrics.LEXICAL_SEARCH_SECONDS.time():
+                lexical = index.lexical_search(query, candidates)
+            fused = reciprocal_rank_fusion(
+                [[doc for doc, _ in hits], [doc for doc, _ in lexical]],
+                [settings.dense_weight, settings.lexical_weight],
+                settings.rrf_k
+            )[:k]
+            results.append([(doc, scores.get(doc.id)) for doc in fused])
+        return results
+    
+    async def asimilarity_search(self, query: str, k: int = 4) -> List[Document]:
+        """
+        Perform similarity search without blocking the event loop.
+        
+        The query embedding and FAISS search run on the bounded search pool.
+        
+        Args:
+            query: Search query
+            k: Number of results to return
+            
+        Returns:
+            List of relevant documents
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._search_executor, self.similarity_search, query, k
+        )
+    
+    async def asimilarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, Optional[float]]]:
+        """Similarity search with scores on the bounded search pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._search_executor, self.similarity_search_with_score, query, k
+        )
+    
+    async def aembed_query(self, query: str) -> List[float]:
+        """Embed a query on the bounded search pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._search_executor, self.embed_query, query)
+    
+    async def asimilarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        query: Optional[str] = None
+    ) -> List[Document]:
+        """Search with a precomputed embedding on the bounded search pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._search_executor, self.similarity_search_by_vector, embedding, k, query
+        )
+    
+    async def asimilarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        query: Optional[str] = None
+    ) -> List[Tuple[Document, Optional[float]]]:
+        """Search with a precomputed embedding, with scores, on the bounded search pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._search_executor, self.similarity_search_with_score_by_vector, embedding, k, query
+        )
+    
+    async def aembed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed a batch of queries on the bounded search pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._search_executor, self.embed_queries, queries)
+    
+    async def asimilarity_search_by_vectors(
+        self,
+        embeddings: np.ndarray,
+        k: int = 4,
+        queries: Optional[List[str]] = None
+    ) -> List[List[Document]]:
+        """Search a batch of precomputed embeddings on the bounded search pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._search_executor, self.similarity_search_by_vectors, embeddings, k, queries
+        )
+    
+    async def asimilarity_search_with_score_by_vectors(
+        self,
+        embeddings: np.ndarray,
+        k: int = 4,
+        queries: Optional[List[str]] = None
+    ) -> List[List[Tuple[Document, Optional[float]]]]:
+        """Search a batch of precomputed embeddings, with scores, on the bounded search pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._search_executor, self.similarity_search_with_score_by_vectors, embeddings, k, queries
+        )
+    
+    @property
+    def index_version(self) -> int:
+        """Version of the served index; increases with every change, so caches can compare against it."""
+        index = self.vector_index
+        return index.version if index is not None else 0
+    
+    @property
+    def content_version(self) -> int:
+        """Version of the served chunks; unlike ``index_version``, compaction and rebuilds leave it unchanged."""
+        index = self.vector_index
+        return index.content_version if index is not None else 0
+    
     def is_initialized(self) -> bool:
         """Check if vectorstore is initialized."""
-        return self.vectorstore is not None
+        return self.vector_index is not None
 
 
 
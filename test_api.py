@@ -82,13 +82,21 @@ def test_ingest():
             f"{API_BASE}/api/ingest",
             json={"path": "./data"}
         )
-        data = response.json()
-        if data['success']:
+        job = response.json()
+        print(f"   Job queued: {job['job_id']}")
+        
+        # Ingestion runs in the background; poll the job until it finishes
+        while job['status'] in ("queued", "running"):
+            time.sleep(0.5)
+            job = requests.get(f"{API_BASE}/api/jobs/{job['job_id']}").json()
+        
+        data = job['result']
+        if data and data['success']:
             print(f"✅ Ingest successful")
             print(f"   Documents processed: {data['documents_processed']}")
             print(f"   Message: {data['message']}")
         else:
-            print(f"⚠️  {data['message']}")
+            print(f"⚠️  Ingest {job['status']}: {data['message'] if data else job['error']}")
         return True
     except Exception as e:
         print(f"❌ Error: {e}")
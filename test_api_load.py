@@ -0,0 +1,105 @@
+"""Load test for the async query path against a stub LLM (no network needed)."""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+import api.main as api_main
+from config import Config
+from conftest import SlowChatModel
+from src.utils.rag_chain import RAGChain
+from src.utils.session_store import InMemorySessionStore
+
+
+@pytest.fixture
+def llm() -> SlowChatModel:
+    """Stub LLM whose calls stay in flight until its gate is set."""
+    return SlowChatModel(gate=threading.Event())
+
+
+@pytest.fixture
+def api_app(monkeypatch, vectorstore_manager, llm):
+    """API app wired to the fake vector store and the gated stub LLM."""
+    chain = RAGChain(llm=llm, vectorstore_manager=vectorstore_manager)
+    monkeypatch.setattr(api_main, "rag_chain", chain)
+    monkeypatch.setattr(api_main, "vectorstore_manager", vectorstore_manager)
+    monkeypatch.setattr(api_main, "session_store", InMemorySessionStore())
+    monkeypatch.setattr(api_main, "query_semaphore", asyncio.Semaphore(16))
+    return api_main.app
+
+
+async def _until_in_flight(llm: SlowChatModel, count: int) -> None:
+    """Wait until ``count`` LLM calls are held at the gate."""
+    while llm.in_flight < count:
+        await asyncio.sleep(0.005)
+
+
+def _run(scenario):
+    # A timeout only catches a hang (e.g. calls that never overlap); it bounds nothing in a passing run
+    return asyncio.run(asyncio.wait_for(scenario, timeout=30))
+
+
+def test_concurrent_clients_overlap_llm_calls(api_app, llm):
+    """With a non-blocking path, queries from 8 clients are all waiting on the LLM at once."""
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=api_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            queries = [
+                asyncio.create_task(client.post("/api/query", json={"question": "reset password"}))
+                for _ in range(8)
+            ]
+            await _until_in_flight(llm, 8)
+            llm.gate.set()
+            return await asyncio.gather(*queries)
+
+    responses = _run(scenario())
+
+    assert [response.status_code for response in responses] == [200] * 8
+    assert llm.peak_in_flight == 8
+
+
+def test_status_not_blocked_by_slow_queries(api_app, llm):
+    """/api/status must answer while LLM calls are in flight."""
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=api_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            queries = [
+                asyncio.create_task(client.post("/api/query", json={"question": "vpn token"}))
+                for _ in range(4)
+            ]
+            await _until_in_flight(llm, 4)
+            status = await client.get("/api/status")
+            held = llm.in_flight  # None of the queries can finish before the gate opens
+            llm.gate.set()
+            await asyncio.gather(*queries)
+        return status, held
+
+    status, held = _run(scenario())
+    assert status.status_code == 200
+    assert held == 4
+
+
+def test_batch_endpoint_answers_questions_concurrently(api_app, llm):
+    """/api/query/batch answers every question in order, overlapping the LLM calls."""
+    questions = ["reset password", "vpn token", "printer queue", "expenses"]
+    overlap = min(len(questions), Config.BATCH_QUERY_CONCURRENCY)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=api_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            batch = asyncio.create_task(client.post("/api/query/batch", json={"questions": questions}))
+            await _until_in_flight(llm, overlap)
+            llm.gate.set()
+            return await batch
+
+    response = _run(scenario())
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 4 and not any(result["error"] for result in results)
+    assert llm.peak_in_flight == overlap
+    assert api_main.session_store.stats()["created"] == 0
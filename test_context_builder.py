@@ -0,0 +1,100 @@
+"""Tests for token-budgeted prompt packing, the relevance threshold and summary memory."""
+
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from src.utils.context_builder import (
+    SUMMARY_MARKER, TOKEN_COUNT_KEY, ContextBuilder, ContextSettings, count_tokens, trim_history, truncate_tokens
+)
+from src.utils.rag_chain import RAGChain
+
+TEMPLATE = "Answer from the context.\n{chat_history}\n{context}\nQuestion: {question}"
+
+
+def chunk(text, source, tokens=None):
+    metadata = {"source": source}
+    if tokens is not None:
+        metadata[TOKEN_COUNT_KEY] = tokens
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_packs_chunks_in_rank_order_within_the_budget():
+    """Chunks that do not fit are skipped for smaller ones; sizes come from the ingest-time counts."""
+    builder = ContextBuilder(TEMPLATE, ContextSettings(max_prompt_tokens=120))
+    docs = [
+        chunk("first chunk", "a.txt", tokens=40),
+        chunk("huge chunk", "b.txt", tokens=500),   # Recorded count wins over the short text
+        chunk("third chunk", "c.txt", tokens=30),
+        chunk("fourth chunk", "d.txt", tokens=40),
+    ]
+
+    packed = builder.build("What is it?", docs, [])
+
+    assert [doc.metadata["source"] for doc in packed["docs"]] == ["a.txt", "c.txt"]
+    assert "[Source 2: c.txt]\nthird chunk" in packed["context"]
+    assert packed["chat_history"] == "No previous conversation."
+    assert builder.template_tokens + 40 + 30 < packed["prompt_tokens"] <= 120
+
+
+def test_history_is_trimmed_and_oldest_exchanges_dropped_first():
+    """Long answers are cut to the entry limit; the history share keeps the most recent exchanges."""
+    settings = ContextSettings(max_prompt_tokens=1000, max_history_tokens=60, max_history_entry_tokens=20)
+    builder = ContextBuilder(TEMPLATE, settings)
+    long_answer = "word " * 500
+    history = [("oldest question", "short"), ("middle question", long_answer), ("latest question", long_answer)]
+
+    packed = builder.build("And then?", [], history)
+
+    assert "oldest" not in packed["chat_history"]
+    assert packed["chat_history"].startswith("Q1: latest question")
+    assert count_tokens(packed["chat_history"]) <= 60
+    assert truncate_tokens(long_answer, 20).endswith("...")
+    assert packed["context"] == "No relevant context found."
+
+
+def test_trimming_history_keeps_the_rolling_summary():
+    """Only exchanges count towards the limit; the summary before them is always kept."""
+    exchanges = [(f"q{i}", f"a{i}") for i in range(4)]
+    assert trim_history(exchanges, 2) == exchanges[2:]
+    assert trim_history([(SUMMARY_MARKER, "earlier")] + exchanges, 2) == [(SUMMARY_MARKER, "earlier")] + exchanges[2:]
+
+
+def test_chain_reports_prompt_tokens_and_drops_low_scores(vectorstore_manager):
+    """Ingested chunks carry token counts; chunks below min_score never reach the prompt."""
+    docs = vectorstore_manager.similarity_search_with_score("VPN hardware token approval", k=5)
+    assert all(TOKEN_COUNT_KEY in doc.metadata for doc, _ in docs)
+    best_score = docs[0][1]
+
+    llm = FakeListChatModel(responses=["answer"] * 5)
+    chain = RAGChain(llm, vectorstore_manager, top_k=5, context_settings=ContextSettings(min_score=best_score))
+    result = chain.query("VPN hardware token approval", maintain_history=False)
+
+    assert [src["metadata"]["source"] for src in result["sources"]] == [docs[0][0].metadata["source"]]
+    assert 0 < result["prompt_tokens"] <= chain.context_settings.max_prompt_tokens
+
+    # The recorded count does not change a chunk's identity, so re-ingesting is still a no-op
+    stored = [doc for doc, _ in docs]
+    assert vectorstore_manager.add_documents(stored) == 0
+
+
+def test_summary_memory_keeps_a_rolling_summary_and_the_last_exchange(vectorstore_manager):
+    """Older exchanges are folded into the summary after each answer; the history share stays bounded."""
+    long_answer = "The VPN needs a hardware token. " * 40
+    llm = FakeListChatModel(responses=[long_answer, long_answer, "Summary one.", long_answer, "Summary two."])
+    settings = ContextSettings(memory="summary", max_summary_tokens=30, max_history_entry_tokens=50)
+    chain = RAGChain(llm, vectorstore_manager, context_settings=settings)
+
+    for question in ["How do I get VPN access?", "Who approves it?"]:
+        chain.query(question)
+        chain.wait_for_summary()
+    assert chain.chat_history == [(SUMMARY_MARKER, "Summary one."), ("Who approves it?", long_answer)]
+
+    result = chain.query("And how long does it take?")
+    chain.wait_for_summary()
+    assert chain.chat_history == [(SUMMARY_MARKER, "Summary two."), ("And how long does it take?", long_answer)]
+
+    packed = chain.context_builder.build("Anything else?", [], chain.chat_history)
+    assert packed["chat_history"].startswith("Summary of the earlier conversation: Summary two.\n\nQ1: And how long")
+    assert count_tokens(packed["chat_history"]) <= 30 + 2 * 50 + 20
+    assert 0 < result["prompt_tokens"] <= settings.max_prompt_tokens
+    assert chain._get_contextualized_question("and then?", chain.chat_history) == "And how long does it take? and then?"
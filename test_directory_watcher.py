@@ -0,0 +1,78 @@
+"""Tests for the polling directory watcher."""
+
+from src.utils.directory_watcher import DirectoryWatcher
+from src.utils.document_processor import DocumentProcessor
+from src.utils.ingestion import IngestionPipeline
+
+
+def write_page(path, topic, paragraphs=10):
+    text = " ".join(f"The {topic} guide, paragraph {j}." for j in range(paragraphs))
+    path.write_text(text, encoding="utf-8")
+
+
+def test_watcher_debounces_and_syncs_only_the_difference(tmp_path, vectorstore_manager):
+    """New, edited and deleted files are synced once the directory settles."""
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    write_page(corpus / "a.txt", "alpha")
+    write_page(corpus / "b.txt", "beta")
+    pipeline = IngestionPipeline(DocumentProcessor(chunk_size=200, chunk_overlap=20), vectorstore_manager)
+    pipeline.ingest(corpus)
+    embeddings = vectorstore_manager.embeddings
+    embedded = embeddings.document_calls
+
+    watcher = DirectoryWatcher(corpus, pipeline, debounce=3600)
+    assert watcher.poll() is None  # Matches the registry: nothing to do
+    assert embeddings.document_calls == embedded
+
+    write_page(corpus / "c.txt", "gamma")
+    write_page(corpus / "a.txt", "alpha", paragraphs=12)
+    (corpus / "b.txt").unlink()
+    assert watcher.poll() is None  # Still within the debounce window
+
+    watcher.debounce = 0
+    result = watcher.poll()
+    assert (result.files_added, result.files_updated, result.files_deleted) == (1, 1, 1)
+    assert result.chunks_removed > 0 and result.chunks_added > 0
+    registry = vectorstore_manager.content_registry
+    assert registry.chunk_ids_for_source(str(corpus / "b.txt")) == []
+    assert registry.chunk_ids_for_source(str(corpus / "c.txt"))
+    assert watcher.poll() is None
+
+
+def test_watcher_catches_up_with_changes_made_while_stopped(tmp_path, vectorstore_manager):
+    """The first scan is compared with the registry, so offline deletes are applied."""
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    write_page(corpus / "a.txt", "alpha")
+    write_page(corpus / "b.txt", "beta")
+    pipeline = IngestionPipeline(DocumentProcessor(chunk_size=200, chunk_overlap=20), vectorstore_manager)
+    pipeline.ingest(corpus)
+
+    (corpus / "b.txt").unlink()
+    (corpus / "a.txt").touch()
+    result = DirectoryWatcher(corpus, pipeline, debounce=0).poll()
+
+    assert (result.files_added, result.files_deleted, result.chunks_added) == (0, 1, 0)
+    assert vectorstore_manager.content_registry.chunk_ids_for_source(str(corpus / "a.txt"))
+
+
+def test_file_deleted_between_scan_and_sync_is_treated_as_removed(tmp_path, vectorstore_manager):
+    """A file that vanishes after it was listed neither fails the sync nor keeps its chunks."""
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    write_page(corpus / "a.txt", "alpha")
+    pipeline = IngestionPipeline(DocumentProcessor(chunk_size=200, chunk_overlap=20), vectorstore_manager)
+    pipeline.ingest(corpus)
+
+    watcher = DirectoryWatcher(corpus, pipeline, debounce=3600)
+    write_page(corpus / "draft.txt", "draft")
+    assert watcher.poll() is None
+    (corpus / "draft.txt").unlink()  # After the scan listed it, before the sync loads it
+    result = watcher.sync()
+    assert (result.files_added, result.chunks_added, result.failed_files) == (0, 0, [])
+
+    (corpus / "a.txt").unlink()
+    progress = pipeline.ingest_files([corpus / "a.txt"])
+    assert progress.chunks_removed > 0 and progress.files_failed == 0
+    assert vectorstore_manager.content_registry.chunk_ids_for_source(str(corpus / "a.txt")) == []
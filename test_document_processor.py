@@ -0,0 +1,45 @@
+"""Tests for directory loading in DocumentProcessor."""
+
+from src.utils.document_processor import DocumentProcessor
+
+
+def write_corpus(directory):
+    for i in range(8):
+        (directory / f"note_{i}.txt").write_text(f"Note {i}. " * 120, encoding="utf-8")
+    (directory / "table.csv").write_text("id,text\n1,first row\n2,second row\n", encoding="utf-8")
+    (directory / "broken.txt").write_bytes(b"\xff\xfe\xfa not utf-8")
+    (directory / "ignored.bin").write_bytes(b"\x00")
+
+
+def test_process_pool_streams_results_in_file_order(tmp_path):
+    """Worker processes chunk files and results come back in sorted file order."""
+    write_corpus(tmp_path)
+    processor = DocumentProcessor(chunk_size=200, chunk_overlap=20, load_workers=2)
+
+    results = list(processor.iter_directory_chunks(tmp_path))
+
+    names = [r.path.name for r in results]
+    assert names == sorted(names)
+    assert "ignored.bin" not in names
+    assert all(len(chunk.page_content) <= 200 for r in results for chunk in r.chunks)
+
+
+def test_bad_file_does_not_fail_the_batch(tmp_path):
+    """An unreadable file is reported and the other files are still ingested."""
+    write_corpus(tmp_path)
+    processor = DocumentProcessor(chunk_size=200, chunk_overlap=20, load_workers=2)
+
+    results = {r.path.name: r for r in processor.iter_directory_chunks(tmp_path)}
+
+    assert results["broken.txt"].error is not None
+    assert results["broken.txt"].chunks == []
+    assert all(r.error is None and r.chunks for name, r in results.items() if name != "broken.txt")
+
+
+def test_parallel_and_serial_loading_match(tmp_path):
+    """The process pool produces exactly the chunks of in-process loading."""
+    write_corpus(tmp_path)
+    serial = DocumentProcessor(chunk_size=200, chunk_overlap=20).load_and_process(tmp_path)
+    parallel = DocumentProcessor(chunk_size=200, chunk_overlap=20, load_workers=3).load_and_process(tmp_path)
+
+    assert [(c.page_content, c.metadata) for c in parallel] == [(c.page_content, c.metadata) for c in serial]
@@ -0,0 +1,69 @@
+"""Tests for EmbeddingEngine batching, using a stand-in for SentenceTransformer."""
+
+import numpy as np
+
+from src.utils.embedding_engine import EmbeddingEngine, EmbeddingSettings
+
+
+class RecordingModel:
+    """Implements the SentenceTransformer encode API and records how it is called."""
+
+    def __init__(self):
+        self.calls = []
+        self.pools = []
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, convert_to_numpy=True, show_progress_bar=False):
+        self.calls.append(("encode", list(texts), batch_size, normalize_embeddings))
+        return np.array([[len(t), sum(map(ord, t)) % 97] for t in texts], dtype=np.float32)
+
+    def encode_multi_process(self, texts, pool, batch_size=32, normalize_embeddings=False):
+        self.calls.append(("multi", list(texts), batch_size, normalize_embeddings))
+        return np.array([[len(t), sum(map(ord, t)) % 97] for t in texts], dtype=np.float32)
+
+    def start_multi_process_pool(self, target_devices):
+        pool = {"devices": target_devices}
+        self.pools.append(pool)
+        return pool
+
+    def stop_multi_process_pool(self, pool):
+        self.pools.remove(pool)
+
+
+TEXTS = ["short", "a much longer chunk of text", "mid length text", "x"]
+
+
+def test_sorts_by_length_and_restores_input_order():
+    """Texts reach the model longest first; vectors come back in the caller's order."""
+    model = RecordingModel()
+    engine = EmbeddingEngine("fake", EmbeddingSettings(batch_size=8, normalize=True), model=model)
+
+    vectors = engine.embed_documents(TEXTS)
+
+    _, sent, batch_size, normalize = model.calls[0]
+    assert sent == sorted(TEXTS, key=len, reverse=True)
+    assert (batch_size, normalize) == (8, True)
+    assert [v[0] for v in vectors] == [len(t) for t in TEXTS]
+
+
+def test_multi_process_pool_used_for_large_document_batches():
+    """Documents beyond one batch go through the pool; queries never do."""
+    model = RecordingModel()
+    engine = EmbeddingEngine("fake", EmbeddingSettings(batch_size=2, num_processes=3), model=model)
+
+    engine.embed_query("how do I reset my password")
+    engine.embed_documents(TEXTS)
+
+    assert [kind for kind, *_ in model.calls] == ["encode", "multi"]
+    assert model.pools[0]["devices"] == ["cpu"] * 3
+
+    engine.close()
+    assert model.pools == []
+
+
+def test_engine_leaves_process_wide_torch_threads_alone():
+    """Building an engine never touches torch's thread count; configure_torch_threads does that."""
+    model = RecordingModel()
+    # Would import torch (not needed by the stand-in model) if the engine applied the setting itself
+    engine = EmbeddingEngine("fake", EmbeddingSettings(torch_threads=2), model=model)
+
+    assert engine.embed_query("x") == [1.0, 23.0]
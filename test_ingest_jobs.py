@@ -0,0 +1,58 @@
+"""Tests for background ingestion jobs."""
+
+import threading
+
+from src.utils.document_processor import DocumentProcessor
+from src.utils.ingestion import IngestionPipeline
+from src.utils.ingest_jobs import IngestJobQueue
+
+from test_ingestion import SlowIndex, write_corpus
+
+
+def test_running_job_can_be_cancelled_between_batches(tmp_path):
+    """Cancelling stops a running job before its next batch and keeps what it added."""
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    write_corpus(corpus, files=20)
+    processor = DocumentProcessor(chunk_size=200, chunk_overlap=20)
+    index = SlowIndex(processor, tmp_path / "index", delay=0.05)
+    first_batch = threading.Event()
+    add_documents = index.add_documents
+
+    def signalling_add(documents):
+        first_batch.set()
+        return add_documents(documents)
+
+    index.add_documents = signalling_add
+    jobs = IngestJobQueue(IngestionPipeline(processor, index, batch_size=4), max_workers=1)
+
+    running = jobs.submit(corpus)
+    queued = jobs.submit(corpus)
+    assert first_batch.wait(timeout=10)
+    assert jobs.cancel(queued.job_id).status == "cancelled"
+    jobs.cancel(running.job_id)
+    running.future.result(timeout=10)
+
+    assert running.status == "cancelled"
+    assert 0 < running.progress.chunks_added == index.added < 20 * 6
+    assert running.progress.files_processed < 21
+    assert queued.started_at is None
+    jobs.shutdown()
+
+
+def test_finished_jobs_beyond_history_are_dropped(tmp_path, vectorstore_manager):
+    """Only the most recent finished jobs are kept."""
+    (tmp_path / "note.txt").write_text("A short note about the weekly report.", encoding="utf-8")
+    pipeline = IngestionPipeline(DocumentProcessor(chunk_size=200, chunk_overlap=20), vectorstore_manager)
+    jobs = IngestJobQueue(pipeline, history_size=2)
+
+    submitted = [jobs.submit(tmp_path) for _ in range(4)]
+    for job in submitted:
+        job.future.result(timeout=10)
+    jobs.submit(tmp_path).future.result(timeout=10)
+
+    assert [job.status for job in submitted] == ["completed"] * 4
+    assert submitted[0].progress.chunks_added == 1
+    assert [job.job_id for job in jobs.list()][-1] not in {job.job_id for job in submitted}
+    assert len(jobs.list()) == 2
+    jobs.shutdown()
@@ -0,0 +1,179 @@
+"""Tests for the streaming ingestion pipeline."""
+
+import asyncio
+import time
+
+import httpx
+
+import api.main as api_main
+from src.utils.content_registry import ContentRegistry
+from src.utils.document_processor import DocumentProcessor
+from src.utils.ingestion import IngestionPipeline
+from src.utils.ingest_jobs import IngestJobQueue
+
+
+def write_corpus(directory, files=12):
+    for i in range(files):
+        text = " ".join(f"Section {i} paragraph {j} of the handbook." for j in range(25))
+        (directory / f"page_{i:02d}.txt").write_text(text, encoding="utf-8")
+    (directory / "broken.txt").write_bytes(b"\xff\xfe\xfa not utf-8")
+
+
+class SlowIndex:
+    """Stands in for VectorStoreManager, recording how far loading ran ahead of indexing."""
+
+    def __init__(self, processor, registry_dir, delay=0.02):
+        self.content_registry = ContentRegistry(registry_dir)
+        self.delay = delay
+        self.loaded = 0
+        self.added = 0
+        self.max_backlog = 0
+        original = processor.iter_file_chunks
+
+        def counting(file_paths):
+            for result in original(file_paths):
+                self.loaded += len(result.chunks)
+                yield result
+
+        processor.iter_file_chunks = counting
+
+    def add_documents(self, documents):
+        self.max_backlog = max(self.max_backlog, self.loaded - self.added)
+        time.sleep(self.delay)
+        self.added += len(documents)
+        return len(documents)
+
+
+def test_pipeline_indexes_in_batches_and_reports_progress(tmp_path, vectorstore_manager):
+    """Chunks are added batch by batch, with progress after each one and bad files listed."""
+    write_corpus(tmp_path)
+    processor = DocumentProcessor(chunk_size=200, chunk_overlap=20)
+    expected = len(processor.load_and_process(tmp_path))
+    pipeline = IngestionPipeline(processor, vectorstore_manager, batch_size=10, queue_size=2)
+    before = vectorstore_manager.vector_index.ntotal
+
+    updates = []
+    progress = pipeline.ingest(tmp_path, on_progress=lambda p: updates.append(p.chunks_added))
+
+    assert progress.chunks_added == expected
+    assert progress.batches_added == -(-expected // 10)
+    assert progress.files_total == progress.files_processed == 13
+    assert progress.failed_files == [str(tmp_path / "broken.txt")]
+    assert updates == sorted(updates) and updates[-1] == expected
+    assert vectorstore_manager.vector_index.ntotal == before + expected
+
+
+def test_loading_is_throttled_by_slow_indexing(tmp_path):
+    """Backpressure: the loader never runs more than the queue ahead of the index."""
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    write_corpus(corpus, files=40)
+    processor = DocumentProcessor(chunk_size=200, chunk_overlap=20)
+    index = SlowIndex(processor, tmp_path / "index")
+    pipeline = IngestionPipeline(processor, index, batch_size=8, queue_size=2)
+
+    progress = pipeline.ingest(corpus)
+
+    chunks_per_file = 6
+    assert progress.chunks_added == index.added == index.loaded
+    # queued batches + the batch being filled + the batch being indexed, plus one file's chunks
+    assert index.max_backlog <= (2 + 2) * 8 + chunks_per_file
+
+
+def test_ingest_endpoint_reports_file_counts(tmp_path, monkeypatch, vectorstore_manager):
+    """/api/ingest queues a job whose result carries the pipeline's counters."""
+    write_corpus(tmp_path, files=3)
+    pipeline = IngestionPipeline(DocumentProcessor(chunk_size=200, chunk_overlap=20), vectorstore_manager)
+    jobs = IngestJobQueue(pipeline)
+    monkeypatch.setattr(api_main, "ingest_jobs", jobs)
+
+    async def post():
+        transport = httpx.ASGITransport(app=api_main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            queued = await client.post("/api/ingest", json={"path": str(tmp_path)})
+            jobs.get(queued.json()["job_id"]).future.result(timeout=10)
+            return queued, await client.get(f"/api/jobs/{queued.json()['job_id']}")
+
+    queued, finished = asyncio.run(post())
+    assert queued.status_code == 202
+    body = finished.json()
+    assert body["status"] == "completed"
+    assert body["result"]["success"] is True
+    assert body["result"]["files_processed"] == 4
+    assert body["result"]["files_failed"] == 1
+    assert body["result"]["documents_processed"] > 0
+    jobs.shutdown()
+
+
+def test_reingest_skips_unchanged_files_and_seen_chunks(tmp_path, vectorstore_manager):
+    """A second ingest of the same corpus adds nothing and loads nothing."""
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    write_corpus(corpus, files=4)
+    embeddings = vectorstore_manager.embeddings
+    pipeline = IngestionPipeline(DocumentProcessor(chunk_size=200, chunk_overlap=20), vectorstore_manager)
+
+    first = pipeline.ingest(corpus)
+    size = vectorstore_manager.vector_index.ntotal
+    embedded = embeddings.document_calls
+    assert first.chunks_added > 0
+
+    second = pipeline.ingest(corpus)
+    assert (second.files_skipped, second.files_processed, second.chunks_added) == (4, 1, 0)
+    assert vectorstore_manager.vector_index.ntotal == size
+    assert embeddings.document_calls == embedded
+
+    # Touched but identical: skipped by hash. Edited: only its new chunks are added.
+    (corpus / "page_00.txt").touch()
+    page = corpus / "page_01.txt"
+    page.write_text(page.read_text(encoding="utf-8") + " A new closing paragraph.", encoding="utf-8")
+    third = pipeline.ingest(corpus)
+    assert third.files_skipped == 3
+    assert 0 < third.chunks_added < first.chunks_added
+    assert third.chunks_skipped > 0
+
+
+def test_reingesting_an_edited_file_removes_its_stale_chunks(tmp_path, vectorstore_manager):
+    """An edited file's old chunks stop matching searches once the corpus is ingested again."""
+    policy = tmp_path / "parking.txt"
+    policy.write_text("The parking garage fee is ten dollars per day.", encoding="utf-8")
+    pipeline = IngestionPipeline(DocumentProcessor(chunk_size=200, chunk_overlap=20), vectorstore_manager)
+    pipeline.ingest(tmp_path)
+
+    policy.write_text("The parking garage fee is twenty dollars per day.", encoding="utf-8")
+    progress = pipeline.ingest(tmp_path)
+
+    assert (progress.chunks_added, progress.chunks_removed) == (1, 1)
+    found = [doc.page_content for doc in vectorstore_manager.similarity_search("parking garage fee", k=10)]
+    assert "The parking garage fee is twenty dollars per day." in found
+    assert not any("ten dollars" in text for text in found)
+    assert len(vectorstore_manager.content_registry.chunk_ids_for_source(str(policy))) == 1
+
+
+def test_document_endpoints_update_and_delete_one_file(tmp_path, monkeypatch, vectorstore_manager):
+    """PUT /api/documents re-indexes only the edit and rejects unreadable files; DELETE removes the file's chunks."""
+    write_corpus(tmp_path, files=2)
+    pipeline = IngestionPipeline(DocumentProcessor(chunk_size=200, chunk_overlap=20), vectorstore_manager)
+    monkeypatch.setattr(api_main, "ingestion_pipeline", pipeline)
+    monkeypatch.setattr(api_main, "vectorstore_manager", vectorstore_manager)
+    pipeline.ingest(tmp_path)
+    page = tmp_path / "page_00.txt"
+    page.write_text(page.read_text(encoding="utf-8") + " A new closing paragraph.", encoding="utf-8")
+
+    async def call():
+        transport = httpx.ASGITransport(app=api_main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            updated = await client.put("/api/documents", json={"path": str(page)})
+            unreadable = await client.put("/api/documents", json={"path": str(tmp_path / "broken.txt")})
+            deleted = await client.delete("/api/documents", params={"path": str(page)})
+            missing = await client.delete("/api/documents", params={"path": str(page)})
+            return updated, unreadable, deleted, missing
+
+    updated, unreadable, deleted, missing = asyncio.run(call())
+    assert updated.status_code == 200
+    assert unreadable.status_code == 422
+    assert unreadable.json()["detail"].startswith(f"Could not load {tmp_path / 'broken.txt'}: ")
+    assert updated.json()["chunks_added"] == updated.json()["chunks_removed"] == 1
+    assert deleted.json()["chunks_removed"] > 0
+    assert missing.status_code == 404
+    assert vectorstore_manager.content_registry.chunk_ids_for_source(str(page)) == []
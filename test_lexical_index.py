@@ -0,0 +1,105 @@
+"""Tests for the BM25 inverted index and hybrid retrieval."""
+
+from langchain_core.documents import Document
+
+from src.utils.lexical_index import HybridSettings, LexicalIndex, reciprocal_rank_fusion, tokenize
+
+
+def test_tokenize_keeps_codes_whole_and_split():
+    """Error codes and ticket ids are single terms, and their parts match too."""
+    terms = tokenize("The VPN fails with ERR-1042 (see KB0012345, v2.3.1)")
+
+    assert {"vpn", "fails", "err-1042", "err", "1042", "kb0012345", "v2.3.1"} <= set(terms)
+    assert "the" not in terms and "with" not in terms
+
+
+def test_reciprocal_rank_fusion_weights_each_ranking():
+    """A chunk ranked by both sides beats one ranked by a single side; weights tilt the rest."""
+    a, b, c = (Document(id=name, page_content=name) for name in "abc")
+
+    fused = reciprocal_rank_fusion([[a, b], [c, b]], [1.0, 1.0])
+    assert [doc.id for doc in fused] == ["b", "a", "c"]
+
+    fused = reciprocal_rank_fusion([[a, b], [c, b]], [1.0, 3.0])
+    assert [doc.id for doc in fused][:2] == ["b", "c"]
+    assert reciprocal_rank_fusion([[a], [c]], [0.0, 1.0]) == [c]
+
+
+def test_hybrid_search_finds_exact_terms_across_delta_compaction_and_reload(vectorstore_manager):
+    """BM25 postings follow adds, compaction, reloads and deletes like the vectors do."""
+    manager = vectorstore_manager
+    manager.hybrid_settings = HybridSettings(dense_weight=0.0, lexical_weight=1.0)
+    manager.add_documents([
+        Document(page_content="Error ERR-7781 means the license server is unreachable.",
+                 metadata={"source": "kb/err_7781.txt"}),
+        Document(page_content="Error ERR-7782 means the license expired.",
+                 metadata={"source": "kb/err_7782.txt"}),
+    ])
+
+    def top_source(query):
+        return manager.similarity_search(query, k=1)[0].metadata["source"]
+
+    # In the delta
+    assert top_source("What does ERR-7781 mean?") == "kb/err_7781.txt"
+    assert manager.lexical_search("printer queues", k=1)[0].metadata["source"] == "kb/article_2.txt"
+
+    # In the compacted base, stored next to index.faiss
+    manager.compact()
+    base_dir = manager.vector_index.base_dir
+    assert (base_dir / "index.faiss").exists() and LexicalIndex.exists(base_dir)
+    assert top_source("What does ERR-7781 mean?") == "kb/err_7781.txt"
+
+    reloaded = type(manager)(manager.vectorstore_path, hybrid_settings=manager.hybrid_settings)
+    assert reloaded.similarity_search("ERR-7782", k=1)[0].metadata["source"] == "kb/err_7782.txt"
+
+    # Tombstoned chunks never come back, before or after the next compaction
+    manager.delete_source("kb/err_7781.txt")
+    assert all(doc.metadata["source"] != "kb/err_7781.txt" for doc in manager.lexical_search("ERR-7781", k=5))
+    manager.compact()
+    assert all(doc.metadata["source"] != "kb/err_7781.txt" for doc in manager.lexical_search("ERR-7781", k=5))
+    assert manager.lexical_search("ERR-7782", k=1)[0].metadata["source"] == "kb/err_7782.txt"
+
+
+def test_lexical_weight_zero_is_dense_only(vectorstore_manager):
+    """With no lexical weight, hybrid search returns exactly the dense ranking."""
+    vectorstore_manager.hybrid_settings = HybridSettings(lexical_weight=0.0)
+    query = "VPN hardware token"
+    dense = vectorstore_manager.similarity_search_by_vector(vectorstore_manager.embed_query(query), k=3)
+
+    assert vectorstore_manager.similarity_search(query, k=3) == dense
+
+
+def test_pruned_lexical_search_matches_exact_bm25(vectorstore_manager, monkeypatch):
+    """Pruning common query terms never changes the top-k results or their BM25 scores."""
+    from src.utils import vector_index
+
+    vectorstore_manager.add_documents([
+        Document(page_content=text, metadata={"source": f"kb/error_{i}.txt"})
+        for i, text in enumerate([
+            "Error ERR-7781 means the license server is unreachable.",
+            "Error ERR-7782 means the license expired.",
+            "An error in the printer queue is retried.",
+            "Error reports go to the operations team.",
+            "Error: error, error.",
+            "The license agreement covers every seat bought by the company for the office.",
+        ])
+    ])
+    index = vectorstore_manager.vector_index
+
+    def search(query, k):
+        return [(doc.metadata["source"], round(score, 5)) for doc, score in index.lexical_search(query, k=k)]
+
+    queries = ["license error", "license server error", "ERR-7782 error"]
+    monkeypatch.setattr(vector_index, "COMMON_TERM_RATIO", 1.0)
+    exact = {(query, k): search(query, k) for query in queries for k in range(1, 8)}
+    monkeypatch.setattr(vector_index, "COMMON_TERM_RATIO", 0.3)
+    pruned = {(query, k): search(query, k) for query in queries for k in range(1, 8)}
+
+    assert pruned == exact
+    # The chunk with only the common term outranks a chunk with only the rare one
+    sources = [source for source, _ in exact[("license error", 7)]]
+    assert sources.index("kb/error_4.txt") < sources.index("kb/error_5.txt")
+
+    # A code is matched whole; its parts are only a fallback for unknown codes
+    assert [doc.metadata["source"] for doc, _ in index.lexical_search("ERR-7781", k=10)] == ["kb/error_0.txt"]
+    assert len(index.lexical_search("ERR-1234", k=10)) == 2
@@ -0,0 +1,75 @@
+"""Tests for the Prometheus metrics and the cost of the query-path instrumentation."""
+
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from src.utils import metrics
+from src.utils.rag_chain import RAGChain
+
+STAGES = [
+    metrics.QUERY_EMBEDDING_SECONDS,
+    metrics.FAISS_SEARCH_SECONDS,
+    metrics.LEXICAL_SEARCH_SECONDS,
+    metrics.PROMPT_BUILD_SECONDS,
+    metrics.LLM_SECONDS,
+]
+# About 7 us on a laptop (python benchmark.py metrics); the limit only catches a regression by orders of magnitude
+MAX_OVERHEAD_SECONDS = 500e-6
+
+
+def test_render_uses_the_prometheus_text_format():
+    """Histogram buckets are cumulative; labelled counters get one sample per label; empty gauges are left out."""
+    registry = metrics.MetricsRegistry()
+    latency = registry.register(metrics.Histogram("demo_seconds", "Demo latency", buckets=[0.1, 1.0]))
+    errors = registry.register(metrics.Counter("demo_errors_total", "Demo errors", ["stage"]))
+    registry.register(metrics.Gauge("demo_missing", "Gauge without a value", lambda: None))
+    registry.register(metrics.Gauge("demo_size", "Demo size", lambda: 42))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+    errors.labels("query").inc()
+    errors.labels('odd "stage"').inc(2)
+
+    text = registry.render()
+
+    assert "# TYPE demo_seconds histogram\n" in text
+    assert 'demo_seconds_bucket{le="0.1"} 2\ndemo_seconds_bucket{le="1.0"} 3\ndemo_seconds_bucket{le="+Inf"} 4\n' in text
+    assert "demo_seconds_sum 3.65\ndemo_seconds_count 4\n" in text
+    assert 'demo_errors_total{stage="odd \\"stage\\""} 2\ndemo_errors_total{stage="query"} 1\n' in text
+    assert "\ndemo_missing " not in text and "demo_size 42\n" in text
+    assert metrics.resident_memory_bytes() is None or metrics.resident_memory_bytes() > 0
+
+
+def test_every_query_stage_is_observed_once(vectorstore_manager):
+    """Each query records one observation per stage and does not touch the ingest counter."""
+    chain = RAGChain(FakeListChatModel(responses=["answer"]), vectorstore_manager)
+    chain.query("warm up", maintain_history=False)
+
+    before = [stage.count for stage in STAGES]
+    ingested = metrics.INGESTED_CHUNKS.value
+    queries = 20
+    for i in range(queries):
+        chain.query(f"How do I request VPN access {i}?", maintain_history=False)
+    observations = [(stage.count - count) / queries for stage, count in zip(STAGES, before)]
+    assert observations == [1, 1, 1, 1, 1]
+    assert metrics.INGESTED_CHUNKS.value == ingested
+
+
+def test_query_instrumentation_overhead_is_negligible():
+    """The observations one query records (five stage timings, two cache counters) cost well under a millisecond."""
+    histogram = metrics.Histogram("overhead_seconds", "Overhead probe")
+    counter = metrics.Counter("overhead_total", "Overhead probe", ["cache"])
+    rounds = 2000
+    costs = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for _ in range(len(STAGES)):
+                with histogram.time():
+                    pass
+            counter.labels("embedding").inc()
+            counter.labels("embedding").inc()
+        costs.append((time.perf_counter() - start) / rounds)
+
+    # Best of several runs, so a scheduler hiccup in one run cannot fail the test
+    assert min(costs) < MAX_OVERHEAD_SECONDS
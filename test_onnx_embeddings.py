@@ -0,0 +1,98 @@
+"""Tests for the ONNX Runtime embedding backend, using stand-ins for the session and tokenizer."""
+
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.utils.embedding_engine import EmbeddingSettings
+from src.utils.onnx_embeddings import CONFIG_NAME, OnnxEmbeddingEngine, check_parity
+from src.utils.vectorstore_manager import VectorStoreManager
+
+
+class FakeTokenizer:
+    """Implements the tokenizers API: one token per word, padded to the longest text in the batch."""
+
+    def __init__(self):
+        self.batches = []
+
+    def enable_truncation(self, max_length):
+        self.max_length = max_length
+
+    def enable_padding(self, pad_id, pad_token):
+        self.pad_id = pad_id
+
+    def encode_batch(self, texts):
+        self.batches.append(texts)
+        ids = [[len(word) for word in text.split()][:self.max_length] for text in texts]
+        width = max(len(row) for row in ids)
+        return [
+            SimpleNamespace(
+                ids=row + [self.pad_id] * (width - len(row)),
+                attention_mask=[1] * len(row) + [0] * (width - len(row)),
+                type_ids=[0] * width
+            )
+            for row in ids
+        ]
+
+
+class FakeSession:
+    """Implements the InferenceSession API: each token's hidden state is (token id, 1)."""
+
+    def __init__(self, input_names=("input_ids", "attention_mask")):
+        self.input_names = input_names
+        self.feeds = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name=name) for name in self.input_names]
+
+    def run(self, output_names, feeds):
+        self.feeds.append(feeds)
+        ids = feeds["input_ids"].astype(np.float32)
+        return [np.stack([ids, np.ones_like(ids)], axis=-1)]
+
+
+def make_engine(tmp_path, normalize=False, settings=None):
+    config = {"model_name": "fake", "max_seq_length": 8, "pooling": "mean", "normalize": normalize,
+              "pad_token_id": 99, "pad_token": "[PAD]"}
+    (tmp_path / CONFIG_NAME).write_text(json.dumps(config))
+    tokenizer, session = FakeTokenizer(), FakeSession()
+    engine = OnnxEmbeddingEngine(tmp_path, settings or EmbeddingSettings(batch_size=2),
+                                 session=session, tokenizer=tokenizer)
+    return engine, tokenizer, session
+
+
+def test_mean_pooling_skips_padding_and_keeps_input_order(tmp_path):
+    """Padded positions do not change a text's vector; batches go longest first and come back in order."""
+    engine, tokenizer, session = make_engine(tmp_path)
+    texts = ["aa bbbb", "c", "dd dd dd dd"]
+
+    vectors = np.array(engine.embed_documents(texts))
+
+    assert tokenizer.batches == [["dd dd dd dd", "aa bbbb"], ["c"]]
+    assert set(session.feeds[0]) == {"input_ids", "attention_mask"}
+    np.testing.assert_allclose(vectors, [[3.0, 1.0], [1.0, 1.0], [2.0, 1.0]])
+    np.testing.assert_allclose(engine.embed_query("aa bbbb"), vectors[0])
+
+
+def test_parity_check_against_reference(tmp_path):
+    """Matching vectors pass (also once normalized); diverging ones are rejected."""
+    (tmp_path / "reference").mkdir()
+    reference, _, _ = make_engine(tmp_path / "reference")
+    normalized, _, _ = make_engine(tmp_path, normalize=True)
+
+    assert check_parity(reference, normalized, texts=["aa bbbb", "c"]) > 0.9999
+    assert np.allclose(np.linalg.norm(normalized.embed_documents(["aa bbbb", "c"]), axis=1), 1.0)
+
+    skewed = SimpleNamespace(embed_documents=lambda texts: [[len(t), -1.0] for t in texts])
+    with pytest.raises(ValueError, match="diverge"):
+        check_parity(reference, skewed, texts=["aa bbbb", "c"])
+
+
+def test_vectorstore_manager_backend_selection(tmp_path):
+    """The onnx backend needs an export; unknown backends are rejected."""
+    with pytest.raises(FileNotFoundError, match="export-onnx"):
+        VectorStoreManager._create_embeddings("fake", EmbeddingSettings(backend="onnx", onnx_path=str(tmp_path)))
+    with pytest.raises(ValueError, match="Unknown embedding backend"):
+        VectorStoreManager._create_embeddings("fake", EmbeddingSettings(backend="tensorrt"))
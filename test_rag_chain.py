@@ -0,0 +1,159 @@
+"""Offline tests for RAGChain using fake embeddings and a fake LLM."""
+
+import asyncio
+import threading
+
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.runnables import RunnableLambda
+
+from conftest import SlowChatModel
+
+from src.utils.answer_cache import SemanticAnswerCache
+from src.utils.rag_chain import RAGChain
+
+
+def test_query_embeds_question_once(vectorstore_manager, fake_llm):
+    """Each query should cost exactly one query embedding and one search."""
+    embeddings = vectorstore_manager.embeddings
+    rag_chain = RAGChain(llm=fake_llm, vectorstore_manager=vectorstore_manager, top_k=2)
+
+    before = embeddings.query_calls
+    result = rag_chain.query("How do I reset my password?")
+
+    assert embeddings.query_calls - before == 1
+    assert result["answer"] == "Use the self service portal."
+    assert len(result["sources"]) == 2
+
+    # Follow-up questions are contextualized but still retrieved only once
+    before = embeddings.query_calls
+    rag_chain.query("And what about it?")
+    assert embeddings.query_calls - before == 1
+
+
+def test_sources_match_prompt_context(vectorstore_manager, fake_llm):
+    """The documents returned as sources are the ones placed in the prompt."""
+    rag_chain = RAGChain(llm=fake_llm, vectorstore_manager=vectorstore_manager, top_k=2)
+
+    result = rag_chain.chain.invoke({"question": "VPN hardware token"})
+
+    for doc in result["docs"]:
+        assert doc.page_content in result["context"]
+
+
+def test_sources_omit_internal_metadata(vectorstore_manager, fake_llm):
+    """The cached token count stays on the chunks and out of the sources clients see."""
+    rag_chain = RAGChain(llm=fake_llm, vectorstore_manager=vectorstore_manager, top_k=2)
+
+    docs = rag_chain.chain.invoke({"question": "VPN hardware token"})["docs"]
+    assert all("token_count" in doc.metadata for doc in docs)
+
+    sources = rag_chain.query("VPN hardware token")["sources"]
+    streamed = next(rag_chain.stream("VPN hardware token"))["sources"]
+    for source in sources + streamed:
+        assert "token_count" not in source["metadata"]
+        assert source["metadata"]["source"]
+
+
+def test_stream_sends_sources_then_tokens(vectorstore_manager, fake_llm):
+    """Sources arrive before tokens, and history is committed only on completion."""
+    rag_chain = RAGChain(llm=fake_llm, vectorstore_manager=vectorstore_manager, top_k=2)
+
+    events = rag_chain.stream("How do I reset my password?")
+    first = next(events)
+    assert first["type"] == "sources"
+    assert len(first["sources"]) == 2
+
+    token = next(events)
+    assert token["type"] == "token"
+    assert rag_chain.chat_history == []
+
+    rest = list(events)
+    done = rest[-1]
+    assert done["type"] == "done"
+    assert done["answer"] == "Use the self service portal."
+    assert token["content"] + "".join(e["content"] for e in rest[:-1]) == done["answer"]
+    assert done["ttft_ms"] is not None
+    assert rag_chain.chat_history == [("How do I reset my password?", done["answer"])]
+
+
+def test_answer_cache_skips_llm_for_near_duplicates(vectorstore_manager, sample_documents):
+    """A repeated question is answered from the cache until the indexed content changes."""
+    llm = FakeListChatModel(responses=["first", "second", "third"])
+    cache = SemanticAnswerCache(max_size=8, similarity_threshold=0.95)
+    rag_chain = RAGChain(llm=llm, vectorstore_manager=vectorstore_manager, top_k=2, answer_cache=cache)
+
+    assert rag_chain.query("reset my password", maintain_history=False)["answer"] == "first"
+    cached = rag_chain.query("Reset my password", maintain_history=False)
+    assert cached["answer"] == "first"
+    assert len(cached["sources"]) == 2
+    assert cache.stats()["hits"] == 1
+
+    vectorstore_manager.add_documents([Document(page_content="Passwords expire yearly.")])
+    assert rag_chain.query("reset my password", maintain_history=False)["answer"] == "second"
+
+    # Compaction and rebuilds publish new index versions over the same chunks
+    index_version = vectorstore_manager.index_version
+    vectorstore_manager.compact()
+    vectorstore_manager.rebuild_index()
+    assert vectorstore_manager.index_version > index_version
+    assert rag_chain.query("reset my password", maintain_history=False)["answer"] == "second"
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_batch_query_embeds_and_searches_once_and_keeps_no_history(vectorstore_manager, monkeypatch):
+    """A batch is one embedding call and one matrix search; questions never see each other."""
+    embeddings = vectorstore_manager.embeddings
+    prompts = []
+    llm = FakeListChatModel(responses=["answer"] * 10)
+    rag_chain = RAGChain(llm=llm, vectorstore_manager=vectorstore_manager, top_k=2)
+    rag_chain.answer_chain = RunnableLambda(lambda inputs: prompts.append(inputs) or "answer")
+    searches = []
+    search = vectorstore_manager.similarity_search_with_score_by_vectors
+    monkeypatch.setattr(
+        vectorstore_manager, "similarity_search_with_score_by_vectors",
+        lambda vectors, k, queries=None: searches.append(len(vectors)) or search(vectors, k, queries)
+    )
+
+    questions = ["reset my password", "VPN hardware token", "expense reports", "reset my password"]
+    before = (embeddings.query_calls, embeddings.document_calls)
+    results = rag_chain.batch_query(questions)
+
+    assert (embeddings.query_calls, embeddings.document_calls) == (before[0], before[1] + 1)
+    assert searches == [4]
+    assert [result["answer"] for result in results] == ["answer"] * 4
+    for question, result in zip(questions, results):
+        expected = vectorstore_manager.similarity_search(question, k=2)
+        assert [src["content"] for src in result["sources"]] == [doc.page_content for doc in expected]
+    assert all(inputs["chat_history"] == "No previous conversation." for inputs in prompts)
+    assert rag_chain.chat_history == []
+
+
+def test_batch_query_runs_llm_calls_concurrently_up_to_the_limit(vectorstore_manager):
+    """LLM calls overlap up to max_concurrency, and a failing call only fails its own result."""
+    llm = SlowChatModel(gate=threading.Event())
+    rag_chain = RAGChain(llm=llm, vectorstore_manager=vectorstore_manager, top_k=1)
+
+    async def scenario():
+        batch = asyncio.create_task(rag_chain.abatch_query([f"question {i}" for i in range(8)], max_concurrency=4))
+        # Calls are held at the gate; with no cap, all eight would pile up while it stays shut
+        while llm.in_flight < 4:
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.05)
+        llm.gate.set()
+        return await batch
+
+    results = asyncio.run(asyncio.wait_for(scenario(), timeout=30))
+
+    assert len(results) == 8 and not any(result.get("error") for result in results)
+    assert llm.peak_in_flight == 4
+
+    def flaky(inputs):
+        if "bad" in inputs["question"]:
+            raise RuntimeError("LLM unavailable")
+        return "ok"
+
+    rag_chain.answer_chain = RunnableLambda(flaky)
+    results = rag_chain.batch_query(["good question", "bad question"])
+    assert results[0] == {"answer": "ok", "sources": results[0]["sources"], "prompt_tokens": results[0]["prompt_tokens"]}
+    assert results[1]["error"] and "LLM unavailable" in results[1]["answer"]
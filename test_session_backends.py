@@ -0,0 +1,349 @@
+"""Tests for the shared session backends, the Redis one against a local fake server."""
+
+import json
+import socketserver
+import threading
+
+import pytest
+
+from src.utils.redis_client import RedisClient, RedisError
+from src.utils.session_store import (
+    InMemorySessionStore,
+    RedisSessionStore,
+    SQLiteSessionStore,
+    create_session_store
+)
+
+
+class FakeRedis(socketserver.ThreadingTCPServer):
+    """The subset of Redis the session store uses, speaking RESP2 over TCP."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _FakeRedisHandler)
+        self.lock = threading.Lock()
+        self.zsets = {}
+        self.lists = {}
+        self.strings = {}
+        self.versions = {}  # Bumped on every write, for WATCH
+
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def run(self, cmd, args):
+        name = cmd.upper()
+        if name in WRITE_COMMANDS:
+            for key in args if name == "DEL" else args[:1]:
+                self.versions[key] = self.versions.get(key, 0) + 1
+        if name in ("PING", "SELECT", "AUTH"):
+            return "OK"
+        if name == "ZADD":
+            key, flags = args[0], set()
+            rest = args[1:]
+            while rest[0].upper() in ("XX", "NX", "CH"):
+                flags.add(rest[0].upper())
+                rest = rest[1:]
+            zset = self.zsets.setdefault(key, {})
+            added = changed = 0
+            for score, member in zip(rest[::2], rest[1::2]):
+                if "XX" in flags and member not in zset:
+                    continue
+                if member not in zset:
+                    added += 1
+                elif zset[member] != float(score):
+                    changed += 1
+                zset[member] = float(score)
+            return added + changed if "CH" in flags else added
+        if name == "ZSCORE":
+            score = self.zsets.get(args[0], {}).get(args[1])
+            return None if score is None else repr(score).encode()
+        if name == "ZREMRANGEBYSCORE":
+            zset = self.zsets.get(args[0], {})
+            low, high = float(args[1]), float(args[2])
+            doomed = [member for member, score in zset.items() if low <= score <= high]
+            for member in doomed:
+                del zset[member]
+            return len(doomed)
+        if name == "ZCARD":
+            return len(self.zsets.get(args[0], {}))
+        if name == "ZPOPMIN":
+            zset = self.zsets.get(args[0], {})
+            popped = sorted(zset.items(), key=lambda item: (item[1], item[0]))[:int(args[1])]
+            for member, _ in popped:
+                del zset[member]
+            return [part for member, score in popped for part in (member.encode(), repr(score).encode())]
+        if name == "ZREM":
+            zset = self.zsets.get(args[0], {})
+            return sum(zset.pop(member, None) is not None for member in args[1:])
+        if name == "RPUSH":
+            items = self.lists.setdefault(args[0], [])
+            items.extend(args[1:])
+            return len(items)
+        if name in ("LRANGE", "LTRIM"):
+            items = self.lists.get(args[0], [])
+            start, stop = int(args[1]), int(args[2])
+            start = max(0, start + len(items)) if start < 0 else start
+            stop = stop + len(items) if stop < 0 else stop
+            kept = items[start:stop + 1]
+            if name == "LRANGE":
+                return [item.encode() for item in kept]
+            self.lists[args[0]] = kept
+            return "OK"
+        if name == "EXPIRE":
+            return int(any(args[0] in store for store in (self.zsets, self.lists, self.strings)))
+        if name == "DEL":
+            return sum(
+                any(store.pop(key, None) is not None for store in (self.zsets, self.lists, self.strings))
+                for key in args
+            )
+        if name == "GET":
+            value = self.strings.get(args[0])
+            return None if value is None else value.encode()
+        if name == "SET":
+            self.strings[args[0]] = args[1]
+            return "OK"
+        if name in ("INCR", "INCRBY"):
+            value = int(self.strings.get(args[0], 0)) + (int(args[1]) if name == "INCRBY" else 1)
+            self.strings[args[0]] = str(value)
+            return value
+        if name == "MGET":
+            return [None if self.strings.get(key) is None else self.strings[key].encode() for key in args]
+        return RedisError(f"ERR unknown command '{cmd}'")
+
+
+WRITE_COMMANDS = {
+    "ZADD", "ZREMRANGEBYSCORE", "ZPOPMIN", "ZREM", "RPUSH", "LTRIM", "SET", "EXPIRE", "DEL", "INCR", "INCRBY"
+}
+
+
+class _FakeRedisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        watched, queued = {}, None
+        while True:
+            header = self.rfile.readline()
+            if not header:
+                return
+            args = []
+            for _ in range(int(header[1:-2])):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2].decode("utf-8"))
+            name = args[0].upper()
+            with self.server.lock:
+                if name == "WATCH":
+                    watched.update((key, self.server.versions.get(key, 0)) for key in args[1:])
+                    reply = "OK"
+                elif name == "UNWATCH":
+                    watched, reply = {}, "OK"
+                elif name == "MULTI":
+                    queued, reply = [], "OK"
+                elif name == "EXEC":
+                    changed = any(self.server.versions.get(key, 0) != version for key, version in watched.items())
+                    reply = None if changed else [self.server.run(cmd[0], cmd[1:]) for cmd in queued]
+                    watched, queued = {}, None
+                elif queued is not None:
+                    queued.append(args)
+                    reply = "QUEUED"
+                else:
+                    reply = self.server.run(args[0], args[1:])
+            self.wfile.write(_encode_reply(reply))
+
+
+def _encode_reply(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, RedisError):
+        return b"-%s\r\n" % str(reply).encode()
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    return b"*%d\r\n" % len(reply) + b"".join(_encode_reply(item) for item in reply)
+
+
+class CountingClient(RedisClient):
+    """Counts round trips to the server."""
+
+    round_trips = 0
+
+    def pipeline(self, commands):
+        self.round_trips += 1
+        return super().pipeline(commands)
+
+
+class InterleavingClient(RedisClient):
+    """Lets another client append to the watched history between a transaction's read and its commit."""
+
+    def transaction(self, keys, reads, write):
+        def racing_write(replies):
+            commands = write(replies)
+            self.execute("RPUSH", keys[0], json.dumps(["late", "answer"]))
+            return commands
+
+        return super().transaction(keys, reads, racing_write)
+
+
+class TickingClock:
+    """Advances one second per reading, so every access has its own timestamp."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+@pytest.fixture
+def fake_redis():
+    server = FakeRedis()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_store(request, tmp_path):
+    """Factory for a store of each backend with the given limits and clock."""
+    stores = []
+
+    def make(clock, **limits):
+        if request.param == "memory":
+            store = InMemorySessionStore(clock=clock, **limits)
+        elif request.param == "sqlite":
+            store = SQLiteSessionStore(tmp_path / "sessions.db", clock=clock, **limits)
+        else:
+            server = request.getfixturevalue("fake_redis")
+            store = RedisSessionStore(RedisClient(server.url), clock=clock, **limits)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        store.close()
+
+
+def test_backends_evict_least_recently_used(make_store):
+    """Every backend evicts the session used longest ago once full."""
+    store = make_store(TickingClock(), max_sessions=2, ttl_seconds=0)
+    first, second = store.create(), store.create()
+    store.append(first, "q", "a")
+
+    third = store.create()
+
+    assert store.get_history(second) is None
+    assert store.get_history(first) == [("q", "a")] and store.get_history(third) == []
+    stats = store.stats()
+    assert (stats["active"], stats["created"], stats["evicted"]) == (2, 3, 1)
+
+
+def test_backends_expire_idle_sessions_and_trim_history(make_store):
+    """Every backend expires idle sessions, trims history and recreates evicted sessions on append."""
+    clock = TickingClock()
+    store = make_store(clock, ttl_seconds=60, max_history=2)
+    active, idle = store.create(), store.create()
+    for i in range(3):
+        store.append(active, f"q{i}", f"a{i}")
+    assert store.get_history(active) == [("q1", "a1"), ("q2", "a2")]
+
+    clock.now += 100
+    store.append(active, "late", "answer")
+
+    assert store.get_history(idle) is None
+    assert store.get_history(active) == [("late", "answer")]
+    assert store.stats()["expired"] == 2
+    assert store.clear(active) and store.get_history(active) == []
+    assert store.delete(active) and not store.delete(active) and not store.clear(active)
+
+
+def test_backends_fold_history_only_over_the_summarized_entries(make_store):
+    """Folding keeps appends made while summarizing, and is refused once the summarized entries are gone."""
+    store = make_store(TickingClock(), ttl_seconds=0, max_history=4)
+    session_id = store.create()
+    for i in range(3):
+        store.append(session_id, f"q{i}", f"a{i}")
+    summarized = store.get_history(session_id)[:2]
+    store.append(session_id, "q3", "a3")  # Answered while the summary was written
+
+    assert store.fold_history(session_id, summarized, ("\x00summary", "asked q0 and q1"))
+    history = store.get_history(session_id)
+    assert history == [("\x00summary", "asked q0 and q1"), ("q2", "a2"), ("q3", "a3")]
+
+    # Trimmed past the summarized exchanges meanwhile: the fold would drop unsummarized ones
+    for i in (4, 5, 6):
+        store.append(session_id, f"q{i}", f"a{i}")
+    assert not store.fold_history(session_id, history[:2], ("\x00summary", "stale"))
+    assert store.get_history(session_id) == [
+        ("\x00summary", "asked q0 and q1"), ("q3", "a3"), ("q4", "a4"), ("q5", "a5"), ("q6", "a6")
+    ]
+
+    # Cleared and refilled meanwhile
+    store.clear(session_id)
+    store.append(session_id, "new", "start")
+    assert store.get_history(session_id) == [("new", "start")]
+    assert not store.fold_history(session_id, [("q2", "a2")], ("\x00summary", "stale"))
+    assert store.delete(session_id)
+    assert not store.fold_history(session_id, [("new", "start")], ("\x00summary", "late"))
+    assert store.get_history(session_id) is None
+
+
+def test_backends_keep_the_summary_when_trimming(make_store):
+    """Trimming to max_history drops the oldest exchanges, never the rolling summary before them."""
+    store = make_store(TickingClock(), ttl_seconds=0, max_history=2)
+    session_id = store.create()
+    store.append(session_id, "q0", "a0")
+    store.append(session_id, "q1", "a1")
+    assert store.fold_history(session_id, [("q0", "a0")], ("\x00summary", "asked q0"))
+
+    for i in (2, 3, 4):
+        store.append(session_id, f"q{i}", f"a{i}")
+
+    assert store.get_history(session_id) == [("\x00summary", "asked q0"), ("q3", "a3"), ("q4", "a4")]
+    # The summary is replaced by the next fold, not added to
+    assert store.fold_history(session_id, [("\x00summary", "asked q0"), ("q3", "a3")], ("\x00summary", "q0-q3"))
+    assert store.get_history(session_id) == [("\x00summary", "q0-q3"), ("q4", "a4")]
+
+
+def test_redis_fold_is_dropped_when_history_changes_before_commit(fake_redis):
+    """The check and the fold form one WATCH transaction, so a concurrent write cancels the fold."""
+    store = RedisSessionStore(InterleavingClient(fake_redis.url), ttl_seconds=0)
+    session_id = store.create()
+    store.append(session_id, "q0", "a0")
+    store.append(session_id, "q1", "a1")
+
+    assert not store.fold_history(session_id, [("q0", "a0")], ("\x00summary", "asked q0"))
+    assert store.get_history(session_id) == [("q0", "a0"), ("q1", "a1"), ("late", "answer")]
+    store.close()
+
+
+def test_redis_store_uses_one_round_trip_per_operation(fake_redis):
+    """History reads and writes are each a single pipelined round trip."""
+    client = CountingClient(fake_redis.url)
+    store = RedisSessionStore(client, ttl_seconds=60, max_history=2)
+    session_id = store.create()
+    client.round_trips = 0
+
+    store.append(session_id, "question", "answer")
+    store.get_history(session_id)
+
+    assert client.round_trips == 2
+    assert store.get_history(session_id) == [("question", "answer")]
+    store.close()
+
+
+def test_session_store_factory(tmp_path, fake_redis):
+    """The factory builds each backend and rejects unknown ones."""
+    assert isinstance(create_session_store("memory"), InMemorySessionStore)
+    sqlite_store = create_session_store("sqlite", sqlite_path=tmp_path / "s.db")
+    redis_store = create_session_store("redis", redis_url=fake_redis.url)
+    assert isinstance(sqlite_store, SQLiteSessionStore) and isinstance(redis_store, RedisSessionStore)
+    sqlite_store.close()
+    redis_store.close()
+    with pytest.raises(ValueError):
+        create_session_store("memcached")
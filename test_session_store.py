@@ -0,0 +1,75 @@
+"""Tests for the bounded session store and its use by the API."""
+
+import asyncio
+
+import httpx
+
+import api.main as api_main
+from src.utils.rag_chain import RAGChain
+from src.utils.session_store import InMemorySessionStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_session_is_evicted_when_full():
+    """Creating a session beyond the limit evicts the one used longest ago."""
+    store = InMemorySessionStore(max_sessions=2, ttl_seconds=0)
+    first, second = store.create(), store.create()
+    store.get_history(first)
+
+    third = store.create()
+
+    assert store.get_history(second) is None
+    assert store.get_history(first) == [] and store.get_history(third) == []
+    assert store.stats()["evicted"] == 1 and len(store) == 2
+
+
+def test_idle_sessions_expire_and_history_is_trimmed():
+    """Idle sessions expire after the TTL; history keeps only the last exchanges."""
+    clock = FakeClock()
+    store = InMemorySessionStore(ttl_seconds=60, max_history=2, clock=clock)
+    active, idle = store.create(), store.create()
+    for i in range(3):
+        store.append(active, f"q{i}", f"a{i}")
+
+    clock.now = 45
+    store.get_history(active)
+    clock.now = 90
+
+    assert store.get_history(idle) is None
+    assert store.get_history(active) == [("q1", "a1"), ("q2", "a2")]
+    assert store.stats()["expired"] == 1
+
+
+def test_api_sessions_share_one_chain_and_stay_bounded(monkeypatch, vectorstore_manager, fake_llm):
+    """Anonymous queries create bounded sessions; follow-ups see their own history."""
+    chain = RAGChain(llm=fake_llm, vectorstore_manager=vectorstore_manager, top_k=2)
+    monkeypatch.setattr(api_main, "rag_chain", chain)
+    monkeypatch.setattr(api_main, "vectorstore_manager", vectorstore_manager)
+    monkeypatch.setattr(api_main, "session_store", InMemorySessionStore(max_sessions=3))
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=api_main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            ids = []
+            for _ in range(5):
+                response = await client.post("/api/query", json={"question": "reset password"})
+                ids.append(response.json()["session_id"])
+            await client.post("/api/query", json={"question": "and vpn?", "session_id": ids[-1]})
+            history = await client.get(f"/api/history/{ids[-1]}")
+            evicted = await client.get(f"/api/history/{ids[0]}")
+            status = await client.get("/api/status")
+            return history, evicted, status
+
+    history, evicted, status = asyncio.run(scenario())
+    assert [item["question"] for item in history.json()["history"]] == ["reset password", "and vpn?"]
+    assert evicted.status_code == 404
+    assert chain.chat_history == []
+    sessions = status.json()["sessions"]
+    assert (sessions["active"], sessions["created"], sessions["evicted"]) == (3, 5, 2)
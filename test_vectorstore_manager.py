@@ -0,0 +1,280 @@
+"""Offline tests for VectorStoreManager using fake embeddings."""
+
+import threading
+from pathlib import Path
+
+import faiss
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from src.utils.chunk_store import ChunkStore
+from src.utils.embedding_cache import QueryEmbeddingCache
+from src.utils.segment_store import SegmentStore, MigrationRequiredError
+
+
+def test_repeated_query_skips_embedding(vectorstore_manager):
+    """A normalized repeat of a query is served from the embedding cache."""
+    embeddings = vectorstore_manager.embeddings
+
+    first = vectorstore_manager.similarity_search("How do I reset my password?", k=2)
+    calls = embeddings.query_calls
+    second = vectorstore_manager.similarity_search("  how do I reset   my password?", k=2)
+
+    assert embeddings.query_calls == calls
+    assert [d.page_content for d in first] == [d.page_content for d in second]
+    stats = vectorstore_manager.query_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_query_cache_evicts_least_recently_used():
+    """The cache is bounded and keeps recently used keys."""
+    cache = QueryEmbeddingCache(max_size=2)
+    a, b, c = (QueryEmbeddingCache.make_key(t, "model") for t in ("a", "b", "c"))
+
+    cache.put(a, [1.0])
+    cache.put(b, [2.0])
+    assert cache.get(a) == [1.0]
+    cache.put(c, [3.0])
+
+    assert cache.get(b) is None
+    assert cache.get(a) == [1.0]
+    assert cache.stats()["size"] == 2
+
+
+def test_rebuild_index_switches_type_and_keeps_results(vectorstore_manager):
+    """Rebuilding as HNSW keeps chunk ids and persists the new index."""
+    before = vectorstore_manager.similarity_search("VPN hardware token", k=3)
+    vectorstore_manager.rebuild_index("hnsw")
+
+    assert isinstance(vectorstore_manager.vector_index.base_index, faiss.IndexHNSWFlat)
+    after = vectorstore_manager.similarity_search("VPN hardware token", k=3)
+    assert [d.id for d in after] == [d.id for d in before]
+
+    reloaded = type(vectorstore_manager)(vectorstore_manager.vectorstore_path)
+    assert isinstance(reloaded.vector_index.base_index, faiss.IndexHNSWFlat)
+
+
+def test_add_documents_appends_segment_without_rewriting_snapshot(vectorstore_manager):
+    """Small ingests write a segment only; a reload replays it."""
+    root = vectorstore_manager.vectorstore_path
+    base = root / vectorstore_manager.store._manifest["base"]
+    snapshot_mtime = (base / "index.faiss").stat().st_mtime_ns
+
+    vectorstore_manager.add_documents([Document(page_content="Badge photos are taken at reception.")])
+
+    assert (base / "index.faiss").stat().st_mtime_ns == snapshot_mtime
+    assert len(vectorstore_manager.store.pending_segments) == 1
+
+    reloaded = type(vectorstore_manager)(root)
+    assert reloaded.vector_index.ntotal == 6
+    assert reloaded.similarity_search("badge photos reception", k=1)[0].page_content.startswith("Badge")
+
+
+def test_compaction_folds_segments_and_ignores_torn_writes(vectorstore_manager):
+    """Compaction empties the segment list; unreferenced files are ignored on load."""
+    root = vectorstore_manager.vectorstore_path
+    for i in range(3):
+        vectorstore_manager.add_documents([Document(page_content=f"Extra note number {i}")])
+
+    vectorstore_manager.compact()
+    assert vectorstore_manager.store.pending_segments == []
+    assert not any((root / "segments").glob("*.npy"))
+
+    # A segment written but never committed to the manifest (crash before commit)
+    (root / "segments" / "999999.jsonl").write_text("{not json")
+    reloaded = type(vectorstore_manager)(root)
+    assert reloaded.vector_index.ntotal == 8
+
+
+def test_legacy_directory_requires_migration(tmp_path, vectorstore_manager, sample_documents):
+    """Pickled save_local directories are never unpickled on load; migrate converts them once."""
+    legacy = tmp_path / "legacy"
+    legacy_store = FAISS.from_documents(sample_documents, vectorstore_manager.embeddings)
+    legacy_store.save_local(str(legacy))
+    expected = legacy_store.similarity_search("How do I reset my password?", k=2)
+
+    manager = type(vectorstore_manager)(legacy)
+    assert not manager.is_initialized()
+    with pytest.raises(MigrationRequiredError):
+        manager.add_documents([Document(page_content="Would overwrite the legacy chunks.")])
+
+    assert SegmentStore(legacy).migrate() == 5
+    assert not (legacy / "index.pkl").exists()
+    assert SegmentStore(legacy).migrate() == 0
+
+    manager = type(vectorstore_manager)(legacy)
+    assert isinstance(manager.vector_index.base_chunks, ChunkStore)
+    # Dense results match the legacy store exactly (hybrid search would also fuse in BM25)
+    results = manager.similarity_search_by_vector(manager.embed_query("How do I reset my password?"), k=2)
+    assert [d.id for d in results] == [d.id for d in expected]
+
+    manager.add_documents([Document(page_content="Migrated directories keep working.")])
+    manager.compact()
+    assert type(vectorstore_manager)(legacy).vector_index.ntotal == 6
+
+
+def test_bundled_vectorstore_opens_without_migration():
+    """The store shipped with the repository is already in the chunk store format."""
+    store = SegmentStore(Path(__file__).parent / "vectorstore")
+    assert store.exists() and not store.needs_migration()
+    assert store.load().live_count > 0
+
+
+def test_chunk_store_batched_lookup_keeps_request_order(vectorstore_manager):
+    """get_many returns chunks in the order asked for, including repeats."""
+    chunks = vectorstore_manager.vector_index.base_chunks
+    docs = chunks.get_many([4, 1, 4, 0])
+    assert [d.metadata["source"] for d in docs] == [
+        "kb/article_4.txt", "kb/article_1.txt", "kb/article_4.txt", "kb/article_0.txt"
+    ]
+    assert chunks.get_many([]) == []
+
+
+def test_snapshot_uses_memory_mapped_chunk_store(vectorstore_manager):
+    """Compacted snapshots are opened through the offset-indexed chunk store."""
+    vector_index = vectorstore_manager.vector_index
+    assert isinstance(vector_index.base_chunks, ChunkStore)
+
+    docs = vector_index.get_documents([3, 0])
+    assert [d.metadata["source"] for d in docs] == ["kb/article_3.txt", "kb/article_0.txt"]
+
+    vectorstore_manager.add_documents([Document(page_content="Lockers are assigned by facilities.")])
+    vectorstore_manager.compact()
+    assert len(vectorstore_manager.vector_index.base_chunks) == 6
+    assert vectorstore_manager.vector_index.delta_count == 0
+
+
+def test_add_documents_skips_chunks_already_indexed(vectorstore_manager, sample_documents):
+    """Chunks are keyed by content hash; re-adding them neither embeds nor indexes them again."""
+    embeddings = vectorstore_manager.embeddings
+    calls = embeddings.document_calls
+    new = Document(page_content="Parking permits renew every January.", metadata={"source": "kb/parking.txt"})
+
+    assert vectorstore_manager.add_documents(sample_documents + [new, new]) == 1
+    assert vectorstore_manager.vector_index.ntotal == 6
+    assert vectorstore_manager.add_documents([new]) == 0
+    assert embeddings.document_calls == calls + 1
+
+    reloaded = type(vectorstore_manager)(vectorstore_manager.vectorstore_path)
+    assert reloaded.add_documents(sample_documents) == 0
+
+
+def test_failed_rebuild_keeps_the_content_registry(vectorstore_manager, sample_documents, monkeypatch):
+    """The registry is only reset once the replacement store has been written."""
+    registry = vectorstore_manager.content_registry
+    registry.record_files([(vectorstore_manager.vectorstore_path / "kb.txt", (1, 2, "hash"))])
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patch, pytest.raises(OSError):
+        patch.setattr(vectorstore_manager.store, "write_base", fail)
+        vectorstore_manager.create_vectorstore([Document(page_content="A different corpus.")])
+
+    assert registry.chunk_count() == 5
+    assert registry.file_state(vectorstore_manager.vectorstore_path / "kb.txt") == (1, 2, "hash")
+    assert vectorstore_manager.add_documents(sample_documents) == 0
+
+    vectorstore_manager.create_vectorstore([Document(page_content="A different corpus.")])
+    assert registry.chunk_count() == 1
+    assert registry.file_state(vectorstore_manager.vectorstore_path / "kb.txt") is None
+
+
+def _sources(manager, query, k=10):
+    return [doc.metadata["source"] for doc in manager.similarity_search(query, k=k)]
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_delete_source_tombstones_then_compacts_away(vectorstore_manager, index_type):
+    """Deleted sources vanish from search at once, survive a restart, and are dropped by compaction."""
+    vectorstore_manager.COMPACTION_TOMBSTONE_RATIO = 1.0  # compact explicitly below
+    if index_type != "flat":
+        vectorstore_manager.rebuild_index(index_type)
+    vectorstore_manager.add_documents([
+        Document(page_content="VPN tokens are replaced by the service desk.", metadata={"source": "kb/vpn_faq.txt"})
+    ])
+
+    assert vectorstore_manager.delete_source("kb/article_1.txt") == 1
+    assert vectorstore_manager.delete_source("kb/vpn_faq.txt") == 1
+    assert vectorstore_manager.delete_source("kb/unknown.txt") == 0
+    remaining = _sources(vectorstore_manager, "vpn hardware token")
+    assert "kb/article_1.txt" not in remaining and "kb/vpn_faq.txt" not in remaining
+    assert len(remaining) == 4
+
+    reloaded = type(vectorstore_manager)(vectorstore_manager.vectorstore_path)
+    assert reloaded.vector_index.live_count == 4
+    assert "kb/article_1.txt" not in _sources(reloaded, "vpn hardware token")
+
+    vectorstore_manager.compact()
+    vector_index = vectorstore_manager.vector_index
+    assert (vector_index.ntotal, vector_index.deleted) == (4, set())
+    assert type(vectorstore_manager)(vectorstore_manager.vectorstore_path).vector_index.ntotal == 4
+    assert sorted(_sources(vectorstore_manager, "printer")) == [
+        "kb/article_0.txt", "kb/article_2.txt", "kb/article_3.txt", "kb/article_4.txt"
+    ]
+
+
+def test_upsert_source_only_embeds_changed_chunks(vectorstore_manager, sample_documents):
+    """An updated document keeps unchanged chunks, embeds new ones and removes stale ones."""
+    embeddings = vectorstore_manager.embeddings
+    source = "kb/handbook.txt"
+    old = [
+        Document(page_content="Badges are issued at reception.", metadata={"source": source}),
+        Document(page_content="Visitors must sign in.", metadata={"source": source}),
+    ]
+    vectorstore_manager.add_documents(old)
+    embedded = embeddings.document_calls
+
+    new = [old[0], Document(page_content="Visitors sign in on the lobby tablet.", metadata={"source": source})]
+    assert vectorstore_manager.upsert_source(source, new) == (1, 1)
+    assert embeddings.document_calls == embedded + 1
+
+    contents = [d.page_content for d in vectorstore_manager.similarity_search("visitors sign in", k=10)]
+    assert "Visitors must sign in." not in contents
+    assert "Visitors sign in on the lobby tablet." in contents
+    assert vectorstore_manager.vector_index.live_count == len(sample_documents) + 2
+
+    # A deleted chunk can be added back later
+    vectorstore_manager.delete_source(source)
+    assert vectorstore_manager.add_documents(old) == 2
+
+
+def test_readers_keep_a_consistent_snapshot_while_writers_swap_versions(vectorstore_manager):
+    """A held version never changes; searches racing adds and deletes see whole versions."""
+    snapshot = vectorstore_manager.vector_index
+    version = vectorstore_manager.index_version
+    stop = threading.Event()
+    errors = []
+
+    def search():
+        while not stop.is_set():
+            index = vectorstore_manager.vector_index
+            try:
+                hits = index.search(np.ones((1, index.dim), dtype=np.float32), k=index.live_count)[0]
+                assert len(hits) == index.live_count
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=search) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for i in range(40):
+        vectorstore_manager.add_documents(
+            [Document(page_content=f"Release note {i} for build {i * 7}.", metadata={"source": f"notes/{i % 5}.txt"})]
+        )
+        if i % 10 == 9:
+            vectorstore_manager.delete_source(f"notes/{i % 5}.txt")
+    stop.set()
+    for reader in readers:
+        reader.join()
+    if vectorstore_manager._compaction_thread is not None:
+        vectorstore_manager._compaction_thread.join()
+
+    assert errors == []
+    assert vectorstore_manager.index_version > version
+    assert snapshot.ntotal == 5 and snapshot.deleted == frozenset()
+    assert len(snapshot.search(np.ones((1, snapshot.dim), dtype=np.float32), k=50)[0]) == 5